@@ -0,0 +1,175 @@
+import os
+import threading
+import config
+from utils import logger
+from metrics import metrics
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+def _proc_rss_kb(pid):
+    try:
+        with open(f"/proc/{pid}/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError, IndexError):
+        return 0
+
+def _proc_children():
+    children = {}
+    try:
+        pids = [p for p in os.listdir("/proc") if p.isdigit()]
+    except OSError:
+        return children
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/stat", "r") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        children.setdefault(ppid, []).append(int(pid))
+    return children
+
+def process_tree_rss_mb():
+    if psutil is not None:
+        proc = psutil.Process()
+        total = proc.memory_info().rss
+        for child in proc.children(recursive=True):
+            try:
+                total += child.memory_info().rss
+            except psutil.Error:
+                pass
+        return total / (1024 * 1024)
+    children = _proc_children()
+    stack = [os.getpid()]
+    total_kb = 0
+    while stack:
+        pid = stack.pop()
+        total_kb += _proc_rss_kb(pid)
+        stack.extend(children.get(pid, ()))
+    return total_kb / 1024
+
+def total_memory_mb():
+    if psutil is not None:
+        return psutil.virtual_memory().total / (1024 * 1024)
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / (1024 * 1024)
+    except (ValueError, OSError, AttributeError):
+        return None
+
+def cpu_load():
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except (OSError, AttributeError):
+        return None
+
+class Autoscaler:
+    """Adjusts how many workers of a crack stage are active.
+
+    Every ``interval`` seconds it samples the RSS of this process and its
+    children (the browsers), the load average per CPU, and the mean attempt
+    latency and timeout rate since the last sample. If the stage is over its
+    memory budget, load ceiling or timeout-rate ceiling, it sheds a quarter
+    of its workers. If it has headroom on all of them and latency is within
+    AUTOSCALE_LATENCY_FACTOR of the best seen, it grows by a quarter,
+    provided the estimated memory of the new workers still fits.
+    ``apply(n)`` sets the active count.
+    """
+
+    def __init__(self, mode, apply, initial, min_workers=None, max_workers=None, interval=None, memory_mb=None):
+        self.mode = mode
+        self.apply = apply
+        self.min_workers = max(1, min_workers or config.AUTOSCALE_MIN_WORKERS)
+        self.max_workers = max(self.min_workers, max_workers or self.min_workers)
+        self.interval = interval or config.AUTOSCALE_INTERVAL
+        budget = memory_mb or config.AUTOSCALE_MEMORY_MB
+        if not budget:
+            total = total_memory_mb()
+            budget = total * config.AUTOSCALE_MEMORY_FRACTION if total else None
+        self.memory_mb = budget
+        self.active = min(max(initial, self.min_workers), self.max_workers)
+        self.best_latency = None
+        self.changes = 0
+        self.last_sample = {}
+        self._last_attempts = metrics.phase_totals(mode, "attempt")
+        self._last_timeouts = self._timeouts()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _timeouts(self):
+        return metrics.counter_total("errors_total", mode=self.mode, match=lambda labels: "Timeout" in labels.get("type", ""))
+
+    def start(self):
+        self.apply(self.active)
+        self._thread = threading.Thread(target=self._loop, name=f"{self.mode}-autoscaler", daemon=True)
+        self._thread.start()
+        logger.info(f"[Autoscaler] {self.mode}: {self.active} workers (min={self.min_workers}, max={self.max_workers}, memory_budget={round(self.memory_mb) if self.memory_mb else None}MB)")
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(self.interval + 1)
+
+    def stats(self):
+        return {
+            "active": self.active,
+            "min": self.min_workers,
+            "max": self.max_workers,
+            "changes": self.changes,
+            "memory_budget_mb": round(self.memory_mb) if self.memory_mb else None,
+            "last_sample": dict(self.last_sample)
+        }
+
+    def sample(self):
+        count, total = metrics.phase_totals(self.mode, "attempt")
+        last_count, last_total = self._last_attempts
+        self._last_attempts = (count, total)
+        attempts = count - last_count
+        timeouts = self._timeouts()
+        new_timeouts = timeouts - self._last_timeouts
+        self._last_timeouts = timeouts
+        return {
+            "rss_mb": round(process_tree_rss_mb(), 1),
+            "load": cpu_load(),
+            "attempts": attempts,
+            "latency_ms": round((total - last_total) / attempts * 1000, 1) if attempts else None,
+            "timeout_rate": round(new_timeouts / attempts, 3) if attempts else 0.0
+        }
+
+    def decide(self, s):
+        n = self.active
+        over_memory = self.memory_mb is not None and s["rss_mb"] > self.memory_mb
+        over_load = s["load"] is not None and s["load"] > config.AUTOSCALE_MAX_LOAD
+        if over_memory or over_load or s["timeout_rate"] > config.AUTOSCALE_MAX_TIMEOUT_RATE:
+            return max(self.min_workers, n - max(1, n // 4))
+        latency = s["latency_ms"]
+        if latency is None:
+            return n
+        if self.best_latency is None or latency < self.best_latency:
+            self.best_latency = latency
+        if latency > self.best_latency * config.AUTOSCALE_LATENCY_FACTOR:
+            return max(self.min_workers, n - 1)
+        step = max(1, n // 4)
+        per_worker = s["rss_mb"] / n if n else 0
+        if self.memory_mb is not None and s["rss_mb"] + per_worker * step > self.memory_mb:
+            return n
+        if s["load"] is not None and s["load"] > config.AUTOSCALE_MAX_LOAD * 0.8:
+            return n
+        return min(self.max_workers, n + step)
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                s = self.sample()
+                self.last_sample = s
+                n = self.decide(s)
+            except Exception as e:
+                logger.warning(f"[Autoscaler] {self.mode} sample failed: {e}")
+                continue
+            if n != self.active:
+                logger.info(f"[Autoscaler] {self.mode}: {self.active} -> {n} workers ({s})")
+                self.active = n
+                self.changes += 1
+                self.apply(n)
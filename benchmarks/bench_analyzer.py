@@ -0,0 +1,89 @@
+import os
+import sys
+import time
+import json
+import logging
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from utils import logger
+from page_analyzer import analyze_chunks
+
+try:
+    from bs4 import BeautifulSoup
+except ImportError:
+    BeautifulSoup = None
+
+LOGIN_FORM = (
+    '<form action="/login" method="post">'
+    '<input type="text" name="username"><input type="password" name="password">'
+    '<button type="submit">Login</button></form>'
+)
+
+def legacy_classify(text):
+    soup = BeautifulSoup(text, 'html.parser')
+    if not soup.find('input', {'type': 'password'}):
+        return "unknown"
+    html_content = text.lower()
+    for keyword in config.ENCRYPTION_KEYWORDS:
+        if keyword in html_content:
+            return "complex"
+    for img in soup.find_all('img'):
+        img_class = img.get('class', [])
+        if isinstance(img_class, list):
+            img_class = ' '.join(img_class)
+        fields = [img.get('src', ''), img.get('id', ''), img_class, img.get('alt', '')]
+        if any(k in f.lower() for f in fields for k in ["captcha", "code", "verify", "check", "yzm", "random"]):
+            return "complex"
+    for i in soup.find_all('input'):
+        fields = [i.get('name', ''), i.get('id', ''), i.get('placeholder', '')]
+        if any(k in f.lower() for f in fields for k in ["captcha", "code", "verify", "yzm", "验证码"]):
+            return "complex"
+    return "simple"
+
+def streaming_classify(body):
+    chunk = config.ANALYZER_CHUNK_SIZE
+    analyzer = analyze_chunks(body[i:i + chunk] for i in range(0, len(body), chunk))
+    if not analyzer.has_password:
+        return "unknown"
+    return "complex" if analyzer.is_complex else "simple"
+
+def build_pages():
+    filler_js = "<script>" + "var x = [1, 2, 3].map(function (v) { return v * 2; });\n" * 60000 + "</script>"
+    markup = "<div class='row'><span>item</span><a href='/x'>link</a></div>\n" * 20000
+    return {
+        "small_simple": "<html><body>" + LOGIN_FORM + "</body></html>",
+        "large_js_encrypt_first": "<html><head><script src='/js/jsencrypt.min.js'></script></head><body>"
+                                  + LOGIN_FORM + filler_js + "</body></html>",
+        "large_js_simple": "<html><body>" + LOGIN_FORM + filler_js + "</body></html>",
+        "large_markup_captcha": "<html><body>" + LOGIN_FORM + "<img id='captchaImg' src='/captcha'>" + markup + "</body></html>",
+    }
+
+def timeit(fn, arg, rounds):
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def main(rounds=5):
+    logger.setLevel(logging.WARNING)
+    report = []
+    for name, text in build_pages().items():
+        body = text.encode('utf-8')
+        row = {"page": name, "size_kb": len(body) // 1024,
+               "streaming_ms": round(timeit(streaming_classify, body, rounds), 2),
+               "verdict": streaming_classify(body)}
+        if BeautifulSoup is not None:
+            row["legacy_ms"] = round(timeit(legacy_classify, text, rounds), 2)
+            row["legacy_verdict"] = legacy_classify(text)
+            row["speedup"] = round(row["legacy_ms"] / max(row["streaming_ms"], 1e-6), 1)
+        report.append(row)
+        print(json.dumps(row, ensure_ascii=False))
+    if BeautifulSoup is None:
+        print("beautifulsoup4 not installed, legacy timings skipped")
+    return report
+
+if __name__ == '__main__':
+    main()
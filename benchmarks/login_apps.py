@@ -0,0 +1,144 @@
+import json
+import time
+import base64
+import random
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+VALID_USER = "admin"
+VALID_PASSWORD = "admin123"
+
+FORM_PAGE = """<html><head><title>Login</title></head><body>
+<form action="{action}" method="post">
+<input type="text" name="username"><input type="password" name="password">
+<button type="submit">Login</button>
+</form>{extra}</body></html>"""
+
+ENCRYPT_PAGE = """<html><head><title>Login</title><script src="/static/jsencrypt.js"></script></head><body>
+<input type="text" id="user"><input type="password" id="pwd">
+<button type="submit" id="go">Login</button><div class="error" style="display:none"></div>
+<script>
+document.getElementById('go').addEventListener('click', function () {
+    var body = JSON.stringify({u: document.getElementById('user').value, p: btoa(document.getElementById('pwd').value)});
+    fetch('/encrypt/api/login', {method: 'POST', headers: {'Content-Type': 'application/json'}, body: body})
+        .then(function (r) { return r.json(); })
+        .then(function (d) {
+            if (d.code === 0) { location.href = '/encrypt/home'; return; }
+            var e = document.querySelector('.error'); e.textContent = 'invalid password'; e.style.display = 'block';
+        });
+});
+</script></body></html>"""
+
+HOME_PAGE = "<html><body><h1>Welcome to the dashboard</h1><a href='/logout'>logout</a></body></html>"
+FAIL_PAGE = "<html><body><p>invalid credentials, please retry</p></body></html>"
+LARGE_FILLER = "<script>" + "".join(f"var v{i} = {i};\n" for i in range(150000)) + "</script>"
+
+class LoginHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    jitter = random.Random(1337)
+    jitter_lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body="", headers=None, content_type="text/html; charset=utf-8"):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length).decode("utf-8", errors="replace")
+
+    def _slow(self):
+        with self.jitter_lock:
+            delay = self.jitter.uniform(0.02, 0.2)
+        time.sleep(delay)
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path in ("/plain", "/slow"):
+            self._send(200, FORM_PAGE.format(action=path + "/login", extra=""))
+        elif path == "/redirect":
+            self._send(200, FORM_PAGE.format(action="/redirect/login", extra=""))
+        elif path == "/large":
+            self._send(200, FORM_PAGE.format(action="/large/login", extra=LARGE_FILLER))
+        elif path == "/encrypt":
+            self._send(200, ENCRYPT_PAGE)
+        elif path == "/static/jsencrypt.js":
+            self._send(200, "window.JSEncrypt = function () {};", {"Cache-Control": "max-age=3600"}, "application/javascript")
+        elif path.endswith("/home"):
+            self._send(200, HOME_PAGE)
+        else:
+            self._send(404, "not found")
+
+    def do_POST(self):
+        path = urlsplit(self.path).path
+        body = self._read_body()
+        if path == "/encrypt/api/login":
+            data = json.loads(body or "{}")
+            try:
+                password = base64.b64decode(data.get("p", "")).decode("utf-8")
+            except Exception:
+                password = ""
+            ok = data.get("u") == VALID_USER and password == VALID_PASSWORD
+            self._send(200, json.dumps({"code": 0 if ok else 1}), content_type="application/json")
+            return
+        form = {k: v[0] for k, v in parse_qs(body).items()}
+        ok = form.get("username") == VALID_USER and form.get("password") == VALID_PASSWORD
+        if path == "/slow/login":
+            self._slow()
+        if path == "/redirect/login":
+            location = "/redirect/home" if ok else "/redirect?error=1"
+            self._send(302, "", {"Location": location})
+        elif path in ("/plain/login", "/slow/login", "/large/login"):
+            self._send(200, HOME_PAGE if ok else FAIL_PAGE)
+        else:
+            self._send(404, "not found")
+
+class LoginApps:
+    """Stand-in login applications, one localhost port per app.
+
+    Separate ports keep the apps on separate hosts as far as the
+    per-host concurrency limit is concerned.
+    """
+
+    APPS = ("plain", "redirect", "encrypt", "slow", "large")
+
+    def __init__(self, host="127.0.0.1", base_port=0):
+        self.servers = {}
+        for index, app in enumerate(self.APPS):
+            server = ThreadingHTTPServer((host, base_port + index if base_port else 0), LoginHandler)
+            server.daemon_threads = True
+            self.servers[app] = server
+        self.threads = [threading.Thread(target=s.serve_forever, daemon=True) for s in self.servers.values()]
+
+    def url(self, app):
+        host, port = self.servers[app].server_address[:2]
+        return f"http://{host}:{port}/{app}"
+
+    def __enter__(self):
+        for t in self.threads:
+            t.start()
+        return self
+
+    def __exit__(self, *exc):
+        for server in self.servers.values():
+            server.shutdown()
+            server.server_close()
+
+if __name__ == "__main__":
+    with LoginApps(base_port=8765) as apps:
+        for app in LoginApps.APPS:
+            print(apps.url(app))
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
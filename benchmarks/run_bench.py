@@ -0,0 +1,185 @@
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+import resource
+import threading
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+import config
+from utils import logger
+from metrics import metrics
+from login_apps import LoginApps, VALID_USER, VALID_PASSWORD
+
+SIMPLE_APPS = ("plain", "redirect", "slow", "large")
+COMPLEX_APPS = ("encrypt",)
+
+def peak_rss_kb():
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    }
+
+class FirstAttempt(threading.Thread):
+    """Polls the attempt histogram to time the first completed attempt."""
+
+    def __init__(self, mode):
+        super().__init__(name="bench-first-attempt", daemon=True)
+        self.mode = mode
+        self.seen = metrics.phase_totals(mode, "attempt")[0]
+        self.at = None
+        self.done = threading.Event()
+
+    def run(self):
+        while not self.done.wait(0.002):
+            if metrics.phase_totals(self.mode, "attempt")[0] > self.seen:
+                self.at = time.perf_counter()
+                return
+
+def write_wordlists(workdir, users, passwords):
+    usernames = [f"user{i}" for i in range(users - 1)] + [VALID_USER]
+    pwds = [f"wrong{i}" for i in range(passwords - 1)] + [VALID_PASSWORD]
+    config.USERNAME_FILE = os.path.join(workdir, "usernames.txt")
+    config.PASSWORD_FILE = os.path.join(workdir, "passwords.txt")
+    with open(config.USERNAME_FILE, "w", encoding="utf-8") as f:
+        f.write("\n".join(usernames) + "\n")
+    with open(config.PASSWORD_FILE, "w", encoding="utf-8") as f:
+        f.write("\n".join(pwds) + "\n")
+
+def isolate_config(workdir):
+    config.RESULTS_FILE = os.path.join(workdir, "results.txt")
+    config.RESULTS_DB = os.path.join(workdir, "results.db")
+    config.CHECKPOINT_FILE = os.path.join(workdir, "checkpoint.db")
+    config.PROFILE_CACHE_FILE = os.path.join(workdir, "profiles.json")
+    config.USE_PROFILE_CACHE = False
+    config.PERSIST_LISTS = False
+    config.RESUME = True
+    config.STOP_ON_SUCCESS = True
+    config.EXECUTION_MODE = "thread"
+    config.HEADLESS = True
+    from checkpoint import checkpoints
+    from results_store import results_store
+    checkpoints.path = config.CHECKPOINT_FILE
+    results_store.path = config.RESULTS_DB
+    results_store.legacy_file = config.RESULTS_FILE
+    return checkpoints
+
+def bench_classifier(apps):
+    import classifier
+    urls = [apps.url(app) for app in LoginApps.APPS]
+    first = []
+    start = time.perf_counter()
+    result = classifier.classify_targets(urls, on_result=lambda kind, entry: first or first.append(time.perf_counter()))
+    elapsed = time.perf_counter() - start
+    return {
+        "urls": len(urls),
+        "elapsed_s": round(elapsed, 3),
+        "urls_per_sec": round(len(urls) / elapsed, 2),
+        "startup_ms": round((first[0] - start) * 1000, 2) if first else None,
+        "verdicts": {kind: len(entries) for kind, entries in result.items()}
+    }
+
+def bench_cracker(mode, urls, checkpoints):
+    if mode == "simple":
+        import cracker_simple as cracker
+        run = cracker.run_simple_crack
+    else:
+        import cracker_complex as cracker
+        run = cracker.run_complex_crack
+    checkpoints.reset()
+    before, _ = metrics.phase_totals(mode, "attempt")
+    first = FirstAttempt(mode)
+    start = time.perf_counter()
+    first.start()
+    try:
+        results = run(targets=urls)
+        elapsed = time.perf_counter() - start
+    finally:
+        first.done.set()
+    attempts = metrics.phase_totals(mode, "attempt")[0] - before
+    phase = metrics.summary()["phases"].get(mode, {}).get("attempt", {})
+    return {
+        "targets": len(urls),
+        "found": len(results),
+        "attempts": attempts,
+        "elapsed_s": round(elapsed, 3),
+        "attempts_per_sec": round(attempts / elapsed, 2) if elapsed else None,
+        "startup_ms": round((first.at - start) * 1000, 2) if first.at else None,
+        "p50_ms": phase.get("p50_ms"),
+        "p95_ms": phase.get("p95_ms"),
+        "p99_ms": phase.get("p99_ms")
+    }
+
+def compare(report, baseline, tolerance):
+    regressions = []
+    for mode in ("simple", "complex"):
+        now, before = report.get(mode), baseline.get(mode)
+        if not isinstance(now, dict) or not isinstance(before, dict):
+            continue
+        if before.get("attempts_per_sec") and now.get("attempts_per_sec") is not None:
+            if now["attempts_per_sec"] < before["attempts_per_sec"] * (1 - tolerance):
+                regressions.append(f"{mode}.attempts_per_sec {before['attempts_per_sec']} -> {now['attempts_per_sec']}")
+        if before.get("p95_ms") and now.get("p95_ms") is not None:
+            if now["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+                regressions.append(f"{mode}.p95_ms {before['p95_ms']} -> {now['p95_ms']}")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline throughput benchmark against local stand-in login apps")
+    parser.add_argument("--users", type=int, default=3)
+    parser.add_argument("--passwords", type=int, default=100)
+    parser.add_argument("--skip", action="append", default=[], choices=["classifier", "simple", "complex"])
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--baseline", help="compare against a previous JSON report and exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args(argv)
+    if not args.verbose:
+        logger.setLevel(logging.WARNING)
+    workdir = tempfile.mkdtemp(prefix="lichauto-bench-")
+    checkpoints = isolate_config(workdir)
+    write_wordlists(workdir, args.users, args.passwords)
+    report = {
+        "meta": {
+            "users": args.users,
+            "passwords": args.passwords,
+            "simple_workers": config.SIMPLE_WORKERS,
+            "threads": config.THREADS,
+            "per_host_limit": config.PER_HOST_LIMIT,
+            "python": sys.version.split()[0],
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")
+        }
+    }
+    with LoginApps() as apps:
+        if "classifier" not in args.skip:
+            report["classifier"] = bench_classifier(apps)
+        if "simple" not in args.skip:
+            report["simple"] = bench_cracker("simple", [apps.url(a) for a in SIMPLE_APPS], checkpoints)
+        if "complex" not in args.skip:
+            try:
+                report["complex"] = bench_cracker("complex", [apps.url(a) for a in COMPLEX_APPS], checkpoints)
+            except ImportError as e:
+                report["complex"] = {"skipped": f"playwright unavailable: {e}"}
+    report["peak_rss_kb"] = peak_rss_kb()
+    report["metrics"] = metrics.summary()
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION: {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,559 @@
+import queue
+import atexit
+import asyncio
+import threading
+from collections import deque
+from urllib.parse import urlsplit
+from concurrent.futures import Future
+import config
+from utils import logger
+from resource_router import router
+from metrics import metrics
+from tracing import set_lane
+
+WIPE_STORAGE_JS = """
+async () => {
+    const quiet = async (fn) => { try { await fn(); } catch (e) {} };
+    await quiet(() => localStorage.clear());
+    await quiet(() => sessionStorage.clear());
+    await quiet(async () => {
+        for (const db of await indexedDB.databases()) {
+            await new Promise((done) => {
+                const req = indexedDB.deleteDatabase(db.name);
+                req.onsuccess = req.onerror = req.onblocked = done;
+            });
+        }
+    });
+    await quiet(async () => {
+        for (const reg of await navigator.serviceWorker.getRegistrations()) await reg.unregister();
+    });
+    await quiet(async () => {
+        for (const key of await caches.keys()) await caches.delete(key);
+    });
+}
+"""
+
+def _origin(url):
+    parts = urlsplit(url or "")
+    return f"{parts.scheme}://{parts.netloc}" if parts.scheme in ("http", "https") else None
+
+class _Lease:
+    """A context and its page, with the origins the page has visited so
+    their storage can be wiped before the next task."""
+
+    __slots__ = ("context", "page", "uses", "origins")
+
+    def __init__(self, context, page):
+        self.context = context
+        self.page = page
+        self.uses = 0
+        self.origins = set()
+        page.on("framenavigated", self._navigated)
+
+    def _navigated(self, frame):
+        origin = _origin(frame.url) if frame.parent_frame is None else None
+        if origin:
+            self.origins.add(origin)
+
+    def wipeable(self):
+        """Storage can only be cleared from a page on its origin, so a
+        context is reusable when the page never left the origin it is on."""
+        return self.origins <= {_origin(self.page.url)}
+
+class _PoolBase:
+    """What both browser pools share: lease counters, launch and context
+    options, and when a used context may go back to the idle list."""
+
+    def __init__(self, max_uses=None, **counters):
+        self.max_uses = max_uses or config.POOL_CONTEXT_MAX_USES
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "recycled": 0,
+            "crashed": 0,
+            "browser_launches": 0,
+            "tasks": 0,
+            **counters
+        }
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        leases = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / leases, 3) if leases else 0.0
+        return stats
+
+    def _count(self, key, n=1):
+        with self._lock:
+            self._stats[key] += n
+        metrics.inc("browser_pool_events_total", n, event=key)
+
+    def _launch_options(self):
+        return {"headless": config.HEADLESS}
+
+    def _context_options(self):
+        return {"ignore_https_errors": True}
+
+    def _reusable(self, lease, healthy):
+        if not healthy:
+            self._count("crashed")
+        return healthy and lease.uses < self.max_uses and lease.wipeable()
+
+class BrowserPool(_PoolBase):
+    """Long-lived Chromium workers with prewarmed contexts.
+
+    The sync Playwright API is bound to the thread that started it, so each
+    slot is a dedicated thread owning one browser, launched and prewarmed
+    as soon as the slot starts. Work is submitted as
+    ``fn(page, context, *args)`` and runs on whichever slot is free, using a
+    prewarmed context when one is idle. A slot whose driver or browser
+    cannot start is marked dead; once no active slot is left, queued and
+    new work fails with its error instead of waiting. Contexts are recycled after
+    ``max_uses`` tasks or as soon as their page or browser dies. Only the
+    first ``active`` slots are started; ``resize`` starts more up to
+    ``size``, and slots at or above ``active`` close their browser and park.
+    Before reuse a context loses its cookies, permissions and the storage
+    of the origin it visited (local/session storage, IndexedDB, service
+    workers, caches); one whose page visited several origins is closed.
+    """
+
+    def __init__(self, size=None, prewarm=None, max_uses=None, active=None):
+        super().__init__(max_uses, dead_slots=0)
+        self.size = size or config.THREADS
+        self.prewarm = config.POOL_PREWARM_CONTEXTS if prewarm is None else prewarm
+        self.active = min(active or self.size, self.size)
+        self._tasks = queue.Queue()
+        self._threads = []
+        self._resized = threading.Condition()
+        self._closing = False
+        self._dead = set()
+        self._last_error = None
+
+    def start(self):
+        with self._lock:
+            if self._closing:
+                return
+            first = len(self._threads)
+            for slot_id in range(first, self.active):
+                t = threading.Thread(target=self._slot_loop, args=(slot_id,), name=f"browser-slot-{slot_id}", daemon=True)
+                t.start()
+                self._threads.append(t)
+            started = len(self._threads) - first
+        if started:
+            logger.info(f"[Browser Pool] Started {started} slots, {first + started}/{self.size} running (prewarm={self.prewarm}, max_uses={self.max_uses})")
+
+    def submit(self, fn, *args, **kwargs):
+        self.start()
+        future = Future()
+        self._tasks.put((fn, args, kwargs, future))
+        if self._dead and not self._live_slots():
+            self._fail_pending(self._last_error)
+        return future
+
+    def stats(self):
+        stats = super().stats()
+        stats["engine"] = "sync"
+        stats["size"] = self.size
+        stats["active"] = self.active
+        return stats
+
+    def resize(self, n):
+        """Runs ``n`` slots (browsers), up to ``size``."""
+        with self._resized:
+            self.active = max(1, min(n, self.size))
+            self._resized.notify_all()
+        if self._threads:
+            self.start()
+
+    def close(self, timeout=10):
+        with self._lock:
+            threads, self._threads = self._threads, []
+        with self._resized:
+            self._closing = True
+            self._resized.notify_all()
+        for _ in threads:
+            self._tasks.put(None)
+        for t in threads:
+            t.join(timeout)
+
+    def _new_lease(self, browser):
+        context = browser.new_context(**self._context_options())
+        if config.RESOURCE_ROUTING:
+            router.install(context)
+        page = context.new_page()
+        page.set_default_timeout(30000)
+        return _Lease(context, page)
+
+    def _discard(self, lease):
+        try:
+            lease.context.close()
+        except Exception:
+            pass
+
+    def _release(self, lease, browser, idle):
+        if self._reusable(lease, browser.is_connected() and not lease.page.is_closed()):
+            try:
+                if lease.origins:
+                    lease.page.evaluate(WIPE_STORAGE_JS)
+                lease.context.clear_cookies()
+                lease.context.clear_permissions()
+                lease.page.goto("about:blank")
+                lease.origins.clear()
+                idle.append(lease)
+                return
+            except Exception:
+                pass
+        self._discard(lease)
+        self._count("recycled")
+
+    def _fill(self, browser, idle):
+        while len(idle) < self.prewarm:
+            idle.append(self._new_lease(browser))
+
+    def _launch(self, p, slot_id, idle):
+        for lease in idle:
+            self._discard(lease)
+        idle.clear()
+        logger.info(f"[Browser Pool] Slot {slot_id} launching browser (Headless={config.HEADLESS})...")
+        browser = p.chromium.launch(**self._launch_options())
+        self._count("browser_launches")
+        try:
+            self._fill(browser, idle)
+        except Exception as e:
+            logger.warning(f"[Browser Pool] Slot {slot_id} prewarm failed: {e}")
+        return browser
+
+    def _live_slots(self):
+        with self._lock:
+            return [i for i in range(min(self.active, len(self._threads))) if i not in self._dead]
+
+    def _fail_pending(self, error):
+        while True:
+            try:
+                task = self._tasks.get_nowait()
+            except queue.Empty:
+                return
+            if task is None:
+                continue
+            future = task[3]
+            if future.set_running_or_notify_cancel():
+                future.set_exception(error)
+
+    def _slot_failed(self, slot_id, error):
+        logger.error(f"[Browser Pool] Slot {slot_id} cannot start a browser, slot is dead: {error}")
+        metrics.error("browser_pool", error)
+        with self._lock:
+            self._dead.add(slot_id)
+            self._last_error = error
+        self._count("dead_slots")
+        if not self._live_slots():
+            self._fail_pending(error)
+
+    def _slot_loop(self, slot_id):
+        try:
+            from playwright.sync_api import sync_playwright
+            p = sync_playwright().start()
+        except Exception as e:
+            self._slot_failed(slot_id, e)
+            return
+        browser = None
+        idle = deque()
+        try:
+            while True:
+                if slot_id >= self.active:
+                    if browser is not None:
+                        for lease in idle:
+                            self._discard(lease)
+                        idle.clear()
+                        try:
+                            browser.close()
+                        except Exception:
+                            pass
+                        browser = None
+                        logger.info(f"[Browser Pool] Slot {slot_id} parked, browser closed")
+                    with self._resized:
+                        if self._closing:
+                            break
+                        self._resized.wait(1.0)
+                    continue
+                if browser is None or not browser.is_connected():
+                    try:
+                        browser = self._launch(p, slot_id, idle)
+                    except Exception as e:
+                        self._slot_failed(slot_id, e)
+                        return
+                task = self._tasks.get()
+                if task is None:
+                    break
+                fn, args, kwargs, future = task
+                if not future.set_running_or_notify_cancel():
+                    continue
+                if not browser.is_connected():
+                    try:
+                        browser = self._launch(p, slot_id, idle)
+                    except Exception as e:
+                        future.set_exception(e)
+                        self._slot_failed(slot_id, e)
+                        return
+                try:
+                    if idle:
+                        lease = idle.popleft()
+                        self._count("hits")
+                    else:
+                        lease = self._new_lease(browser)
+                        self._count("misses")
+                except Exception as e:
+                    logger.error(f"[Browser Pool] Slot {slot_id} cannot provide a context: {e}")
+                    metrics.error("browser_pool", e)
+                    future.set_exception(e)
+                    continue
+                self._count("tasks")
+                try:
+                    future.set_result(fn(lease.page, lease.context, *args, **kwargs))
+                except BaseException as e:
+                    future.set_exception(e)
+                lease.uses += 1
+                try:
+                    self._release(lease, browser, idle)
+                    if browser.is_connected():
+                        self._fill(browser, idle)
+                except Exception as e:
+                    logger.warning(f"[Browser Pool] Slot {slot_id} prewarm failed: {e}")
+        finally:
+            for lease in idle:
+                self._discard(lease)
+            if browser is not None:
+                try:
+                    browser.close()
+                except Exception:
+                    pass
+            try:
+                p.stop()
+            except Exception:
+                pass
+            logger.info(f"[Browser Pool] Slot {slot_id} closed")
+
+class _BrowserSlot:
+    __slots__ = ("browser", "idle", "pages", "launch_lock")
+
+    def __init__(self):
+        self.browser = None
+        self.idle = deque()
+        self.pages = 0
+        self.launch_lock = asyncio.Lock()
+
+class AsyncBrowserPool(_PoolBase):
+    """Event-loop counterpart of BrowserPool for playwright.async_api.
+
+    A single loop thread drives ``browsers`` Chromium processes, each
+    hosting many contexts at once. ``page_limit`` caps the attempts in
+    flight across all of them; new work goes to the browser with the fewest
+    active pages, and ``resize`` lowers or raises that cap up to
+    ``max_pages``. There are no slot threads to start or park.
+    Work is submitted as ``async fn(page, context, *args)`` and the
+    returned concurrent Future can be waited on from any thread. Contexts
+    are wiped before reuse the same way as in BrowserPool.
+    """
+
+    def __init__(self, browsers=None, max_pages=None, max_uses=None):
+        super().__init__(max_uses, in_flight=0, peak_in_flight=0)
+        self.browsers = browsers or config.ASYNC_BROWSERS
+        self.max_pages = max_pages or config.ASYNC_MAX_PAGES
+        self.page_limit = self.max_pages
+        self._loop = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._error = None
+        self._playwright = None
+        self._slots = []
+        self._gate = None
+        self._running = 0
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run_loop, name="async-browser-loop", daemon=True)
+                self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            raise self._error
+
+    def submit(self, fn, *args, **kwargs):
+        self.start()
+        return asyncio.run_coroutine_threadsafe(self._run(fn, args, kwargs, threading.current_thread().name), self._loop)
+
+    def resize(self, n):
+        """Allows ``n`` pages in flight, up to ``max_pages``."""
+        self.page_limit = max(1, min(n, self.max_pages))
+        if self._loop is not None and self._gate is not None:
+            asyncio.run_coroutine_threadsafe(self._wake(), self._loop)
+
+    async def _wake(self):
+        async with self._gate:
+            self._gate.notify_all()
+
+    def stats(self):
+        stats = super().stats()
+        stats["engine"] = "async"
+        stats["browsers"] = self.browsers
+        stats["page_limit"] = self.page_limit
+        stats["max_pages"] = self.max_pages
+        return stats
+
+    def close(self, timeout=10):
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None or self._loop is None:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        thread.join(timeout)
+
+    def _run_loop(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._loop = loop
+        try:
+            loop.run_until_complete(self._startup())
+        except Exception as e:
+            logger.error(f"[Browser Pool] Cannot start async engine: {e}")
+            self._error = e
+            self._ready.set()
+            loop.close()
+            return
+        self._ready.set()
+        logger.info(f"[Browser Pool] Async engine started ({self.browsers} browsers, max_pages={self.max_pages}, max_uses={self.max_uses})")
+        try:
+            loop.run_forever()
+            loop.run_until_complete(self._shutdown())
+        finally:
+            loop.close()
+            logger.info("[Browser Pool] Async engine closed")
+
+    async def _startup(self):
+        from playwright.async_api import async_playwright
+        self._playwright = await async_playwright().start()
+        self._gate = asyncio.Condition()
+        self._slots = [_BrowserSlot() for _ in range(self.browsers)]
+
+    async def _shutdown(self):
+        for slot in self._slots:
+            for lease in slot.idle:
+                await self._discard(lease)
+            slot.idle.clear()
+            if slot.browser is not None:
+                try:
+                    await slot.browser.close()
+                except Exception:
+                    pass
+        await self._playwright.stop()
+
+    def _track(self, delta):
+        with self._lock:
+            self._stats["in_flight"] += delta
+            self._stats["peak_in_flight"] = max(self._stats["peak_in_flight"], self._stats["in_flight"])
+
+    async def _run(self, fn, args, kwargs, lane=None):
+        set_lane(lane)
+        async with self._gate:
+            await self._gate.wait_for(lambda: self._running < self.page_limit)
+            self._running += 1
+        try:
+            slot = min(self._slots, key=lambda s: s.pages)
+            slot.pages += 1
+            self._track(1)
+            try:
+                try:
+                    lease = await self._acquire(slot)
+                except Exception as e:
+                    logger.error(f"[Browser Pool] Async engine cannot provide a context: {e}")
+                    metrics.error("browser_pool", e)
+                    raise
+                self._count("tasks")
+                try:
+                    return await fn(lease.page, lease.context, *args, **kwargs)
+                finally:
+                    lease.uses += 1
+                    await self._release(slot, lease)
+            finally:
+                slot.pages -= 1
+                self._track(-1)
+        finally:
+            async with self._gate:
+                self._running -= 1
+                self._gate.notify_all()
+
+    async def _browser(self, slot):
+        async with slot.launch_lock:
+            if slot.browser is None or not slot.browser.is_connected():
+                slot.idle.clear()
+                logger.info(f"[Browser Pool] Async engine launching browser (Headless={config.HEADLESS})...")
+                slot.browser = await self._playwright.chromium.launch(**self._launch_options())
+                self._count("browser_launches")
+        return slot.browser
+
+    async def _acquire(self, slot):
+        browser = await self._browser(slot)
+        if slot.idle:
+            self._count("hits")
+            return slot.idle.popleft()
+        self._count("misses")
+        context = await browser.new_context(**self._context_options())
+        if config.RESOURCE_ROUTING:
+            await router.install_async(context)
+        page = await context.new_page()
+        page.set_default_timeout(30000)
+        return _Lease(context, page)
+
+    async def _discard(self, lease):
+        try:
+            await lease.context.close()
+        except Exception:
+            pass
+
+    async def _release(self, slot, lease):
+        browser = slot.browser
+        healthy = browser is not None and browser.is_connected() and not lease.page.is_closed()
+        if self._reusable(lease, healthy) and len(slot.idle) < -(-self.page_limit // self.browsers):
+            try:
+                if lease.origins:
+                    await lease.page.evaluate(WIPE_STORAGE_JS)
+                await lease.context.clear_cookies()
+                await lease.context.clear_permissions()
+                await lease.page.goto("about:blank")
+                lease.origins.clear()
+                slot.idle.append(lease)
+                return
+            except Exception:
+                pass
+        await self._discard(lease)
+        self._count("recycled")
+
+_pool = None
+_async_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                if config.AUTOSCALE:
+                    _pool = BrowserPool(max(config.THREADS, config.AUTOSCALE_MAX_BROWSERS), active=config.THREADS)
+                else:
+                    _pool = BrowserPool(config.THREADS)
+                atexit.register(_pool.close)
+    return _pool
+
+def get_async_pool():
+    global _async_pool
+    if _async_pool is None:
+        with _pool_lock:
+            if _async_pool is None:
+                _async_pool = AsyncBrowserPool()
+                atexit.register(_async_pool.close)
+    return _async_pool
+
+def pool_stats():
+    pool = _async_pool if config.COMPLEX_ENGINE == 'async' else _pool
+    return pool.stats() if pool is not None else None
@@ -0,0 +1,206 @@
+import os
+import mmap
+import hashlib
+import threading
+from array import array
+import config
+from utils import logger
+
+_SCAN_BATCH = 4096
+
+class CompactHashSet:
+    """Open-addressing set of 64-bit hashes stored in a flat array."""
+
+    def __init__(self, capacity=1024):
+        self._slots = array('Q', bytes(8 * capacity))
+        self._mask = capacity - 1
+        self._count = 0
+
+    def add(self, h):
+        h = h or 1
+        slots = self._slots
+        mask = self._mask
+        i = h & mask
+        while slots[i]:
+            if slots[i] == h:
+                return False
+            i = (i + 1) & mask
+        slots[i] = h
+        self._count += 1
+        if self._count * 2 > mask:
+            self._grow()
+        return True
+
+    def _grow(self):
+        old = self._slots
+        self._slots = array('Q', bytes(16 * len(old)))
+        self._mask = len(self._slots) - 1
+        self._count = 0
+        for h in old:
+            if h:
+                self.add(h)
+
+    def __len__(self):
+        return self._count
+
+class Wordlist:
+    """Deduplicated, lazily indexed view over a newline-separated file.
+
+    The file is memory-mapped and only the (start, end) offsets of unique
+    stripped lines are kept, so memory stays at ~16 bytes per entry and
+    iteration can start before the whole file has been scanned. Indexing
+    is stable across processes, which keeps checkpoint indices
+    deterministic.
+    """
+
+    def __init__(self, path, dedupe=True):
+        self.path = os.path.abspath(path)
+        stat = os.stat(self.path)
+        self.fingerprint = f"{self.path}:{stat.st_size}:{stat.st_mtime_ns}"
+        self._dedupe = dedupe
+        self._size = stat.st_size
+        self._file = open(self.path, 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self._size else None
+        self._starts = array('Q')
+        self._ends = array('Q')
+        self._seen = CompactHashSet() if dedupe else None
+        self._pos = 3 if self._mm is not None and self._mm[:3] == b'\xef\xbb\xbf' else 0
+        self._lock = threading.Lock()
+
+    def __reduce__(self):
+        return (Wordlist, (self.path, self._dedupe))
+
+    @property
+    def complete(self):
+        return self._mm is None or self._pos >= self._size
+
+    def _scan(self, needed):
+        with self._lock:
+            mm = self._mm
+            size = self._size
+            pos = self._pos
+            target = max(needed, len(self._starts) + _SCAN_BATCH)
+            while pos < size and len(self._starts) < target:
+                nl = mm.find(b'\n', pos)
+                end = size if nl == -1 else nl
+                raw = mm[pos:end]
+                stripped = raw.strip()
+                if stripped:
+                    fresh = True
+                    if self._seen is not None:
+                        fresh = self._seen.add(int.from_bytes(hashlib.blake2b(stripped, digest_size=8).digest(), 'little'))
+                    if fresh:
+                        start = pos + len(raw) - len(raw.lstrip())
+                        self._starts.append(start)
+                        self._ends.append(start + len(stripped))
+                pos = end + 1
+            self._pos = pos
+            if pos >= size:
+                self._seen = None
+
+    def _ensure(self, count):
+        if len(self._starts) < count and not self.complete:
+            self._scan(count)
+        return len(self._starts) >= count
+
+    def __len__(self):
+        while not self.complete:
+            self._scan(len(self._starts) + _SCAN_BATCH * 16)
+        return len(self._starts)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if index < 0 or not self._ensure(index + 1):
+            raise IndexError(index)
+        return self._mm[self._starts[index]:self._ends[index]].decode('utf-8', errors='replace')
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+        self._file.close()
+
+def load_wordlist(filepath, default=None):
+    try:
+        words = Wordlist(filepath)
+    except FileNotFoundError:
+        logger.warning(f"File not found: {filepath}")
+        return list(default or [])
+    if not words._ensure(1):
+        words.close()
+        return list(default or [])
+    return words
+
+def close_wordlists(*lists):
+    for words in lists:
+        if isinstance(words, Wordlist):
+            words.close()
+
+def size_hint(words):
+    if isinstance(words, Wordlist) and not words.complete:
+        return '?'
+    return len(words)
+
+def wordlist_key(words):
+    fingerprint = getattr(words, 'fingerprint', None)
+    if fingerprint:
+        return fingerprint
+    return hashlib.sha1('\n'.join(words).encode('utf-8', 'surrogatepass')).hexdigest()
+
+def available(words, count):
+    if isinstance(words, Wordlist):
+        words._ensure(count)
+        return min(count, len(words._starts))
+    return min(count, len(words))
+
+def index_ranges(words, width):
+    lo = 0
+    while True:
+        hi = available(words, lo + width)
+        if hi <= lo:
+            return
+        yield lo, hi
+        lo = hi
+
+class CandidateSource:
+    """(username, password_index, password) chunks over two wordlists.
+
+    ``order="user"`` tries every password for one username before moving
+    on, so a chunk is one username index and a range of password indices.
+    ``order="password"`` sprays each password across all usernames, so a
+    chunk is a range of password indices with ``user`` set to None.
+    ``chunks`` only scans the password list as far as the chunks it has
+    handed out, so attempts start before a large wordlist is indexed.
+    """
+
+    def __init__(self, usernames, passwords, order=None):
+        self.usernames = usernames
+        self.passwords = passwords
+        self.order = order or config.CANDIDATE_ORDER
+
+    def chunks(self, size):
+        if self.order == "password":
+            width = max(1, size // max(1, len(self.usernames)))
+            for lo, hi in index_ranges(self.passwords, width):
+                yield None, lo, hi
+            return
+        user = 0
+        while available(self.usernames, user + 1) > user:
+            for lo, hi in index_ranges(self.passwords, size):
+                yield user, lo, hi
+            user += 1
+
+    def size(self, user, lo, hi):
+        return (hi - lo) * (1 if user is not None else len(self.usernames))
+
+    def slice(self, user, lo, hi):
+        if user is not None:
+            name = self.usernames[user]
+            for pi in range(lo, hi):
+                yield name, pi, self.passwords[pi]
+            return
+        users = len(self.usernames)
+        for pi in range(lo, hi):
+            pwd = self.passwords[pi]
+            for ui in range(users):
+                yield self.usernames[ui], pi, pwd
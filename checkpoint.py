@@ -0,0 +1,192 @@
+import os
+import time
+import atexit
+import bisect
+import sqlite3
+import hashlib
+import threading
+import config
+from utils import logger
+from candidates import wordlist_key
+
+class RangeSet:
+    """Sorted, merged set of half-open integer ranges [lo, hi)."""
+
+    __slots__ = ("ranges",)
+
+    def __init__(self, ranges=None):
+        self.ranges = []
+        for lo, hi in ranges or ():
+            self.add_range(lo, hi)
+
+    def add(self, index):
+        self.add_range(index, index + 1)
+
+    def add_range(self, lo, hi):
+        ranges = self.ranges
+        pos = bisect.bisect_left(ranges, [lo, lo])
+        if pos > 0 and ranges[pos - 1][1] >= lo:
+            pos -= 1
+        end = pos
+        while end < len(ranges) and ranges[end][0] <= hi:
+            lo = min(lo, ranges[end][0])
+            hi = max(hi, ranges[end][1])
+            end += 1
+        ranges[pos:end] = [[lo, hi]]
+
+    def update(self, other):
+        for lo, hi in other.ranges:
+            self.add_range(lo, hi)
+
+    def __contains__(self, index):
+        pos = bisect.bisect_right(self.ranges, [index, float('inf')]) - 1
+        return pos >= 0 and self.ranges[pos][1] > index
+
+    def __len__(self):
+        return sum(hi - lo for lo, hi in self.ranges)
+
+    def __bool__(self):
+        return bool(self.ranges)
+
+class CheckpointStore:
+    """Durable progress of credential runs in SQLite (WAL mode).
+
+    Progress is keyed by a run key derived from the wordlists so indices
+    stay meaningful, and recorded as done password-index ranges per
+    (url, username) plus a status row per finished target. ``mark`` only
+    touches an in-memory batch; a background thread merges and writes it
+    every CHECKPOINT_FLUSH_INTERVAL seconds. In worker processes the batch
+    is forwarded to the coordinator instead, which stays the only writer.
+    """
+
+    def __init__(self, path=None, flush_interval=None):
+        self.path = path or config.CHECKPOINT_FILE
+        self.flush_interval = config.CHECKPOINT_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        self._conn = None
+        self._db_lock = threading.Lock()
+        self._pending_lock = threading.Lock()
+        self._pending = {}
+        self._pending_targets = {}
+        self._flusher = None
+        self._wakeup = threading.Event()
+        self._forward = None
+
+    def _db(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS ranges (run_key TEXT, url TEXT, username TEXT, lo INTEGER, hi INTEGER)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_ranges ON ranges (run_key, url, username)")
+            conn.execute("CREATE TABLE IF NOT EXISTS targets (run_key TEXT, url TEXT, status TEXT, updated REAL, PRIMARY KEY (run_key, url))")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _ensure_flusher(self):
+        if self._flusher is None:
+            with self._pending_lock:
+                if self._flusher is None:
+                    self._flusher = threading.Thread(target=self._flush_loop, name="checkpoint-flusher", daemon=True)
+                    self._flusher.start()
+
+    def _flush_loop(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Checkpoint flush failed: {e}")
+
+    @staticmethod
+    def run_key(usernames, passwords):
+        return hashlib.sha1(f"{wordlist_key(usernames)}\0{wordlist_key(passwords)}".encode('utf-8', 'surrogatepass')).hexdigest()
+
+    def mark(self, run_key, url, username, index):
+        key = (run_key, url, username)
+        with self._pending_lock:
+            pending = self._pending.get(key)
+            if pending is None:
+                pending = self._pending[key] = RangeSet()
+            pending.add(index)
+        self._ensure_flusher()
+
+    def finish_target(self, run_key, url, status):
+        with self._pending_lock:
+            self._pending_targets[(run_key, url)] = status
+        self._ensure_flusher()
+
+    def is_target_done(self, run_key, url):
+        with self._pending_lock:
+            if (run_key, url) in self._pending_targets:
+                return True
+        with self._db_lock:
+            row = self._db().execute("SELECT status FROM targets WHERE run_key = ? AND url = ?", (run_key, url)).fetchone()
+        return row is not None
+
+    def load_target(self, run_key, url):
+        done = {}
+        with self._db_lock:
+            rows = self._db().execute("SELECT username, lo, hi FROM ranges WHERE run_key = ? AND url = ?", (run_key, url)).fetchall()
+        for username, lo, hi in rows:
+            done.setdefault(username, RangeSet()).add_range(lo, hi)
+        with self._pending_lock:
+            for (rk, u, username), pending in self._pending.items():
+                if rk == run_key and u == url:
+                    done.setdefault(username, RangeSet()).update(pending)
+        return done
+
+    def forward_to(self, callback):
+        self._forward = callback
+
+    def merge_remote(self, payload):
+        ranges, targets = payload
+        with self._pending_lock:
+            for key, values in ranges:
+                key = tuple(key)
+                pending = self._pending.get(key)
+                if pending is None:
+                    pending = self._pending[key] = RangeSet()
+                pending.update(RangeSet(values))
+            for key, status in targets:
+                self._pending_targets[tuple(key)] = status
+        self._ensure_flusher()
+
+    def flush(self):
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+            targets, self._pending_targets = self._pending_targets, {}
+        if not pending and not targets:
+            return
+        if self._forward is not None:
+            self._forward(([(key, r.ranges) for key, r in pending.items()], list(targets.items())))
+            return
+        with self._db_lock:
+            conn = self._db()
+            with conn:
+                for (run_key, url, username), ranges in pending.items():
+                    params = (run_key, url, username)
+                    existing = conn.execute("SELECT lo, hi FROM ranges WHERE run_key = ? AND url = ? AND username = ?", params).fetchall()
+                    ranges.update(RangeSet(existing))
+                    conn.execute("DELETE FROM ranges WHERE run_key = ? AND url = ? AND username = ?", params)
+                    conn.executemany("INSERT INTO ranges VALUES (?, ?, ?, ?, ?)", [params + (lo, hi) for lo, hi in ranges.ranges])
+                now = time.time()
+                conn.executemany(
+                    "INSERT OR REPLACE INTO targets VALUES (?, ?, ?, ?)",
+                    [(run_key, url, status, now) for (run_key, url), status in targets.items()]
+                )
+
+    def reset(self):
+        with self._pending_lock:
+            self._pending.clear()
+            self._pending_targets.clear()
+        with self._db_lock:
+            conn = self._db()
+            with conn:
+                conn.execute("DELETE FROM ranges")
+                conn.execute("DELETE FROM targets")
+
+checkpoints = CheckpointStore()
+atexit.register(checkpoints.flush)
@@ -1,81 +1,189 @@
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
 import config
-from utils import logger
+from utils import logger, host_of
+from page_analyzer import analyze_chunks, PageAnalyzer, charset_from_content_type
+from profile_cache import profiles
+from metrics import metrics
+from urllib.parse import urljoin
 import urllib3
 import concurrent.futures
+import threading
+import asyncio
 import os
 
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 STOP_FLAG = False
 
-def process_url(url, simple_list, complex_list, unknown_list):
-    global STOP_FLAG
-    if STOP_FLAG:
-        return
+_session = None
+_session_lock = threading.Lock()
+
+def get_session():
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=config.THREADS, pool_maxsize=config.THREADS)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                session.verify = False
+                _session = session
+    return _session
+
+def normalize_url(url):
     if not url.startswith('http'):
         url = 'http://' + url
+    return url
+
+def _store(buckets, kind, entry):
+    buckets[kind].append(entry)
+    metrics.inc("classified_total", kind=kind)
+    callback = buckets.get("on_result")
+    if callback is not None:
+        try:
+            callback(kind, entry)
+        except Exception as e:
+            logger.error(f"Classification callback failed for {entry}: {e}")
+
+def _cached_verdict(url, cached, reason):
+    logger.info(f"[Profile Cache] {reason}, reuse classification {cached['classification']}: {url}")
+    return cached["classification"], cached["entry"]
+
+def _fresh_verdict(url):
+    cached = profiles.get(url)
+    if profiles.is_fresh(cached) and cached.get("classification"):
+        return cached, _cached_verdict(url, cached, "Fresh profile")
+    return cached, None
+
+def _request_headers(cached):
+    if cached and cached.get("classification"):
+        return profiles.conditional_headers(cached)
+    return {}
+
+def _finish_analysis(url, cached, analyzer, headers):
+    if analyzer is None:
+        profiles.touch(url)
+        return _cached_verdict(url, cached, "Not modified")
+    if cached and cached.get("classification") and cached.get("content_hash") == analyzer.content_hash:
+        profiles.touch(url)
+        return _cached_verdict(url, cached, "Content unchanged")
+    kind, entry = analyzer.verdict(url)
+    form = analyzer.login_form
+    if form:
+        form = {
+            "post_url": urljoin(url, form["action"]) if form["action"] else url,
+            "user_field": form["user_field"],
+            "pass_field": form["pass_field"]
+        }
+    profiles.update(
+        url,
+        classification=kind,
+        entry=entry,
+        etag=headers.get('ETag'),
+        last_modified=headers.get('Last-Modified'),
+        content_hash=analyzer.content_hash,
+        form=form,
+        selectors=None
+    )
+    return kind, entry
+
+def _stopped(token):
+    return STOP_FLAG or (token is not None and token.is_set())
+
+def process_url(url, simple_list, complex_list, unknown_list, on_result=None, token=None):
+    if _stopped(token):
+        return
+    url = normalize_url(url)
+    buckets = {"simple": simple_list, "complex": complex_list, "unknown": unknown_list, "on_result": on_result}
     try:
         if config.FORCE_COMPLEX_MODE:
             logger.info(f"[Force Mode] Classify as complex: {url}")
-            complex_list.append(url)
+            _store(buckets, "complex", url)
+            return
+        cached, verdict = _fresh_verdict(url)
+        if verdict:
+            _store(buckets, *verdict)
             return
         logger.info(f"Analyzing: {url}")
-        resp = requests.get(url, timeout=config.TIMEOUT, verify=False)
-        soup = BeautifulSoup(resp.text, 'html.parser')
-        password_input = soup.find('input', {'type': 'password'})
-        if not password_input:
-            logger.info(f"Classify as unknown: {url} (no password field)")
-            unknown_list.append(f"{url} | No password field")
+        with metrics.timer("classifier", "fetch_analyze", url):
+            with get_session().get(url, timeout=config.TIMEOUT, stream=True, headers=_request_headers(cached)) as resp:
+                analyzer = None
+                if resp.status_code != 304:
+                    analyzer = analyze_chunks(resp.iter_content(config.ANALYZER_CHUNK_SIZE), resp.headers.get('Content-Type'))
+        _store(buckets, *_finish_analysis(url, cached, analyzer, resp.headers))
+    except Exception as e:
+        logger.error(f"Cannot access {url}: {e}")
+        metrics.error("classifier", e)
+        _store(buckets, "unknown", f"{url} | Access failed: {str(e)}")
+
+async def _process_url_async(session, url, buckets, slots):
+    if _stopped(buckets.get("token")):
+        return
+    url = normalize_url(url)
+    inflight, per_host = slots
+    host = per_host.setdefault(host_of(url), asyncio.Semaphore(config.ASYNC_PER_HOST))
+    try:
+        if config.FORCE_COMPLEX_MODE:
+            logger.info(f"[Force Mode] Classify as complex: {url}")
+            _store(buckets, "complex", url)
             return
-        html_content = resp.text.lower()
-        is_complex = False
-        for keyword in config.ENCRYPTION_KEYWORDS:
-            if keyword in html_content:
-                is_complex = True
-                logger.info(f"Found encryption feature [{keyword}]: {url}")
-                break
-        if not is_complex:
-            images = soup.find_all('img')
-            for img in images:
-                src = img.get('src', '').lower()
-                img_id = img.get('id', '').lower()
-                img_class = img.get('class', [])
-                if isinstance(img_class, list):
-                    img_class = ' '.join(img_class).lower()
-                img_alt = img.get('alt', '').lower()
-                captcha_keywords = ["captcha", "code", "verify", "check", "yzm", "random"]
-                if any(k in src for k in captcha_keywords) or \
-                   any(k in img_id for k in captcha_keywords) or \
-                   any(k in img_class for k in captcha_keywords) or \
-                   any(k in img_alt for k in captcha_keywords):
-                    is_complex = True
-                    logger.info(f"Found captcha feature (img): {url}")
-                    break
-            if not is_complex:
-                inputs = soup.find_all('input')
-                for i in inputs:
-                    name = i.get('name', '').lower()
-                    i_id = i.get('id', '').lower()
-                    placeholder = i.get('placeholder', '').lower()
-                    captcha_keywords = ["captcha", "code", "verify", "yzm", "验证码"]
-                    if any(k in name for k in captcha_keywords) or \
-                       any(k in i_id for k in captcha_keywords) or \
-                       any(k in placeholder for k in captcha_keywords):
-                        is_complex = True
-                        logger.info(f"Found captcha feature (input): {url}")
-                        break
-        if is_complex:
-            complex_list.append(url)
-        else:
-            simple_list.append(url)
+        cached, verdict = _fresh_verdict(url)
+        if verdict:
+            _store(buckets, *verdict)
+            return
+        async with inflight, host:
+            logger.info(f"Analyzing: {url}")
+            with metrics.timer("classifier", "fetch_analyze", url):
+                async with session.get(url, headers=_request_headers(cached)) as resp:
+                    analyzer = None
+                    if resp.status != 304:
+                        analyzer = PageAnalyzer(charset_from_content_type(resp.headers.get('Content-Type')))
+                        async for chunk in resp.content.iter_chunked(config.ANALYZER_CHUNK_SIZE):
+                            if analyzer.feed_bytes(chunk):
+                                break
+                        analyzer.finish()
+        _store(buckets, *_finish_analysis(url, cached, analyzer, resp.headers))
     except Exception as e:
         logger.error(f"Cannot access {url}: {e}")
-        unknown_list.append(f"{url} | Access failed: {str(e)}")
+        metrics.error("classifier", e)
+        _store(buckets, "unknown", f"{url} | Access failed: {str(e) or type(e).__name__}")
+
+async def _classify_async(urls, buckets):
+    connector = aiohttp.TCPConnector(
+        limit=config.ASYNC_MAX_INFLIGHT,
+        limit_per_host=config.ASYNC_PER_HOST,
+        ssl=False,
+        ttl_dns_cache=300
+    )
+    timeout = aiohttp.ClientTimeout(total=config.TIMEOUT)
+    slots = (asyncio.Semaphore(config.ASYNC_MAX_INFLIGHT), {})
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        pending = {asyncio.ensure_future(_process_url_async(session, url, buckets, slots)) for url in urls}
+        while pending:
+            _, pending = await asyncio.wait(pending, timeout=0.5)
+            if pending and _stopped(buckets.get("token")):
+                logger.info(f"Stop requested, cancelling {len(pending)} pending classifications")
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+                break
+
+def _run_coro(coro):
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
 
-def classify_targets(urls=None):
-    global STOP_FLAG
+def classify_targets(urls=None, use_async=None, on_result=None, persist=None, token=None):
     logger.info("Starting target classification...")
     if urls is None:
         try:
@@ -84,19 +192,32 @@ def classify_targets(urls=None):
         except FileNotFoundError:
             logger.error(f"URL list file not found: {config.URL_LIST_FILE}")
             return {"simple": [], "complex": [], "unknown": []}
+    if use_async is None:
+        use_async = config.ASYNC_CLASSIFY
+    if use_async and aiohttp is None:
+        logger.warning("aiohttp not installed, falling back to thread pool classification")
+        use_async = False
     simple_list = []
     complex_list = []
     unknown_list = []
-    with concurrent.futures.ThreadPoolExecutor(max_workers=config.THREADS) as executor:
-        futures = [executor.submit(process_url, url, simple_list, complex_list, unknown_list) for url in urls]
-        concurrent.futures.wait(futures)
-    os.makedirs(config.LISTDIR_PATH, exist_ok=True)
-    with open(config.SIMPLE_LIST_FILE, 'w', encoding='utf-8') as f:
-        f.write('\n'.join(simple_list))
-    with open(config.COMPLEX_LIST_FILE, 'w', encoding='utf-8') as f:
-        f.write('\n'.join(complex_list))
-    with open(config.UNKNOWN_LIST_FILE, 'w', encoding='utf-8') as f:
-        f.write('\n'.join(unknown_list))
+    if persist is None:
+        persist = config.PERSIST_LISTS
+    if use_async:
+        buckets = {"simple": simple_list, "complex": complex_list, "unknown": unknown_list, "on_result": on_result, "token": token}
+        _run_coro(_classify_async(urls, buckets))
+    else:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=config.THREADS) as executor:
+            futures = [executor.submit(process_url, url, simple_list, complex_list, unknown_list, on_result, token) for url in urls]
+            concurrent.futures.wait(futures)
+    profiles.flush()
+    if persist:
+        os.makedirs(config.LISTDIR_PATH, exist_ok=True)
+        with open(config.SIMPLE_LIST_FILE, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(simple_list))
+        with open(config.COMPLEX_LIST_FILE, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(complex_list))
+        with open(config.UNKNOWN_LIST_FILE, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(unknown_list))
     logger.info(f"Classification complete! Simple: {len(simple_list)}, Complex: {len(complex_list)}, Unknown: {len(unknown_list)}")
     return {
         "simple": simple_list,
@@ -9,7 +9,10 @@ COMPLEX_LIST_FILE = os.path.join(LISTDIR_PATH, 'complex_list.txt')
 UNKNOWN_LIST_FILE = os.path.join(LISTDIR_PATH, 'unknown_list.txt')
 USERNAME_FILE = os.path.join(LISTDIR_PATH, 'usernames.txt')
 PASSWORD_FILE = os.path.join(LISTDIR_PATH, 'passwords.txt')
+PROFILE_CACHE_FILE = os.path.join(LISTDIR_PATH, 'profiles.json')
+CHECKPOINT_FILE = os.path.join(LISTDIR_PATH, 'checkpoint.db')
 RESULTS_FILE = os.path.join(BASE_DIR, 'results.txt')
+RESULTS_DB = os.path.join(LISTDIR_PATH, 'results.db')
 
 DEFAULT_USERNAMES = ['admin', 'root', 'user', 'test']
 DEFAULT_PASSWORDS = ['123456', 'password', 'admin123', '12345678']
@@ -22,10 +25,119 @@ ENCRYPTION_KEYWORDS = [
 TIMEOUT = 10
 THREADS = 6
 
+ASYNC_CLASSIFY = True
+ASYNC_MAX_INFLIGHT = 300
+ASYNC_PER_HOST = 8
+
+USE_PROFILE_CACHE = True
+PROFILE_TTL = 24 * 3600
+
+RESUME = True
+CHECKPOINT_FLUSH_INTERVAL = 2.0
+
+SIMPLE_WORKERS = 4
+PER_HOST_LIMIT = 2
+SCHEDULER_CHUNK_SIZE = 50
+
+EXECUTION_MODE = 'thread'
+PROCESSES = os.cpu_count()
+PROCESS_SIMPLE_THREADS = 8
+PROCESS_COMPLEX_THREADS = 2
+
+ANALYZER_MAX_BYTES = 2 * 1024 * 1024
+ANALYZER_CHUNK_SIZE = 64 * 1024
+
 HEADLESS = True
+POOL_PREWARM_CONTEXTS = 1
+POOL_CONTEXT_MAX_USES = 20
+
+RESOURCE_ROUTING = True
+RESOURCE_RULES = {
+    "font": "block",
+    "media": "block",
+    "texttrack": "block",
+    "manifest": "block",
+    "image": "cache",
+    "stylesheet": "cache",
+    "script": "allow"
+}
+BLOCK_URL_PATTERNS = [
+    'google-analytics.com', 'googletagmanager.com', 'doubleclick.net',
+    'hm.baidu.com', 'cnzz.com', 'umeng.com', 'hotjar.com', 'sentry.io'
+]
+STATIC_CACHE_MAX_BYTES = 64 * 1024 * 1024
 FORCE_COMPLEX_MODE = False
+PERSIST_LISTS = True
 
 STOP_ON_SUCCESS = True
+CANDIDATE_ORDER = 'user'
+
+OUTCOME_TIMEOUT_MS = 3000
+OUTCOME_POLL_MS = 50
+OUTCOME_SETTLE_MS = 150
+ERROR_ELEMENT_SELECTORS = [
+    ".error", ".alert-danger", ".el-message--error", ".ant-message-error",
+    ".layui-layer-msg", ".layui-layer-content", "[role='alert']", ".toast"
+]
 
 ERROR_KEYWORDS = ['error', 'fail', 'incorrect', 'invalid', '重试', '错误', '失败', '账号', '密码', '密码错误', '登录失败']
 SUCCESS_KEYWORDS = ['success', 'welcome', 'admin', 'dashboard', '成功', '欢迎', '退出', 'logout']
+
+METRICS_ENABLED = True
+METRICS_FILE = os.path.join(LISTDIR_PATH, 'metrics.prom')
+METRICS_PORT = None
+METRICS_BUCKETS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60]
+
+TRACE_ENABLED = False
+TRACE_FILE = os.path.join(LISTDIR_PATH, 'trace.json')
+TRACE_MAX_EVENTS = 500000
+TRACE_PLAYWRIGHT_SLOWEST = 0
+TRACE_PLAYWRIGHT_DIR = os.path.join(LISTDIR_PATH, 'traces')
+
+LOG_RING_SIZE = 1000
+LOG_SAMPLE_FIRST = 20
+LOG_SAMPLE_EVERY = 100
+LOG_SAMPLE_MAX_TARGETS = 1024
+LOG_JSONL_FILE = None
+
+BASELINE_DETECTION = True
+BASELINE_SAMPLES = 2
+BASELINE_LENGTH_TOLERANCE = 64
+
+DISCOVERY_TIMEOUT_MS = 3000
+DISCOVERY_POLL_MS = 100
+
+COMPLEX_ENGINE = 'sync'
+ASYNC_BROWSERS = 2
+ASYNC_MAX_PAGES = 50
+
+AUTOSCALE = True
+AUTOSCALE_INTERVAL = 5.0
+AUTOSCALE_MIN_WORKERS = 1
+AUTOSCALE_MAX_BROWSERS = 16
+AUTOSCALE_MAX_SIMPLE_WORKERS = 32
+AUTOSCALE_MEMORY_MB = None
+AUTOSCALE_MEMORY_FRACTION = 0.7
+AUTOSCALE_MAX_LOAD = 0.9
+AUTOSCALE_MAX_TIMEOUT_RATE = 0.1
+AUTOSCALE_LATENCY_FACTOR = 2.0
+
+ATTEMPT_TIMEOUT = 5
+AIMD_ENABLED = True
+AIMD_INITIAL_LIMIT = 1
+AIMD_BACKOFF = 0.5
+AIMD_LATENCY_FACTOR = 3.0
+AIMD_INTERVAL_DECAY = 0.8
+AIMD_MIN_INTERVAL = 0.1
+AIMD_MAX_INTERVAL = 5.0
+AIMD_MAX_RETRY_AFTER = 60
+AIMD_RETRIES = 2
+
+MCP_PREWARM = True
+MCP_PREWARM_BROWSERS = False
+
+JOB_MAX_CONCURRENT = 2
+JOB_HISTORY = 50
+
+FORM_RESET_LEARNING = True
+FORM_RESET_READY_TIMEOUT_MS = 2000
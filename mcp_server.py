@@ -1,25 +1,174 @@
+import time
+_STARTED = time.perf_counter()
+
 import sys
 import os
+import atexit
+import threading
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from mcp.server.fastmcp import FastMCP
-from lichauto import LichAuto
+import config
+from utils import logger
+
+class Engine:
+    """Shared LichAuto instance kept warm across tool calls.
+
+    Heavy modules (playwright, requests, bs4 and the crack pipelines) are
+    only imported on first use, or in the background right after startup
+    when MCP_PREWARM is set, so the MCP handshake does not wait for them.
+    The browser pool, HTTP sessions and loaded wordlists are process-wide
+    and survive between calls. Every run goes through a JobManager, so
+    blocking and background calls share the same run slots.
+    """
+
+    def __init__(self):
+        self._lich = None
+        self._init_lock = threading.Lock()
+        self.jobs = None
+        self.timings = {"import_ms": None, "engine_init_ms": None, "browser_warmup_ms": None}
+        self.calls = 0
+        self.last_call = None
+
+    @property
+    def ready(self):
+        return self._lich is not None
+
+    def get(self):
+        if self._lich is None:
+            with self._init_lock:
+                if self._lich is None:
+                    start = time.perf_counter()
+                    from lichauto import LichAuto
+                    from jobs import JobManager
+                    lich = LichAuto()
+                    lich.load_wordlists()
+                    atexit.register(lich.close)
+                    self.jobs = JobManager(lich)
+                    self.timings["engine_init_ms"] = round((time.perf_counter() - start) * 1000, 1)
+                    self._lich = lich
+                    logger.info(f"[MCP] Engine ready in {self.timings['engine_init_ms']}ms")
+        return self._lich
+
+    def warm(self, browsers=False):
+        try:
+            self.get()
+            if browsers:
+                start = time.perf_counter()
+                from browser_pool import get_pool, get_async_pool
+                (get_async_pool() if config.COMPLEX_ENGINE == 'async' else get_pool()).start()
+                self.timings["browser_warmup_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        except Exception as e:
+            logger.warning(f"[MCP] Prewarm failed: {e}")
+
+    def submit(self, urls):
+        self.get()
+        return self.jobs.submit(urls)
+
+    def run(self, urls):
+        start = time.perf_counter()
+        job = self.submit(urls)
+        job.done.wait()
+        total = time.perf_counter() - start
+        run_s = (job.finished - job.started) if job.started else 0.0
+        self.calls += 1
+        self.last_call = {
+            "overhead_ms": round((total - run_s) * 1000, 1),
+            "run_ms": round(run_s * 1000, 1),
+            "total_ms": round(total * 1000, 1)
+        }
+        return job
 
+    def status(self):
+        status = {
+            "ready": self.ready,
+            "calls": self.calls,
+            "startup": dict(self.timings),
+            "last_call": self.last_call
+        }
+        if self.ready:
+            status.update(self._lich.process_stats())
+            status["jobs"] = self.jobs.list()
+        return status
+
+engine = Engine()
 mcp = FastMCP("lichauto")
 
 @mcp.tool()
 def auto_crack(urls: list[str]) -> dict:
     """
     对目标登录页面执行自动爆破，自动完成：目标分类→简单爆破→复杂爆破→返回凭证
-    
+
     Args:
         urls: 目标登录页面的 URL 列表，如 ["http://example.com/login"]
-    
+
     Returns:
         包含所有发现的账号密码的字典
     """
-    lich = LichAuto()
-    return lich.run(urls)
+    job = engine.run(urls)
+    result = job.result or {"success": False, "error": job.error, "results": job.results, "count": len(job.results)}
+    result["server"] = {"startup": dict(engine.timings), "call": engine.last_call}
+    return result
+
+@mcp.tool()
+def submit_crack(urls: list[str]) -> dict:
+    """
+    在后台提交爆破任务并立即返回任务 ID，之后用 job_status 轮询进度和已发现的凭证
+
+    Args:
+        urls: 目标登录页面的 URL 列表
+
+    Returns:
+        包含 job_id 的字典
+    """
+    job = engine.submit(urls)
+    return {"job_id": job.id, "state": job.state}
+
+@mcp.tool()
+def job_status(job_id: str, since: int = 0) -> dict:
+    """
+    查询后台任务的状态、分类和爆破进度，以及从第 since 条开始的已发现凭证
+
+    Args:
+        job_id: submit_crack 返回的任务 ID
+        since: 上次返回的 next 值，只返回之后新发现的凭证
+
+    Returns:
+        任务状态字典，任务结束后包含完整结果 result
+    """
+    engine.get()
+    job = engine.jobs.get(job_id)
+    if job is None:
+        return {"success": False, "error": f"Unknown job: {job_id}"}
+    status = job.status(since)
+    if job.done.is_set():
+        status["result"] = job.result
+    return status
+
+@mcp.tool()
+def cancel_job(job_id: str) -> dict:
+    """
+    取消后台任务，不影响其他正在运行的任务
+
+    Args:
+        job_id: submit_crack 返回的任务 ID
+    """
+    engine.get()
+    job = engine.jobs.cancel(job_id)
+    if job is None:
+        return {"success": False, "error": f"Unknown job: {job_id}"}
+    return {"success": True, "job_id": job.id, "state": job.state}
+
+@mcp.tool()
+def server_status() -> dict:
+    """
+    返回 MCP 服务状态：引擎是否已预热、启动耗时、上次调用的额外开销，以及整个进程（所有任务合计）的浏览器池、资源路由和指标统计
+    """
+    return engine.status()
+
+engine.timings["import_ms"] = round((time.perf_counter() - _STARTED) * 1000, 1)
 
 if __name__ == "__main__":
+    if config.MCP_PREWARM:
+        threading.Thread(target=engine.warm, args=(config.MCP_PREWARM_BROWSERS,), name="mcp-prewarm", daemon=True).start()
     mcp.run()
@@ -0,0 +1,242 @@
+import os
+import time
+import bisect
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import config
+from tracing import tracer
+
+PREFIX = "lichauto"
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(pairs):
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+def _fmt(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Timer:
+    __slots__ = ("metrics", "mode", "phase", "target", "start")
+
+    def __init__(self, metrics, mode, phase, target):
+        self.metrics = metrics
+        self.mode = mode
+        self.phase = phase
+        self.target = target
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.mode, self.phase, time.perf_counter() - self.start, self.target)
+        return False
+
+class Metrics:
+    """In-process counters and per-phase latency histograms.
+
+    Phase histograms are keyed by (mode, phase) with fixed buckets; per-target
+    timings keep only count and sum so label cardinality stays bounded.
+    Everything is exported as Prometheus text or as a JSON summary.
+    """
+
+    def __init__(self, buckets=None):
+        self.buckets = tuple(buckets or config.METRICS_BUCKETS)
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._targets = {}
+        self._server = None
+
+    def inc(self, name, amount=1, **labels):
+        if not config.METRICS_ENABLED:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, mode, phase, seconds, target=None):
+        tracer.complete(phase, mode, seconds, target)
+        if not config.METRICS_ENABLED:
+            return
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            hist = self._histograms.get((mode, phase))
+            if hist is None:
+                hist = self._histograms[(mode, phase)] = [0] * (len(self.buckets) + 1) + [0.0]
+            hist[index] += 1
+            hist[-1] += seconds
+            if target:
+                timing = self._targets.get((mode, phase, target))
+                if timing is None:
+                    timing = self._targets[(mode, phase, target)] = [0, 0.0]
+                timing[0] += 1
+                timing[1] += seconds
+
+    def timer(self, mode, phase, target=None):
+        return _Timer(self, mode, phase, target)
+
+    def attempt(self, mode, outcome):
+        self.inc("attempts_total", mode=mode, outcome=outcome)
+        self.inc("worker_attempts_total", mode=mode, worker=threading.current_thread().name)
+
+    def error(self, mode, exc):
+        self.inc("errors_total", mode=mode, type=type(exc).__name__)
+
+    def phase_totals(self, mode, phase):
+        with self._lock:
+            hist = self._histograms.get((mode, phase))
+            return (sum(hist[:-1]), hist[-1]) if hist else (0, 0.0)
+
+    def counter_total(self, name, match=None, **labels):
+        with self._lock:
+            total = 0
+            for (counter, pairs), value in self._counters.items():
+                if counter != name:
+                    continue
+                values = dict(pairs)
+                if all(values.get(k) == v for k, v in labels.items()) and (match is None or match(values)):
+                    total += value
+            return total
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "histograms": {k: list(v) for k, v in self._histograms.items()},
+                "targets": {k: list(v) for k, v in self._targets.items()}
+            }
+
+    def merge(self, snapshot):
+        with self._lock:
+            for key, value in snapshot["counters"].items():
+                self._counters[key] = self._counters.get(key, 0) + value
+            for key, values in snapshot["histograms"].items():
+                hist = self._histograms.setdefault(key, [0] * (len(self.buckets) + 1) + [0.0])
+                for i, value in enumerate(values):
+                    hist[i] += value
+            for key, (count, total) in snapshot["targets"].items():
+                timing = self._targets.setdefault(key, [0, 0.0])
+                timing[0] += count
+                timing[1] += total
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self._targets.clear()
+
+    def _quantile(self, hist, q):
+        count = sum(hist[:-1])
+        if not count:
+            return None
+        rank = q * count
+        seen = 0
+        for i, n in enumerate(hist[:-1]):
+            if seen + n >= rank and n:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - seen) / n
+            seen += n
+        return self.buckets[-1]
+
+    def summary(self):
+        snap = self.snapshot()
+        phases = {}
+        for (mode, phase), hist in sorted(snap["histograms"].items()):
+            count = sum(hist[:-1])
+            phases.setdefault(mode, {})[phase] = {
+                "count": count,
+                "total_s": round(hist[-1], 3),
+                "avg_ms": round(hist[-1] / count * 1000, 2) if count else None,
+                "p50_ms": round(self._quantile(hist, 0.50) * 1000, 2) if count else None,
+                "p95_ms": round(self._quantile(hist, 0.95) * 1000, 2) if count else None,
+                "p99_ms": round(self._quantile(hist, 0.99) * 1000, 2) if count else None
+            }
+        targets = {}
+        for (mode, phase, target), (count, total) in sorted(snap["targets"].items()):
+            targets.setdefault(target, {})[f"{mode}.{phase}"] = {
+                "count": count,
+                "avg_ms": round(total / count * 1000, 2) if count else None
+            }
+        counters = {}
+        for (name, labels), value in sorted(snap["counters"].items()):
+            counters.setdefault(name, {})[",".join(f"{k}={v}" for k, v in labels) or "total"] = value
+        return {"phases": phases, "targets": targets, "counters": counters}
+
+    def prometheus(self):
+        snap = self.snapshot()
+        lines = []
+        if snap["histograms"]:
+            name = f"{PREFIX}_phase_seconds"
+            lines.append(f"# HELP {name} Time spent per crawl/crack phase.")
+            lines.append(f"# TYPE {name} histogram")
+            for (mode, phase), hist in sorted(snap["histograms"].items()):
+                base = (("mode", mode), ("phase", phase))
+                cumulative = 0
+                for bound, n in zip(self.buckets + (None,), hist[:-1]):
+                    cumulative += n
+                    le = "+Inf" if bound is None else _fmt(float(bound))
+                    lines.append(f"{name}_bucket{_labels(base + (('le', le),))} {cumulative}")
+                lines.append(f"{name}_sum{_labels(base)} {_fmt(hist[-1])}")
+                lines.append(f"{name}_count{_labels(base)} {cumulative}")
+        if snap["targets"]:
+            name = f"{PREFIX}_target_phase_seconds"
+            lines.append(f"# HELP {name} Time spent per phase for each target.")
+            lines.append(f"# TYPE {name} summary")
+            for (mode, phase, target), (count, total) in sorted(snap["targets"].items()):
+                labels = _labels((("mode", mode), ("phase", phase), ("target", target)))
+                lines.append(f"{name}_sum{labels} {_fmt(total)}")
+                lines.append(f"{name}_count{labels} {count}")
+        typed = set()
+        for (counter, labels), value in sorted(snap["counters"].items()):
+            name = f"{PREFIX}_{counter}"
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{_labels(labels)} {_fmt(value)}")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path=None):
+        path = path or config.METRICS_FILE
+        if not path:
+            return None
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.prometheus())
+        os.replace(tmp, path)
+        return path
+
+    def serve(self, port=None, host="127.0.0.1"):
+        port = port or config.METRICS_PORT
+        if not port or self._server is not None:
+            return self._server
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = registry.prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+        return self._server
+
+metrics = Metrics()
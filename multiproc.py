@@ -0,0 +1,378 @@
+import os
+import queue
+import threading
+import multiprocessing
+from itertools import islice
+from collections import deque
+import config
+
+def config_snapshot():
+    return {k: getattr(config, k) for k in dir(config) if k.isupper()}
+
+class _ResultSink(list):
+    def __init__(self, events):
+        super().__init__()
+        self._events = events
+
+    def append(self, item):
+        super().append(item)
+        self._events.put(("result", item))
+
+def _child_main(child_id, mode, snapshot, usernames, passwords, run_key, threads, task_q, control_q, events):
+    for key, value in snapshot.items():
+        setattr(config, key, value)
+    config.AUTOSCALE = False
+    if mode == "complex":
+        config.THREADS = threads
+        config.ASYNC_MAX_PAGES = threads
+    from utils import logger
+    from scheduler import Target, Task
+    from checkpoint import checkpoints
+    from metrics import metrics
+    from tracing import tracer
+    import rate_control
+    import form_reset
+    if config.TRACE_ENABLED:
+        tracer.start()
+    if mode == "simple":
+        import cracker_simple as cracker
+    elif config.COMPLEX_ENGINE == 'async':
+        import cracker_complex as cracker
+        import cracker_complex_async
+        from browser_pool import get_async_pool
+    else:
+        import cracker_complex as cracker
+        from browser_pool import get_pool
+    from results_store import results_store
+    from candidates import close_wordlists
+    checkpoints.forward_to(lambda payload: events.put(("progress", payload)))
+    results_store.forward_to(lambda rows: events.put(("stored", rows)))
+    results = _ResultSink(events)
+    targets = {}
+    cancelled = set()
+    lock = threading.Lock()
+
+    def get_target(url):
+        with lock:
+            target = targets.get(url)
+            if target is None:
+                target = targets[url] = Target(url)
+                if url in cancelled:
+                    target.cancel()
+            return target
+
+    def control():
+        while True:
+            kind, url = control_q.get()
+            if kind == "exit":
+                break
+            if kind == "stop":
+                cracker.STOP_FLAG = True
+            elif kind == "cancel":
+                with lock:
+                    cancelled.add(url)
+                    target = targets.get(url)
+                if target is not None:
+                    target.cancel()
+            elif kind == "target_done":
+                with lock:
+                    target = targets.pop(url, None)
+                if target is None:
+                    continue
+                if target.data.get("session") is not None:
+                    target.data["session"].close()
+                if target.data.get("controller") is not None:
+                    events.put(("rate", (url, rate_control.record(target.data["controller"]))))
+                if target.data.get("reset_policy") is not None:
+                    events.put(("form_reset", (url, form_reset.record(target.data["reset_policy"]))))
+
+    def execute(task):
+        if mode == "simple":
+            cracker.crack_chunk(task, usernames, passwords, results, run_key)
+        elif config.COMPLEX_ENGINE == 'async':
+            get_async_pool().submit(cracker_complex_async.crack_chunk, task, usernames, passwords, results, run_key).result()
+        else:
+            get_pool().submit(cracker.crack_chunk, task, usernames, passwords, results, run_key).result()
+
+    def worker():
+        while True:
+            events.put(("ready", child_id))
+            msg = task_q.get()
+            if msg is None:
+                break
+            url, user, lo, hi = msg
+            target = get_target(url)
+            try:
+                if not target.cancelled.is_set() and not cracker.STOP_FLAG:
+                    execute(Task(target, lo, hi, user))
+            except Exception as e:
+                logger.error(f"[{url}] Task error in worker process {child_id}: {e}")
+                target.data["incomplete"] = True
+            events.put(("task_done", (child_id, url, user, lo, bool(target.data.get("incomplete")))))
+
+    controller = threading.Thread(target=control, daemon=True)
+    controller.start()
+    workers = [threading.Thread(target=worker, name=f"{mode}-{child_id}-{i}", daemon=True) for i in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    close_wordlists(usernames, passwords)
+    checkpoints.flush()
+    results_store.flush()
+    events.put(("metrics", metrics.snapshot()))
+    if tracer.enabled:
+        events.put(("trace", tracer.snapshot()))
+    events.put(("exit", child_id))
+
+class ProcessCrackRun:
+    """Process-pool counterpart of scheduler.CrackRun.
+
+    Worker processes run ``threads`` threads each and pull (target, chunk)
+    tasks from this coordinator one at a time, so the per-host limit holds
+    across all processes. Each target keeps one chunk queued per worker
+    thread and pulls the next from its feed as one is handed out. Results, checkpoint batches and task completions
+    come back on one event queue. Cancellations and stop signals go out on
+    per-process control queues.
+    """
+
+    def __init__(self, mode, usernames, passwords, run_key, should_stop, finish_target, processes=None, threads=None, token=None, results=None, finalize=None):
+        from utils import logger
+        from candidates import CandidateSource
+        from checkpoint import checkpoints
+        from scheduler import Target, target_progress
+        from metrics import metrics
+        from tracing import tracer
+        import rate_control
+        import form_reset
+        from results_store import results_store
+        self._tracer = tracer
+        self._logger = logger
+        self._results_store = results_store
+        self._rate_control = rate_control
+        self._form_reset = form_reset
+        self._checkpoints = checkpoints
+        self._metrics = metrics
+        self._Target = Target
+        self._target_progress = target_progress
+        self.token = token
+        self.mode = mode
+        self.run_key = run_key
+        self.source = CandidateSource(usernames, passwords)
+        self.should_stop = should_stop
+        self.finish_target = finish_target
+        self.finalize = finalize
+        self.processes = processes or config.PROCESSES or os.cpu_count() or 1
+        if mode == "simple":
+            self.threads = threads or config.PROCESS_SIMPLE_THREADS
+        elif config.COMPLEX_ENGINE == 'async':
+            self.threads = threads or config.ASYNC_MAX_PAGES
+        else:
+            self.threads = threads or config.PROCESS_COMPLEX_THREADS
+        self.results = results if results is not None else []
+        self.stats = {"tasks": 0, "processes": self.processes, "threads_per_process": self.threads}
+        self._lock = threading.Lock()
+        self._pending = deque()
+        self._targets = {}
+        self._host_active = {}
+        self._waiting = deque()
+        self._assigned = {}
+        self._done_targets = []
+        self._closed = False
+        self._stopped = False
+        ctx = multiprocessing.get_context("spawn")
+        self._events = ctx.Queue()
+        self._task_queues = [ctx.Queue() for _ in range(self.processes)]
+        self._control_queues = [ctx.Queue() for _ in range(self.processes)]
+        snapshot = config_snapshot()
+        self._procs = []
+        for child_id in range(self.processes):
+            proc = ctx.Process(
+                target=_child_main,
+                args=(child_id, mode, snapshot, usernames, passwords, run_key, self.threads,
+                      self._task_queues[child_id], self._control_queues[child_id], self._events),
+                name=f"lichauto-{mode}-{child_id}",
+                daemon=True
+            )
+            proc.start()
+            self._procs.append(proc)
+            self._assigned[child_id] = {}
+        self._alive = set(range(self.processes))
+        self._coordinator = threading.Thread(target=self._coordinate, name=f"{mode}-coordinator", daemon=True)
+        self._coordinator.start()
+        logger.info(f"[Process Pool] Started {self.processes} {mode} worker processes x {self.threads} threads")
+
+    def submit(self, url):
+        if self.run_key and self._checkpoints.is_target_done(self.run_key, url):
+            self._logger.info(f"[Checkpoint] Target already finished, skipping: {url}")
+            return None
+        target = self._Target(url, self.source.chunks(config.SCHEDULER_CHUNK_SIZE), self.token)
+        with self._lock:
+            self._targets[url] = target
+            self._fill(target, self.processes * self.threads)
+            self._serve()
+            done_targets = self._drain_done()
+        for done in done_targets:
+            self._complete(done)
+        return target
+
+    def progress(self):
+        with self._lock:
+            return self._target_progress(self._targets.values())
+
+    def finish(self):
+        with self._lock:
+            self._closed = True
+        self._coordinator.join()
+        return self.results
+
+    def _broadcast(self, kind, url=None):
+        for child_id in list(self._alive):
+            self._control_queues[child_id].put((kind, url))
+
+    def _fill(self, target, n):
+        if target.exhausted:
+            return
+        added = 0
+        try:
+            if not target.cancelled.is_set() and not self._stopped:
+                for user, lo, hi in islice(target.feed, n):
+                    self._pending.append((target.url, user, lo, hi))
+                    added += 1
+        except Exception as e:
+            self._logger.error(f"[{target.url}] Candidate feed error: {e}")
+            target.data["incomplete"] = True
+            added = -1
+        target.pending += max(added, 0)
+        target.chunks += max(added, 0)
+        if added < n:
+            target.exhausted = True
+            self._settle(target)
+
+    def _settle(self, target):
+        if target.exhausted and target.pending == 0 and not target.finalized:
+            target.finalized = True
+            self._done_targets.append(target)
+
+    def _serve(self):
+        while self._waiting and self._pending:
+            picked = None
+            for index, (url, user, lo, hi) in enumerate(self._pending):
+                target = self._targets[url]
+                if target.cancelled.is_set() or self._host_active.get(target.host, 0) < config.PER_HOST_LIMIT:
+                    picked = index
+                    break
+            if picked is None:
+                return
+            url, user, lo, hi = self._pending[picked]
+            del self._pending[picked]
+            target = self._targets[url]
+            self._fill(target, 1)
+            if target.cancelled.is_set():
+                self._task_finished(target, False)
+                continue
+            child_id = self._waiting.popleft()
+            self._host_active[target.host] = self._host_active.get(target.host, 0) + 1
+            self._assigned[child_id][(url, user, lo)] = target
+            self._task_queues[child_id].put((url, user, lo, hi))
+
+    def _task_finished(self, target, ran, incomplete=False):
+        if ran:
+            self._host_active[target.host] -= 1
+            self.stats["tasks"] += 1
+        if incomplete:
+            target.data["incomplete"] = True
+        target.pending -= 1
+        self._settle(target)
+
+    def _drain_done(self):
+        done_targets, self._done_targets = self._done_targets, []
+        return done_targets
+
+    def _complete(self, target):
+        self._broadcast("target_done", target.url)
+        try:
+            self.finish_target(target, self.run_key)
+        except Exception as e:
+            self._logger.error(f"[{target.url}] Target finalize error: {e}")
+
+    def _handle(self, kind, payload):
+        if kind == "ready":
+            if payload in self._alive:
+                self._waiting.append(payload)
+        elif kind == "task_done":
+            child_id, url, user, lo, incomplete = payload
+            target = self._assigned[child_id].pop((url, user, lo), None)
+            if target is not None:
+                self._task_finished(target, True, incomplete)
+        elif kind == "result":
+            self.results.append(payload)
+            target = self._targets.get(payload["url"])
+            if target is not None:
+                target.found = True
+                if config.STOP_ON_SUCCESS and not target.cancelled.is_set():
+                    target.cancel()
+                    self._broadcast("cancel", target.url)
+        elif kind == "progress":
+            self._checkpoints.merge_remote(payload)
+        elif kind == "stored":
+            self._results_store.merge_remote(payload)
+        elif kind == "metrics":
+            self._metrics.merge(payload)
+        elif kind == "rate":
+            self._rate_control.remember(*payload)
+        elif kind == "form_reset":
+            self._form_reset.remember(*payload)
+        elif kind == "trace":
+            self._tracer.merge(payload)
+        elif kind == "exit":
+            self._alive.discard(payload)
+
+    def _reap_dead(self):
+        for child_id in list(self._alive):
+            if not self._procs[child_id].is_alive():
+                self._logger.error(f"[Process Pool] Worker process {child_id} died")
+                self._alive.discard(child_id)
+                self._waiting = deque(c for c in self._waiting if c != child_id)
+                for target in self._assigned[child_id].values():
+                    self._task_finished(target, True, True)
+                self._assigned[child_id].clear()
+
+    def _coordinate(self):
+        shutdown_sent = False
+        while True:
+            try:
+                kind, payload = self._events.get(timeout=0.2)
+            except queue.Empty:
+                kind = None
+            with self._lock:
+                if kind is not None:
+                    self._handle(kind, payload)
+                else:
+                    self._reap_dead()
+                if self.should_stop() and not self._stopped:
+                    self._stopped = True
+                    self._pending.clear()
+                    self._broadcast("stop")
+                self._serve()
+                idle = not self._pending and not any(self._assigned[c] for c in self._alive)
+                if self._closed and idle and not shutdown_sent:
+                    shutdown_sent = True
+                    for child_id in self._alive:
+                        for _ in range(self.threads):
+                            self._task_queues[child_id].put(None)
+                finished = shutdown_sent and not self._alive
+                done_targets = self._drain_done()
+            for target in done_targets:
+                self._complete(target)
+            if finished:
+                break
+        for child_id in range(self.processes):
+            self._control_queues[child_id].put(("exit", None))
+        for proc in self._procs:
+            proc.join(10)
+        self._checkpoints.flush()
+        self._results_store.flush()
+        self._logger.info(f"[Process Pool] {self.mode} stats: {self.stats}")
+        if self.finalize is not None:
+            self.finalize()
@@ -0,0 +1,160 @@
+import re
+import codecs
+import hashlib
+from html.parser import HTMLParser
+import config
+from utils import logger
+
+IMG_CAPTCHA_KEYWORDS = ["captcha", "code", "verify", "check", "yzm", "random"]
+INPUT_CAPTCHA_KEYWORDS = ["captcha", "code", "verify", "yzm", "验证码"]
+
+_CHARSET_RE = re.compile(rb'<meta[^>]+charset=["\']?([\w-]+)', re.I)
+
+def compile_keywords(keywords):
+    keywords = sorted({k.lower() for k in keywords}, key=len, reverse=True)
+    return re.compile('|'.join(re.escape(k) for k in keywords)), max(len(k) for k in keywords)
+
+_ENCRYPTION_RE, _ENCRYPTION_MAXLEN = compile_keywords(config.ENCRYPTION_KEYWORDS)
+_IMG_CAPTCHA_RE, _ = compile_keywords(IMG_CAPTCHA_KEYWORDS)
+_INPUT_CAPTCHA_RE, _ = compile_keywords(INPUT_CAPTCHA_KEYWORDS)
+
+def charset_from_content_type(content_type):
+    if not content_type:
+        return None
+    for part in content_type.split(';')[1:]:
+        key, _, value = part.strip().partition('=')
+        if key.lower() == 'charset' and value:
+            return value.strip('"\' ')
+    return None
+
+class PageAnalyzer(HTMLParser):
+    """Single-pass login page analyzer fed with raw response chunks.
+
+    Encryption keywords are matched on the lowercased stream with one
+    precompiled pattern while the tag callbacks pick up password fields and
+    captcha images/inputs, so the page is decoded and scanned exactly once.
+    """
+
+    def __init__(self, encoding=None, max_bytes=None):
+        super().__init__(convert_charrefs=True)
+        self.encoding = encoding
+        self.max_bytes = config.ANALYZER_MAX_BYTES if max_bytes is None else max_bytes
+        self.bytes_read = 0
+        self.has_password = False
+        self.encryption_keyword = None
+        self.captcha_source = None
+        self.login_form = None
+        self.truncated = False
+        self.done = False
+        self._form = None
+        self._hash = hashlib.sha1()
+        self._decoder = None
+        self._tail = ''
+
+    def _init_decoder(self, first_chunk):
+        encoding = self.encoding
+        if not encoding:
+            match = _CHARSET_RE.search(first_chunk[:4096])
+            encoding = match.group(1).decode('ascii') if match else 'utf-8'
+        try:
+            self._decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        except LookupError:
+            self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+    def feed_bytes(self, chunk):
+        if self.done or not chunk:
+            return self.done
+        if self._decoder is None:
+            self._init_decoder(chunk)
+        remaining = self.max_bytes - self.bytes_read
+        if len(chunk) > remaining:
+            chunk = chunk[:remaining]
+        self.bytes_read += len(chunk)
+        self._hash.update(chunk)
+        self._feed_text(self._decoder.decode(chunk))
+        if self.bytes_read >= self.max_bytes and not self.done:
+            self.truncated = True
+            self.done = True
+        return self.done
+
+    def _feed_text(self, text):
+        if self.encryption_keyword is None:
+            window = self._tail + text.lower()
+            match = _ENCRYPTION_RE.search(window)
+            if match:
+                self.encryption_keyword = match.group(0)
+            self._tail = window[-(_ENCRYPTION_MAXLEN - 1):] if _ENCRYPTION_MAXLEN > 1 else ''
+        self.feed(text)
+        if self.has_password and self.is_complex:
+            self.done = True
+
+    def finish(self):
+        if self._decoder is not None and not self.done:
+            self._feed_text(self._decoder.decode(b'', final=True))
+        self.close()
+        self._close_form()
+        self.done = True
+        return self
+
+    @property
+    def content_hash(self):
+        return self._hash.hexdigest()
+
+    @property
+    def is_complex(self):
+        return self.encryption_keyword is not None or self.captcha_source is not None
+
+    def _close_form(self):
+        form = self._form
+        self._form = None
+        if form and self.login_form is None and form["user_field"] and form["pass_field"]:
+            self.login_form = form
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'form':
+            self._close_form()
+            self._form = {"action": dict(attrs).get('action'), "user_field": None, "pass_field": None}
+        elif tag == 'input':
+            attrs = dict(attrs)
+            if (attrs.get('type') or '').lower() == 'password':
+                self.has_password = True
+            if self._form is not None and attrs.get('name'):
+                input_type = attrs.get('type', 'text')
+                if input_type == 'password':
+                    self._form["pass_field"] = attrs['name']
+                elif input_type in ('text', 'email') and not self._form["user_field"]:
+                    self._form["user_field"] = attrs['name']
+            if self.captcha_source is None:
+                text = ' '.join((attrs.get(k) or '') for k in ('name', 'id', 'placeholder')).lower()
+                if _INPUT_CAPTCHA_RE.search(text):
+                    self.captcha_source = 'input'
+        elif tag == 'img' and self.captcha_source is None:
+            attrs = dict(attrs)
+            text = ' '.join((attrs.get(k) or '') for k in ('src', 'id', 'class', 'alt')).lower()
+            if _IMG_CAPTCHA_RE.search(text):
+                self.captcha_source = 'img'
+
+    handle_startendtag = handle_starttag
+
+    def handle_endtag(self, tag):
+        if tag == 'form':
+            self._close_form()
+
+    def verdict(self, url):
+        if not self.has_password:
+            logger.info(f"Classify as unknown: {url} (no password field)")
+            return "unknown", f"{url} | No password field"
+        if self.encryption_keyword is not None:
+            logger.info(f"Found encryption feature [{self.encryption_keyword}]: {url}")
+            return "complex", url
+        if self.captcha_source is not None:
+            logger.info(f"Found captcha feature ({self.captcha_source}): {url}")
+            return "complex", url
+        return "simple", url
+
+def analyze_chunks(chunks, content_type=None, max_bytes=None):
+    analyzer = PageAnalyzer(charset_from_content_type(content_type), max_bytes)
+    for chunk in chunks:
+        if analyzer.feed_bytes(chunk):
+            break
+    return analyzer.finish()
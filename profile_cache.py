@@ -0,0 +1,118 @@
+import os
+import json
+import time
+import atexit
+import threading
+import config
+from utils import logger
+
+class ProfileCache:
+    """On-disk target profile index keyed by URL.
+
+    Holds what the pipeline learned about a login page (classification,
+    resolved form, working browser selectors) together with the validators
+    needed to revalidate it (ETag, Last-Modified, content hash). Entries
+    younger than the TTL are trusted as-is; older ones are revalidated
+    with a conditional request before being reused.
+    """
+
+    def __init__(self, path=None, ttl=None):
+        self.path = path or config.PROFILE_CACHE_FILE
+        self.ttl = config.PROFILE_TTL if ttl is None else ttl
+        self._lock = threading.Lock()
+        self._entries = None
+        self._dirty = False
+
+    def _ensure_loaded(self):
+        if self._entries is not None:
+            return
+        self._entries = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._entries = json.load(f)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Profile cache unreadable, starting empty: {e}")
+
+    def get(self, url):
+        if not config.USE_PROFILE_CACHE:
+            return None
+        with self._lock:
+            self._ensure_loaded()
+            entry = self._entries.get(url)
+            return dict(entry) if entry else None
+
+    def is_fresh(self, entry):
+        return bool(entry) and time.time() - entry.get("updated", 0) < self.ttl
+
+    def get_fresh(self, url):
+        entry = self.get(url)
+        return entry if self.is_fresh(entry) else None
+
+    def update(self, url, **fields):
+        if not config.USE_PROFILE_CACHE:
+            return
+        with self._lock:
+            self._ensure_loaded()
+            entry = self._entries.setdefault(url, {})
+            entry.update(fields)
+            entry["updated"] = time.time()
+            self._dirty = True
+
+    def merge(self, url, field, **values):
+        if not config.USE_PROFILE_CACHE:
+            return
+        with self._lock:
+            self._ensure_loaded()
+            entry = self._entries.setdefault(url, {"updated": time.time()})
+            current = entry.get(field) or {}
+            current.update(values)
+            entry[field] = current
+            self._dirty = True
+
+    def touch(self, url):
+        self.update(url)
+
+    def invalidate(self, url, *fields):
+        with self._lock:
+            self._ensure_loaded()
+            entry = self._entries.get(url)
+            if entry is None:
+                return
+            if fields:
+                for field in fields:
+                    entry.pop(field, None)
+            else:
+                del self._entries[url]
+            self._dirty = True
+
+    def conditional_headers(self, entry):
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def flush(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+            self._dirty = False
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+profiles = ProfileCache()
+atexit.register(profiles.flush)
@@ -0,0 +1,187 @@
+import time
+import asyncio
+import threading
+import config
+from utils import logger
+
+THROTTLE_STATUSES = (429, 503)
+
+_settled = {}
+_settled_lock = threading.Lock()
+
+def classify_status(status):
+    if status in THROTTLE_STATUSES:
+        return "throttled"
+    if status >= 500:
+        return "error"
+    return "ok"
+
+def retry_after(headers):
+    value = (headers or {}).get("retry-after")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+class StatusWatch:
+    """Page ``response`` listener that keeps the last throttle or server
+    error status a document/XHR request got, for the attempt loop to hand to
+    the controller.
+    """
+
+    __slots__ = ("outcome", "retry_after", "status")
+
+    def __init__(self):
+        self.outcome = "ok"
+        self.retry_after = None
+        self.status = None
+
+    def __call__(self, response):
+        status = response.status
+        if status < 500 and status != 429:
+            return
+        if response.request.resource_type in ("document", "xhr", "fetch"):
+            self.outcome = classify_status(status)
+            self.retry_after = retry_after(response.headers)
+            self.status = status
+
+    def take(self):
+        outcome, wait = self.outcome, self.retry_after
+        self.outcome, self.retry_after, self.status = "ok", None, None
+        return outcome, wait
+
+class TargetController:
+    """AIMD window and pacing for the attempts against one target.
+
+    ``limit`` is the number of attempts allowed in flight. While the window
+    is full, each healthy response grows it by ``1/limit``, up to the
+    operator's per-host ceiling. A throttle status (429/503), another 5xx, a
+    connection error or a timeout halves it, at most once per smoothed round
+    trip. Once the window is down to one attempt, further congestion spaces
+    attempt starts ``interval`` apart instead, doubling each time, and
+    healthy responses shrink the spacing before the window grows again. A
+    Retry-After header holds new attempts back. Latency that climbs past
+    AIMD_LATENCY_FACTOR times the fastest round trip seen trims the window
+    gently. The request timeout never drops below ATTEMPT_TIMEOUT and only
+    grows past it, up to TIMEOUT, when the round trip estimate
+    (srtt + 4 * rttvar) does.
+    """
+
+    def __init__(self, url, ceiling=None):
+        self.url = url
+        self.ceiling = max(1, ceiling or config.PER_HOST_LIMIT)
+        self.limit = float(self.ceiling if not config.AIMD_ENABLED else min(config.AIMD_INITIAL_LIMIT, self.ceiling))
+        self.interval = 0.0
+        self.in_flight = 0
+        self.srtt = None
+        self.rttvar = None
+        self.min_rtt = None
+        self.counts = {"ok": 0, "throttled": 0, "error": 0, "timeout": 0}
+        self._next_start = 0.0
+        self._last_cut = 0.0
+        self._cond = threading.Condition()
+
+    def _try_acquire(self):
+        now = time.monotonic()
+        if self.in_flight >= max(1, int(self.limit)):
+            return None, None
+        wait = self._next_start - now
+        if wait > 0:
+            return None, wait
+        self.in_flight += 1
+        self._next_start = now + self.interval
+        return now, 0
+
+    def acquire(self):
+        with self._cond:
+            while True:
+                started, wait = self._try_acquire()
+                if started is not None:
+                    return started
+                self._cond.wait(1.0 if wait is None else min(wait, 1.0))
+
+    async def acquire_async(self):
+        while True:
+            with self._cond:
+                started, wait = self._try_acquire()
+            if started is not None:
+                return started
+            await asyncio.sleep(0.05 if wait is None else min(wait, 1.0))
+
+    def release(self, started, outcome, retry_after=None):
+        now = time.monotonic()
+        rtt = now - started
+        with self._cond:
+            saturated = self.in_flight >= int(self.limit)
+            self.in_flight -= 1
+            self.counts[outcome] += 1
+            if config.AIMD_ENABLED:
+                if outcome == "ok":
+                    self._on_success(rtt, now, saturated)
+                else:
+                    self._on_congestion(now, retry_after)
+            self._cond.notify_all()
+
+    def _on_success(self, rtt, now, saturated):
+        if self.srtt is None:
+            self.srtt, self.rttvar = rtt, rtt / 2
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - rtt)
+            self.srtt = 0.875 * self.srtt + 0.125 * rtt
+        self.min_rtt = rtt if self.min_rtt is None else min(self.min_rtt, rtt)
+        if self.srtt > self.min_rtt * config.AIMD_LATENCY_FACTOR and self.srtt > config.AIMD_MIN_INTERVAL:
+            if now - self._last_cut >= self.srtt:
+                self.limit = max(1.0, self.limit * 0.9)
+                self._last_cut = now
+            return
+        if self.interval:
+            self.interval *= config.AIMD_INTERVAL_DECAY
+            if self.interval < config.AIMD_MIN_INTERVAL / 4:
+                self.interval = 0.0
+        elif saturated:
+            self.limit = min(float(self.ceiling), self.limit + 1.0 / self.limit)
+
+    def _on_congestion(self, now, retry_after):
+        if now - self._last_cut >= (self.srtt or 0.0):
+            if self.limit > 1.0:
+                self.limit = max(1.0, self.limit * config.AIMD_BACKOFF)
+            else:
+                self.interval = min(config.AIMD_MAX_INTERVAL, max(self.interval * 2, config.AIMD_MIN_INTERVAL))
+            self._last_cut = now
+        hold = min(retry_after, config.AIMD_MAX_RETRY_AFTER) if retry_after else self.interval
+        self._next_start = max(self._next_start, now + hold)
+
+    def timeout(self):
+        if not config.AIMD_ENABLED or self.srtt is None:
+            return config.ATTEMPT_TIMEOUT
+        return min(max(self.srtt + 4 * self.rttvar, config.ATTEMPT_TIMEOUT), max(config.TIMEOUT, config.ATTEMPT_TIMEOUT))
+
+    def stats(self):
+        with self._cond:
+            return {
+                "limit": round(self.limit, 2),
+                "ceiling": self.ceiling,
+                "interval_ms": round(self.interval * 1000, 1),
+                "rate_per_sec": round(self.limit / self.srtt, 2) if self.srtt else None,
+                "srtt_ms": round(self.srtt * 1000, 1) if self.srtt is not None else None,
+                "timeout_s": round(self.timeout(), 2),
+                **self.counts
+            }
+
+def remember(url, stats):
+    with _settled_lock:
+        _settled[url] = stats
+
+def record(controller):
+    stats = controller.stats()
+    remember(controller.url, stats)
+    logger.info(f"[{controller.url}] Settled rate: limit={stats['limit']}/{stats['ceiling']} interval={stats['interval_ms']}ms srtt={stats['srtt_ms']}ms throttled={stats['throttled']} errors={stats['error']} timeouts={stats['timeout']}")
+    return stats
+
+def settled_rates():
+    with _settled_lock:
+        return dict(_settled)
+
+def reset():
+    with _settled_lock:
+        _settled.clear()
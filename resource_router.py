@@ -0,0 +1,191 @@
+import threading
+from collections import OrderedDict
+import config
+from utils import logger
+from page_analyzer import compile_keywords, IMG_CAPTCHA_KEYWORDS
+
+_CAPTCHA_URL_RE, _ = compile_keywords(IMG_CAPTCHA_KEYWORDS)
+_HOP_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "set-cookie"}
+_UNCACHEABLE_DIRECTIVES = {"no-store", "no-cache", "private", "max-age=0"}
+
+def cacheable(status, headers, explicit=False):
+    """Whether a response may be shared between contexts. With ``explicit``
+    the server must also mark it cacheable (max-age, immutable or an ETag)."""
+    if status != 200:
+        return False
+    headers = {k.lower(): v for k, v in headers.items()}
+    directives = {d.strip().lower().replace(" ", "") for d in headers.get("cache-control", "").split(",")}
+    if directives & _UNCACHEABLE_DIRECTIVES or "no-cache" in headers.get("pragma", "").lower():
+        return False
+    if explicit and "etag" not in headers and not any(d == "immutable" or d.startswith("max-age=") for d in directives):
+        return False
+    vary = {v.strip().lower() for v in headers.get("vary", "").split(",") if v.strip()}
+    return vary <= {"accept-encoding"}
+
+class StaticCache:
+    def __init__(self, max_bytes=None):
+        self.max_bytes = config.STATIC_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, url):
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None:
+                self._entries.move_to_end(url)
+            return entry
+
+    def put(self, url, status, headers, body):
+        if len(body) > self.max_bytes // 8:
+            return
+        with self._lock:
+            old = self._entries.pop(url, None)
+            if old is not None:
+                self.size -= len(old[2])
+            self._entries[url] = (status, headers, body)
+            self.size += len(body)
+            while self.size > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted[2])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+class ResourceRouter:
+    """Request routing for browser contexts in complex mode.
+
+    Each request is matched against RESOURCE_RULES by resource type
+    ("allow", "block" or "cache") and against BLOCK_URL_PATTERNS. Cached
+    GET responses live in one in-process StaticCache shared by every
+    context and worker, so only responses that are not marked no-store,
+    no-cache, private or max-age=0 and do not vary per request are kept,
+    and never with their Set-Cookie. Images are only kept when the server
+    marks them cacheable, since a captcha found by id or alt can sit behind
+    any URL; captcha-looking URLs are never blocked or cached.
+    """
+
+    def __init__(self):
+        self.cache = StaticCache()
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {
+                "requests": 0,
+                "blocked": 0,
+                "cache_hits": 0,
+                "cache_misses": 0,
+                "bytes_saved": 0,
+                "blocked_by_type": {}
+            }
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["blocked_by_type"] = dict(self._stats["blocked_by_type"])
+        stats["requests_saved"] = stats["blocked"] + stats["cache_hits"]
+        stats["cache_bytes"] = self.cache.size
+        return stats
+
+    def install(self, context):
+        context.route("**/*", self._handle)
+
+    async def install_async(self, context):
+        await context.route("**/*", self._handle_async)
+
+    def _action(self, request):
+        url = request.url
+        if _CAPTCHA_URL_RE.search(url.lower()):
+            return "allow"
+        if any(p in url for p in config.BLOCK_URL_PATTERNS):
+            return "block"
+        action = config.RESOURCE_RULES.get(request.resource_type, "allow")
+        if action == "cache" and request.method != "GET":
+            return "allow"
+        return action
+
+    def _count(self, request):
+        action = self._action(request)
+        with self._lock:
+            self._stats["requests"] += 1
+            if action == "block":
+                self._stats["blocked"] += 1
+                by_type = self._stats["blocked_by_type"]
+                by_type[request.resource_type] = by_type.get(request.resource_type, 0) + 1
+        return action
+
+    def _lookup(self, request):
+        cached = self.cache.get(request.url)
+        with self._lock:
+            if cached is not None:
+                self._stats["cache_hits"] += 1
+                self._stats["bytes_saved"] += len(cached[2])
+            else:
+                self._stats["cache_misses"] += 1
+        return cached
+
+    def _remember(self, request, response, body):
+        headers = response.headers
+        if cacheable(response.status, headers, request.resource_type == "image"):
+            kept = {k: v for k, v in headers.items() if k.lower() not in _HOP_HEADERS}
+            self.cache.put(request.url, response.status, kept, body)
+
+    def _handle(self, route, request):
+        try:
+            action = self._count(request)
+            if action == "block":
+                route.abort()
+            elif action == "cache":
+                self._serve_cached(route, request)
+            else:
+                route.continue_()
+        except Exception as e:
+            logger.debug(f"Route handling failed for {request.url}: {e}")
+            try:
+                route.continue_()
+            except Exception:
+                pass
+
+    def _serve_cached(self, route, request):
+        cached = self._lookup(request)
+        if cached is not None:
+            status, headers, body = cached
+            route.fulfill(status=status, headers=headers, body=body)
+            return
+        response = route.fetch()
+        body = response.body()
+        self._remember(request, response, body)
+        route.fulfill(response=response, body=body)
+
+    async def _handle_async(self, route, request):
+        try:
+            action = self._count(request)
+            if action == "block":
+                await route.abort()
+            elif action == "cache":
+                await self._serve_cached_async(route, request)
+            else:
+                await route.continue_()
+        except Exception as e:
+            logger.debug(f"Route handling failed for {request.url}: {e}")
+            try:
+                await route.continue_()
+            except Exception:
+                pass
+
+    async def _serve_cached_async(self, route, request):
+        cached = self._lookup(request)
+        if cached is not None:
+            status, headers, body = cached
+            await route.fulfill(status=status, headers=headers, body=body)
+            return
+        response = await route.fetch()
+        body = await response.body()
+        self._remember(request, response, body)
+        await route.fulfill(response=response, body=body)
+
+router = ResourceRouter()
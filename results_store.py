@@ -0,0 +1,207 @@
+import os
+import time
+import atexit
+import sqlite3
+import threading
+from datetime import datetime
+import config
+from utils import logger, host_of
+
+def _timestamp(value):
+    if value is None or isinstance(value, (int, float)):
+        return value
+    return datetime.fromisoformat(value).timestamp()
+
+def parse_results_line(line):
+    """``url | username:password`` as results.txt stored it. The file never
+    escaped ':', so like the old reader it splits on the first one and the
+    rest belongs to the password."""
+    url, sep, cred = line.strip().partition(" | ")
+    username, colon, password = cred.partition(":")
+    if not sep or not colon or not username:
+        return None
+    return url.strip(), username, password
+
+class ResultStore:
+    """Found credentials in SQLite (WAL mode), one row per (url, username).
+
+    ``add`` only queues the row; a single writer thread upserts queued rows
+    as soon as they arrive, so crack workers never touch the database and a
+    credential found again only bumps ``hits`` and ``last_seen``. Rows are
+    indexed by host and by time for filtered queries. results.txt is no
+    longer written; a legacy one is only imported, once, on first open. In worker processes rows are forwarded
+    to the coordinator instead, which stays the only writer.
+    """
+
+    def __init__(self, path=None, legacy_file=None):
+        self.path = path or config.RESULTS_DB
+        self.legacy_file = legacy_file or config.RESULTS_FILE
+        self._conn = None
+        self._db_lock = threading.Lock()
+        self._pending_lock = threading.Lock()
+        self._pending = {}
+        self._writer = None
+        self._wakeup = threading.Event()
+        self._forward = None
+
+    def _db(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "url TEXT, username TEXT, password TEXT, host TEXT, "
+                "found REAL, last_seen REAL, hits INTEGER, source TEXT, "
+                "PRIMARY KEY (url, username))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_results_host ON results (host, found)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_results_found ON results (found)")
+            conn.execute("CREATE TABLE IF NOT EXISTS imports (path TEXT PRIMARY KEY, size INTEGER, mtime REAL, rows INTEGER)")
+            conn.commit()
+            self._conn = conn
+            if self.legacy_file and os.path.exists(self.legacy_file):
+                self._import(conn, self.legacy_file)
+        return self._conn
+
+    def _ensure_writer(self):
+        if self._writer is None:
+            with self._pending_lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._write_loop, name="results-writer", daemon=True)
+                    self._writer.start()
+
+    def _write_loop(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Results flush failed: {e}")
+
+    def add(self, url, username, password, found=None, source="crack"):
+        found = found or time.time()
+        with self._pending_lock:
+            self._pending[(url, username)] = (password, found, source)
+        self._ensure_writer()
+        self._wakeup.set()
+
+    def forward_to(self, callback):
+        self._forward = callback
+
+    def merge_remote(self, rows):
+        with self._pending_lock:
+            for url, username, password, found, source in rows:
+                self._pending[(url, username)] = (password, found, source)
+        self._ensure_writer()
+        self._wakeup.set()
+
+    def flush(self):
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        rows = [(url, username) + values for (url, username), values in pending.items()]
+        if self._forward is not None:
+            self._forward(rows)
+            return
+        with self._db_lock:
+            conn = self._db()
+            with conn:
+                self._upsert(conn, rows)
+
+    def _upsert(self, conn, rows):
+        conn.executemany(
+            "INSERT INTO results VALUES (?, ?, ?, ?, ?, ?, 1, ?) "
+            "ON CONFLICT (url, username) DO UPDATE SET "
+            "password = excluded.password, last_seen = excluded.last_seen, hits = hits + 1",
+            [(url, username, password, host_of(url), found, found, source) for url, username, password, found, source in rows]
+        )
+
+    def _import(self, conn, path):
+        stat = os.stat(path)
+        row = conn.execute("SELECT size, mtime FROM imports WHERE path = ?", (os.path.abspath(path),)).fetchone()
+        if row is not None and row[0] == stat.st_size and row[1] == stat.st_mtime:
+            return 0
+        rows = []
+        skipped = []
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            for number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                parsed = parse_results_line(line)
+                if parsed:
+                    rows.append(parsed + (stat.st_mtime, "results.txt"))
+                else:
+                    skipped.append(number)
+        if skipped:
+            logger.warning(f"[Results] Skipped {len(skipped)} malformed lines in {path}: {skipped[:20]}")
+        with conn:
+            conn.executemany(
+                "INSERT INTO results VALUES (?, ?, ?, ?, ?, ?, 1, ?) "
+                "ON CONFLICT (url, username) DO UPDATE SET password = excluded.password",
+                [(url, username, password, host_of(url), found, found, source) for url, username, password, found, source in rows]
+            )
+            conn.execute("INSERT OR REPLACE INTO imports VALUES (?, ?, ?, ?)", (os.path.abspath(path), stat.st_size, stat.st_mtime, len(rows)))
+        logger.info(f"[Results] Imported {len(rows)} entries from {path}")
+        return len(rows)
+
+    def import_text(self, path):
+        self.flush()
+        with self._db_lock:
+            return self._import(self._db(), path)
+
+    def _where(self, url=None, host=None, username=None, since=None, until=None):
+        clauses, params = [], []
+        for column, value in (("url", url), ("host", host), ("username", username)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("found >= ?")
+            params.append(_timestamp(since))
+        if until is not None:
+            clauses.append("found < ?")
+            params.append(_timestamp(until))
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(self, url=None, host=None, username=None, since=None, until=None, limit=None, offset=0):
+        self.flush()
+        where, params = self._where(url, host, username, since, until)
+        sql = f"SELECT url, username, password, host, found, last_seen, hits FROM results{where} ORDER BY found DESC"
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params += [int(limit), int(offset)]
+        with self._db_lock:
+            rows = self._db().execute(sql, params).fetchall()
+        return [
+            {
+                "url": url,
+                "username": username,
+                "password": password,
+                "host": host,
+                "timestamp": datetime.fromtimestamp(found).isoformat(),
+                "last_seen": datetime.fromtimestamp(last_seen).isoformat(),
+                "hits": hits
+            }
+            for url, username, password, host, found, last_seen, hits in rows
+        ]
+
+    def count(self, url=None, host=None, username=None, since=None, until=None):
+        self.flush()
+        where, params = self._where(url, host, username, since, until)
+        with self._db_lock:
+            return self._db().execute(f"SELECT COUNT(*) FROM results{where}", params).fetchone()[0]
+
+    def clear(self):
+        with self._pending_lock:
+            self._pending.clear()
+        with self._db_lock:
+            conn = self._db()
+            with conn:
+                conn.execute("DELETE FROM results")
+
+results_store = ResultStore()
+atexit.register(results_store.flush)
@@ -0,0 +1,312 @@
+import time
+import threading
+from itertools import islice
+from collections import deque
+import config
+from utils import logger, host_of
+from checkpoint import checkpoints
+from tracing import tracer
+
+class CancelToken:
+    """Cancellation shared by everything one job started; ``cancel`` runs
+    the registered callbacks once."""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = []
+
+    def is_set(self):
+        return self._event.is_set()
+
+    def on_cancel(self, fn):
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(fn)
+                return
+        fn()
+
+    def cancel(self):
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for fn in callbacks:
+            try:
+                fn()
+            except Exception as e:
+                logger.error(f"Cancel callback error: {e}")
+
+class Target:
+    def __init__(self, url, feed=(), token=None):
+        self.url = url
+        self.host = host_of(url)
+        self.feed = iter(feed)
+        self.feed_lock = threading.Lock()
+        self.exhausted = False
+        self.finalized = False
+        self.pending = 0
+        self.chunks = 0
+        self.found = False
+        self.cancelled = threading.Event()
+        self.lock = threading.Lock()
+        self.data = {}
+        self.token = token
+        if token is not None:
+            token.on_cancel(self.cancel)
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def stopped(self):
+        return self.token is not None and self.token.is_set()
+
+class Task:
+    __slots__ = ("target", "user", "lo", "hi", "slotted")
+
+    def __init__(self, target, lo, hi, user=None):
+        self.target = target
+        self.user = user
+        self.lo = lo
+        self.hi = hi
+        self.slotted = False
+
+class WorkStealingScheduler:
+    """Runs (target, credential-chunk) tasks on a fixed set of workers.
+
+    Each target's chunks are pulled lazily from its ``(user, lo, hi)``
+    feed: ``active`` chunks up front and one more each time a worker takes
+    one, so a target never needs its total size. Chunks are queued on the
+    least loaded worker's deque.
+    Workers take from the front of their own deque and, when it has
+    nothing runnable, steal from the back of the others. Only the first
+    ``active`` workers take tasks; the rest stay parked until
+    ``set_active`` raises the count. A task is only handed out while its
+    host is below the per-host limit, and chunks of a cancelled target are
+    dropped instead of run. ``on_target_done`` fires once the feed is
+    exhausted and the last chunk has finished or been dropped. Targets are tied to ``token``,
+    so cancelling it cancels every target this scheduler was given.
+    """
+
+    def __init__(self, workers, execute, host_limit=None, chunk_size=None, should_stop=None, on_target_done=None, name="scheduler", token=None):
+        self.workers = workers
+        self.execute = execute
+        self.host_limit = host_limit or config.PER_HOST_LIMIT
+        self.chunk_size = chunk_size or config.SCHEDULER_CHUNK_SIZE
+        self.should_stop = should_stop or (lambda: False)
+        self.on_target_done = on_target_done
+        self.name = name
+        self.token = token
+        self.stats = {"tasks": 0, "steals": 0, "dropped": 0}
+        self.active = workers
+        self._deques = [deque() for _ in range(workers)]
+        self._cond = threading.Condition()
+        self._host_active = {}
+        self._feeding = 0
+        self._closed = False
+        self._threads = []
+
+    def add_target(self, url, chunks):
+        target = Target(url, chunks, self.token)
+        with self._cond:
+            self._feeding += 1
+        self._feed(target, self.active)
+        return target
+
+    def _feed(self, target, n):
+        tasks = []
+        with target.feed_lock:
+            if target.exhausted:
+                return
+            try:
+                if not target.cancelled.is_set():
+                    tasks = [Task(target, lo, hi, user) for user, lo, hi in islice(target.feed, n)]
+                exhausted = len(tasks) < n
+            except Exception as e:
+                logger.error(f"[{target.url}] Candidate feed error: {e}")
+                with target.lock:
+                    target.data["incomplete"] = True
+                exhausted = True
+        with self._cond:
+            target.pending += len(tasks)
+            target.chunks += len(tasks)
+            if tasks:
+                min(self._deques[:self.active], key=len).extend(tasks)
+                self._cond.notify_all()
+            if exhausted and not target.exhausted:
+                target.exhausted = True
+                self._feeding -= 1
+                self._cond.notify_all()
+            finished = self._settle(target)
+        if finished:
+            self._target_done(target)
+
+    def _settle(self, target):
+        if target.exhausted and target.pending == 0 and not target.finalized:
+            target.finalized = True
+            return True
+        return False
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def set_active(self, n):
+        with self._cond:
+            self.active = max(1, min(n, self.workers))
+            self._cond.notify_all()
+
+    def start(self):
+        for worker_id in range(self.workers):
+            t = threading.Thread(target=self._worker_loop, args=(worker_id,), name=f"{self.name}-{worker_id}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def join(self):
+        for t in self._threads:
+            t.join()
+
+    def run(self):
+        self.start()
+        self.close()
+        self.join()
+        return self.stats
+
+    def _drained(self):
+        return self._closed and not self._feeding and not any(self._deques)
+
+    def _pick(self, dq, from_back):
+        indices = range(len(dq) - 1, -1, -1) if from_back else range(len(dq))
+        for index in indices:
+            task = dq[index]
+            if task.target.cancelled.is_set():
+                return index, task
+            if self._host_active.get(task.target.host, 0) < self.host_limit:
+                return index, task
+        return None, None
+
+    def _take(self, worker_id):
+        own = self._deques[worker_id]
+        index, task = self._pick(own, False)
+        if task is not None:
+            del own[index]
+            return task
+        for offset in range(1, self.workers):
+            victim = self._deques[(worker_id + offset) % self.workers]
+            index, task = self._pick(victim, True)
+            if task is not None:
+                del victim[index]
+                self.stats["steals"] += 1
+                return task
+        return None
+
+    def _next_task(self, worker_id):
+        with self._cond:
+            while True:
+                if self.should_stop():
+                    return None
+                if worker_id >= self.active:
+                    if self._drained():
+                        return None
+                    self._cond.wait(0.5)
+                    continue
+                task = self._take(worker_id)
+                if task is not None:
+                    if not task.target.cancelled.is_set():
+                        host = task.target.host
+                        self._host_active[host] = self._host_active.get(host, 0) + 1
+                        task.slotted = True
+                    return task
+                if self._drained():
+                    return None
+                self._cond.wait(0.5)
+
+    def _task_done(self, task, ran):
+        target = task.target
+        with self._cond:
+            if task.slotted:
+                self._host_active[target.host] -= 1
+                task.slotted = False
+            if ran:
+                self.stats["tasks"] += 1
+            else:
+                self.stats["dropped"] += 1
+            target.pending -= 1
+            finished = self._settle(target)
+            self._cond.notify_all()
+        if finished:
+            self._target_done(target)
+
+    def _target_done(self, target):
+        if self.on_target_done is not None:
+            try:
+                self.on_target_done(target)
+            except Exception as e:
+                logger.error(f"[{target.url}] Target finalize error: {e}")
+
+    def _worker_loop(self, worker_id):
+        while True:
+            waited = time.perf_counter()
+            task = self._next_task(worker_id)
+            if task is None:
+                break
+            self._feed(task.target, 1)
+            ran = task.slotted and not task.target.cancelled.is_set()
+            started = time.perf_counter()
+            tracer.complete("wait_task", self.name, started - waited)
+            try:
+                if ran:
+                    self.execute(worker_id, task)
+            except Exception as e:
+                logger.error(f"[{task.target.url}] Task error: {e}")
+            finally:
+                if ran:
+                    tracer.complete("chunk", self.name, time.perf_counter() - started, task.target.url, lo=task.lo, hi=task.hi)
+                self._task_done(task, ran)
+
+def target_progress(targets):
+    targets = list(targets)
+    return {
+        "targets": len(targets),
+        "targets_done": sum(1 for t in targets if t.finalized),
+        "chunks": sum(t.chunks for t in targets),
+        "chunks_done": sum(t.chunks - t.pending for t in targets),
+        "found": sum(1 for t in targets if t.found)
+    }
+
+class CrackRun:
+    """A started cracker stage that accepts targets until ``finish``."""
+
+    def __init__(self, scheduler, results, run_key, source, finalize=None, autoscaler=None):
+        self.scheduler = scheduler
+        self.results = results
+        self.run_key = run_key
+        self.source = source
+        self.finalize = finalize
+        self.autoscaler = autoscaler
+        self.targets = []
+
+    def submit(self, url):
+        if self.run_key and checkpoints.is_target_done(self.run_key, url):
+            logger.info(f"[Checkpoint] Target already finished, skipping: {url}")
+            return None
+        target = self.scheduler.add_target(url, self.source.chunks(self.scheduler.chunk_size))
+        self.targets.append(target)
+        return target
+
+    def progress(self):
+        return target_progress(self.targets)
+
+    def finish(self):
+        self.scheduler.close()
+        try:
+            self.scheduler.join()
+        finally:
+            if self.autoscaler is not None:
+                self.autoscaler.stop()
+                logger.info(f"[Autoscaler] {self.autoscaler.mode} stats: {self.autoscaler.stats()}")
+            if self.finalize is not None:
+                self.finalize()
+        return self.results
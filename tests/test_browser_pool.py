@@ -0,0 +1,209 @@
+import sys
+import types
+import asyncio
+import pytest
+import config
+from browser_pool import BrowserPool, AsyncBrowserPool, _BrowserSlot, _Lease
+
+class IdleSlots(BrowserPool):
+    """BrowserPool whose slot threads only record that they were started."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.started = []
+
+    def _slot_loop(self, slot_id):
+        self.started.append(slot_id)
+        with self._resized:
+            while not self._closing:
+                self._resized.wait(0.05)
+
+def test_slots_start_lazily_with_active_count():
+    pool = IdleSlots(16, active=2)
+    pool.start()
+    assert len(pool._threads) == 2
+    pool.resize(5)
+    assert len(pool._threads) == 5
+    pool.resize(3)
+    pool.resize(40)
+    assert len(pool._threads) == 16
+    pool.close(1)
+
+def test_resize_before_start_only_sets_active():
+    pool = IdleSlots(8, active=2)
+    pool.resize(4)
+    assert pool._threads == []
+    pool.start()
+    assert len(pool._threads) == 4
+    pool.close(1)
+
+class FakePage:
+    def set_default_timeout(self, ms):
+        pass
+
+    def on(self, event, fn):
+        pass
+
+class StubAsyncPool(AsyncBrowserPool):
+    """AsyncBrowserPool without Playwright: leases are plain objects."""
+
+    async def _startup(self):
+        self._gate = asyncio.Condition()
+        self._slots = [_BrowserSlot() for _ in range(self.browsers)]
+
+    async def _shutdown(self):
+        pass
+
+    async def _acquire(self, slot):
+        return _Lease(None, FakePage())
+
+    async def _release(self, slot, lease):
+        pass
+
+def test_async_resize_caps_pages_in_flight():
+    pool = StubAsyncPool(browsers=2, max_pages=8)
+    pool.resize(3)
+
+    async def work(page, context):
+        await asyncio.sleep(0.02)
+
+    futures = [pool.submit(work) for _ in range(12)]
+    for future in futures:
+        future.result(5)
+    assert pool.stats()["peak_in_flight"] == 3
+    pool.resize(6)
+    futures = [pool.submit(work) for _ in range(12)]
+    for future in futures:
+        future.result(5)
+    assert pool.stats()["peak_in_flight"] == 6
+    pool.close()
+
+def test_async_pool_is_not_a_slot_pool():
+    pool = StubAsyncPool(browsers=2, max_pages=8)
+    assert not isinstance(pool, BrowserPool)
+    assert not hasattr(pool, "_slot_loop") and not hasattr(pool, "active")
+    pool.resize(20)
+    stats = pool.stats()
+    assert stats["engine"] == "async" and stats["page_limit"] == 8 and stats["browsers"] == 2
+    assert "size" not in stats
+
+class FakeContext:
+    def __init__(self):
+        self.closed = False
+        self.page = None
+
+    def new_page(self):
+        self.page = FakeBrowserPage()
+        return self.page
+
+    def clear_cookies(self):
+        pass
+
+    def clear_permissions(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+class FakeFrame:
+    def __init__(self, url):
+        self.url = url
+        self.parent_frame = None
+
+class FakeBrowserPage(FakePage):
+    def __init__(self):
+        self.url = "about:blank"
+        self.listeners = []
+        self.wiped = []
+
+    def on(self, event, fn):
+        self.listeners.append(fn)
+
+    def is_closed(self):
+        return False
+
+    def goto(self, url):
+        self.url = url
+        for fn in self.listeners:
+            fn(FakeFrame(url))
+
+    def evaluate(self, script):
+        self.wiped.append(self.url)
+
+class FakeBrowser:
+    def __init__(self):
+        self.contexts = []
+
+    def new_context(self, **kwargs):
+        self.contexts.append(FakeContext())
+        return self.contexts[-1]
+
+    def is_connected(self):
+        return True
+
+    def close(self):
+        pass
+
+class FakePlaywright:
+    def __init__(self, fail):
+        self.fail = fail
+        self.chromium = self
+
+    def start(self):
+        return self
+
+    def stop(self):
+        pass
+
+    def launch(self, headless=True):
+        if self.fail:
+            raise RuntimeError("browser executable missing")
+        return FakeBrowser()
+
+def fake_playwright(monkeypatch, fail=False):
+    module = types.ModuleType("playwright.sync_api")
+    module.sync_playwright = lambda: FakePlaywright(fail)
+    monkeypatch.setitem(sys.modules, "playwright", types.ModuleType("playwright"))
+    monkeypatch.setitem(sys.modules, "playwright.sync_api", module)
+    monkeypatch.setattr(config, "RESOURCE_ROUTING", False)
+
+def test_slots_prewarm_contexts_before_first_task(monkeypatch):
+    fake_playwright(monkeypatch)
+    pool = BrowserPool(1, prewarm=2)
+    pool.start()
+    assert pool.submit(lambda page, context: "ok").result(5) == "ok"
+    stats = pool.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 0 and stats["browser_launches"] == 1
+    pool.close(1)
+
+def test_launch_failure_fails_queued_work_instead_of_hanging(monkeypatch):
+    fake_playwright(monkeypatch, fail=True)
+    pool = BrowserPool(2, prewarm=1)
+    futures = [pool.submit(lambda page, context: None) for _ in range(3)]
+    for future in futures:
+        with pytest.raises(RuntimeError, match="browser executable missing"):
+            future.result(5)
+    assert pool.stats()["dead_slots"] == 2
+    with pytest.raises(RuntimeError):
+        pool.submit(lambda page, context: None).result(5)
+    pool.close(1)
+
+def test_context_storage_is_wiped_or_context_closed_between_tasks(monkeypatch):
+    fake_playwright(monkeypatch)
+    pool = BrowserPool(1, prewarm=0)
+
+    def visit(*urls):
+        def task(page, context):
+            for url in urls:
+                page.goto(url)
+            return context
+        return pool.submit(task).result(5)
+
+    first = visit("http://a.test/login", "http://a.test/home")
+    assert first.page.wiped == ["http://a.test/home"] and not first.closed
+    assert visit("http://b.test:8080/login", "http://sso.test/auth") is first
+    assert first.closed
+    third = visit("http://c.test/login")
+    assert third is not first and third.page.wiped == ["http://c.test/login"]
+    assert pool.stats()["recycled"] == 1
+    pool.close(1)
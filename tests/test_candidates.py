@@ -0,0 +1,43 @@
+from candidates import CandidateSource, Wordlist, load_wordlist, size_hint
+
+def write_lines(tmp_path, lines):
+    path = tmp_path / "words.txt"
+    path.write_text("".join(f"{line}\n" for line in lines), encoding="utf-8")
+    return str(path)
+
+def test_wordlist_dedupes_and_strips(tmp_path):
+    words = Wordlist(write_lines(tmp_path, ["admin", " root ", "", "admin", "guest"]))
+    try:
+        assert [words[i] for i in range(3)] == ["admin", "root", "guest"]
+        assert len(words) == 3
+    finally:
+        words.close()
+
+def test_chunks_do_not_scan_whole_wordlist(tmp_path):
+    words = Wordlist(write_lines(tmp_path, [f"pw{i}" for i in range(20000)]))
+    try:
+        source = CandidateSource(["admin"], words)
+        assert next(source.chunks(10)) == (0, 0, 10)
+        assert not words.complete
+        assert size_hint(words) == "?"
+    finally:
+        words.close()
+
+def test_user_order_covers_every_pair_once():
+    source = CandidateSource(["a", "b"], ["1", "2", "3"], order="user")
+    chunks = list(source.chunks(2))
+    assert chunks == [(0, 0, 2), (0, 2, 3), (1, 0, 2), (1, 2, 3)]
+    pairs = [(user, pwd) for chunk in chunks for user, _, pwd in source.slice(*chunk)]
+    assert pairs == [("a", "1"), ("a", "2"), ("a", "3"), ("b", "1"), ("b", "2"), ("b", "3")]
+    assert sum(source.size(*chunk) for chunk in chunks) == 6
+
+def test_password_order_sprays_each_password():
+    source = CandidateSource(["a", "b"], ["1", "2", "3"], order="password")
+    chunks = list(source.chunks(4))
+    assert chunks == [(None, 0, 2), (None, 2, 3)]
+    assert list(source.slice(*chunks[1])) == [("a", 2, "3"), ("b", 2, "3")]
+    assert source.size(*chunks[0]) == 4
+
+def test_missing_or_empty_file_falls_back_to_default(tmp_path):
+    assert load_wordlist(str(tmp_path / "missing.txt"), ["admin"]) == ["admin"]
+    assert load_wordlist(write_lines(tmp_path, ["", "  "]), ["root"]) == ["root"]
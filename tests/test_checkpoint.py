@@ -0,0 +1,51 @@
+from checkpoint import CheckpointStore, RangeSet
+
+def test_rangeset_merges_adjacent_and_overlapping():
+    ranges = RangeSet()
+    for index in (5, 1, 2, 3, 7, 6):
+        ranges.add(index)
+    assert ranges.ranges == [[1, 4], [5, 8]]
+    ranges.add_range(3, 6)
+    assert ranges.ranges == [[1, 8]]
+    assert 1 in ranges and 7 in ranges and 8 not in ranges and 0 not in ranges
+    assert len(ranges) == 7
+
+def test_marks_survive_flush_and_reopen(tmp_path):
+    path = str(tmp_path / "checkpoint.db")
+    store = CheckpointStore(path, flush_interval=60)
+    store.mark("run", "http://a/login", "admin", 0)
+    store.mark("run", "http://a/login", "admin", 1)
+    store.mark("run", "http://a/login", "root", 4)
+    assert 1 in store.load_target("run", "http://a/login")["admin"]
+    store.flush()
+    store.mark("run", "http://a/login", "admin", 2)
+    store.flush()
+
+    reopened = CheckpointStore(path, flush_interval=60)
+    done = reopened.load_target("run", "http://a/login")
+    assert done["admin"].ranges == [[0, 3]]
+    assert done["root"].ranges == [[4, 5]]
+    assert reopened.load_target("other-run", "http://a/login") == {}
+
+def test_finished_targets_are_skipped_per_run_key(tmp_path):
+    store = CheckpointStore(str(tmp_path / "checkpoint.db"), flush_interval=60)
+    assert not store.is_target_done("run", "http://a/login")
+    store.finish_target("run", "http://a/login", "exhausted")
+    assert store.is_target_done("run", "http://a/login")
+    store.flush()
+    assert store.is_target_done("run", "http://a/login")
+    assert not store.is_target_done("other-run", "http://a/login")
+    store.reset()
+    assert not store.is_target_done("run", "http://a/login")
+
+def test_worker_batches_are_forwarded_to_coordinator(tmp_path):
+    coordinator = CheckpointStore(str(tmp_path / "checkpoint.db"), flush_interval=60)
+    worker = CheckpointStore(str(tmp_path / "unused.db"), flush_interval=60)
+    worker.forward_to(coordinator.merge_remote)
+    worker.mark("run", "http://a/login", "admin", 3)
+    worker.finish_target("run", "http://a/login", "found")
+    worker.flush()
+    assert not (tmp_path / "unused.db").exists()
+    coordinator.flush()
+    assert coordinator.load_target("run", "http://a/login")["admin"].ranges == [[3, 4]]
+    assert coordinator.is_target_done("run", "http://a/login")
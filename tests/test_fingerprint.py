@@ -0,0 +1,64 @@
+from fingerprint import Baseline, Fingerprint, baseline_problem, fingerprint_response
+from rate_control import StatusWatch
+
+class FakeResponse:
+    def __init__(self, status_code, body=b"", headers=None):
+        self.status_code = status_code
+        self.content = body
+        self.headers = headers or {}
+
+LOGIN_PAGE = b"<html><form><input name=u><input type=password name=p></form></html>"
+HOME_PAGE = b"<html><div><a href=/logout>logout</a></div></html>"
+
+def fp(status=200, body=LOGIN_PAGE, location=None):
+    headers = {"Location": location} if location else {}
+    return fingerprint_response(FakeResponse(status, body, headers))
+
+def test_throttled_probe_is_rejected():
+    assert baseline_problem([fp(429), fp(429)]) == "probe got HTTP 429"
+    assert baseline_problem([fp(200), fp(503)]) == "probe got HTTP 503"
+
+def test_disagreeing_probes_are_rejected():
+    assert baseline_problem([fp(200), fp(302, location="/login?e=1")]) == "probes disagree on status"
+    assert baseline_problem([fp(302, location="/login"), fp(302, location="/error")]) == "probes disagree on redirect target"
+    assert baseline_problem([]) == "no probe completed"
+
+def test_consistent_probes_are_accepted():
+    assert baseline_problem([fp(200), fp(200)]) is None
+
+def test_judge_login_form_baseline():
+    baseline = Baseline([fp(200), fp(200)])
+    assert not baseline.judge(fp(200))
+    assert not baseline.judge(fp(429))
+    assert baseline.judge(fp(200, HOME_PAGE))
+    assert baseline.judge(fp(302, location="/dashboard"))
+    assert not baseline.judge(fp(302, location="/login?error=1"))
+
+def test_judge_redirect_baseline():
+    baseline = Baseline([fp(302, location="/login?e=1"), fp(302, location="/login?e=1")])
+    assert not baseline.judge(fp(302, location="/login?e=1"))
+    assert baseline.judge(fp(302, location="/home"))
+
+def test_judge_ignores_visible_error():
+    baseline = Baseline([fp(200), fp(200)])
+    page = Fingerprint(None, "/home", 10, 1, False, False, error_visible=True)
+    assert not baseline.judge(page)
+
+class FakeRequest:
+    resource_type = "document"
+
+class FakePageResponse:
+    request = FakeRequest()
+
+    def __init__(self, status):
+        self.status = status
+        self.headers = {"retry-after": "3"}
+
+def test_status_watch_keeps_throttle_status_until_taken():
+    watch = StatusWatch()
+    watch(FakePageResponse(200))
+    assert watch.status is None
+    watch(FakePageResponse(429))
+    assert watch.status == 429
+    assert watch.take() == ("throttled", 3.0)
+    assert watch.status is None
@@ -0,0 +1,98 @@
+import config
+import form_reset
+from form_reset import ResetPolicy, target_policy
+from login_flow import run_flow, reset_form
+from scheduler import Target
+
+class Page:
+    def __init__(self, url):
+        self.url = url
+
+class Steps:
+    """Page whose form is ready on the n-th form_ready check."""
+
+    def __init__(self, url, ready):
+        self.page = Page(url)
+        self.ready = list(ready)
+        self.calls = []
+
+    def form_ready(self, elements, timeout):
+        self.calls.append("form_ready")
+        return self.ready.pop(0)
+
+    def clear_cookies(self):
+        self.calls.append("clear_cookies")
+
+    def goto(self, url, wait_until=None):
+        self.calls.append(f"goto:{wait_until or 'load'}")
+
+    def wait_load(self, state):
+        self.calls.append(f"wait_load:{state}")
+
+def test_demote_moves_one_step_and_only_from_current():
+    policy = ResetPolicy("http://h/login")
+    policy.demote("soft", "stale")
+    assert policy.strategy == "inplace"
+    policy.demote("inplace", "form gone")
+    policy.demote("soft", "not ready")
+    policy.demote("hard", "ignored")
+    assert policy.strategy == "hard"
+    assert policy.demotions == ["inplace: form gone", "soft: not ready"]
+
+def test_record_measures_savings_against_full_load():
+    policy = ResetPolicy("http://h/login")
+    policy.record("inplace", 50)
+    assert policy.saved_ms == 0
+    policy.record("hard", 1000)
+    policy.record("inplace", 100)
+    policy.record("soft", 400)
+    stats = policy.stats()
+    assert stats["saved_ms"] == 1500.0
+    assert stats["resets"] == {"inplace": 2, "soft": 1, "hard": 1}
+    assert stats["avg_ms"]["inplace"] == 75.0
+    assert stats["load_ms"] == 1000.0
+
+def test_outcome_signal_mismatch_demotes():
+    policy = ResetPolicy("http://h/login")
+    policy.outcome("inplace", "xhr")
+    assert policy.strategy == "inplace"
+    policy.outcome("hard", "error_element")
+    policy.outcome("inplace", "xhr")
+    assert policy.strategy == "inplace"
+    policy.outcome("inplace", "navigation")
+    assert policy.strategy == "soft"
+
+def test_target_policy_start(monkeypatch):
+    monkeypatch.setattr(config, "FORM_RESET_LEARNING", True)
+    assert target_policy(Target("http://a/login")).strategy == "inplace"
+    target = Target("http://b/login")
+    policy = target_policy(target, captcha=True)
+    assert policy.strategy == "soft" and target_policy(target) is policy
+    monkeypatch.setattr(config, "FORM_RESET_LEARNING", False)
+    assert target_policy(Target("http://c/login")).strategy == "hard"
+
+def test_reset_form_demotes_through_strategies():
+    url = "http://h/login"
+    policy = ResetPolicy(url)
+    steps = Steps(url, [False, False])
+    assert run_flow(reset_form(steps, url, url, {}, policy), steps) == "hard"
+    assert policy.strategy == "hard"
+    assert steps.calls == ["form_ready", "clear_cookies", "goto:domcontentloaded", "form_ready",
+                           "clear_cookies", "goto:load", "wait_load:networkidle"]
+    assert policy.counts["hard"] == 1
+
+def test_reset_form_keeps_page_when_form_is_reusable():
+    url = "http://h/login"
+    policy = ResetPolicy(url)
+    steps = Steps(url, [True])
+    assert run_flow(reset_form(steps, url, url, {}, policy), steps) == "inplace"
+    assert steps.calls == ["form_ready"]
+    assert policy.counts["inplace"] == 1
+
+def test_recorded_stats():
+    form_reset.reset()
+    policy = ResetPolicy("http://h/login")
+    form_reset.record(policy)
+    assert form_reset.reset_stats()["http://h/login"]["strategy"] == "inplace"
+    form_reset.reset()
+    assert form_reset.reset_stats() == {}
@@ -0,0 +1,37 @@
+import queue
+import logging
+from utils import AttemptSampler, LineQueueHandler, RingBufferHandler, logger, log_queue, log_listener
+
+def test_line_queue_keeps_newest_formatted_lines():
+    lines = queue.Queue()
+    handler = LineQueueHandler(lines, capacity=3)
+    handler.setFormatter(logging.Formatter("%(levelname)s %(message)s"))
+    for i in range(5):
+        handler.handle(logging.LogRecord("t", logging.INFO, __file__, 1, "line %d", (i,), None))
+    assert [lines.get_nowait() for _ in range(lines.qsize())] == ["INFO line 2", "INFO line 3", "INFO line 4"]
+
+def test_log_queue_still_receives_strings():
+    while not log_queue.empty():
+        log_queue.get_nowait()
+    logger.warning("compat feed check")
+    log_listener.stop()
+    log_listener.start()
+    lines = [log_queue.get_nowait() for _ in range(log_queue.qsize())]
+    assert any(line.endswith("WARNING - compat feed check") for line in lines)
+
+def test_attempt_sampler_counters_stay_bounded():
+    sampler = AttemptSampler(first=2, every=0, max_targets=3)
+    assert [sampler.allow("a") for _ in range(3)] == [True, True, False]
+    for target in ("b", "c", "d"):
+        sampler.allow(target)
+    assert len(sampler._counts) == 3 and "a" not in sampler._counts
+    sampler.forget("d")
+    assert "d" not in sampler._counts
+    assert sampler.allow("a")
+
+def test_ring_buffer_keeps_newest_records():
+    handler = RingBufferHandler(2)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    for i in range(3):
+        handler.handle(logging.LogRecord("t", logging.INFO, __file__, 1, "line %d", (i,), None))
+    assert handler.recent() == ["line 1", "line 2"]
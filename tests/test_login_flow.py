@@ -0,0 +1,172 @@
+import asyncio
+import config
+import login_flow
+from fingerprint import Baseline, Fingerprint
+from login_flow import run_flow, run_flow_async, judge_keywords
+from rate_control import StatusWatch, TargetController
+from scheduler import Target, Task
+
+class Element:
+    def __init__(self, name):
+        self.name = name
+
+class Locator:
+    def __init__(self, name):
+        self.first = Element(name)
+
+class FakePage:
+    def __init__(self, url):
+        self.url = url
+        self.listeners = []
+
+    def on(self, event, fn):
+        self.listeners.append(fn)
+
+    def remove_listener(self, event, fn):
+        self.listeners.remove(fn)
+
+    def locator(self, selector):
+        return Locator(selector)
+
+class FakeSteps:
+    """Stands in for PageSteps: a login form that accepts admin:secret and
+    whose submit button only reacts to a dispatched click."""
+
+    TimeoutError = TimeoutError
+
+    def __init__(self, url):
+        self.page = FakePage(url)
+        self.filled = {}
+        self.calls = []
+        self.logged_in = False
+
+    def __getattr__(self, name):
+        def step(*args):
+            self.calls.append(name)
+        return step
+
+    def discover(self, url):
+        self.calls.append("discover")
+        return {"user": "#user", "pass": "#pass", "submit": "#go", "captcha_img": None, "captcha_input": None}
+
+    def fill(self, element, value):
+        self.filled[element.name] = value
+        return True
+
+    def click(self, element, timeout):
+        self.calls.append("click")
+        raise RuntimeError("element is covered")
+
+    def dispatch_click(self, element):
+        self.calls.append("dispatch_click")
+        self.logged_in = self.filled == {"#user": "admin", "#pass": "secret"}
+
+    def acquire(self, controller):
+        return controller.acquire()
+
+    def blocking(self, fn, *args):
+        return fn(*args)
+
+    def form_ready(self, elements, timeout):
+        return True
+
+    def count(self, selector):
+        return 0 if self.logged_in else 1
+
+    def content(self):
+        return "<h1>Welcome to the dashboard</h1>" if self.logged_in else "<p>Invalid password</p>"
+
+class AsyncSteps(FakeSteps):
+    """Same form behind awaitable steps, as AsyncPageSteps exposes them."""
+
+    def __getattribute__(self, name):
+        if name.startswith("_") or name in ("page", "filled", "calls", "logged_in", "TimeoutError"):
+            return object.__getattribute__(self, name)
+        try:
+            sync_step = object.__getattribute__(self, name)
+        except AttributeError:
+            sync_step = self.__getattr__(name)
+
+        async def step(*args):
+            return sync_step(*args)
+        return step
+
+class Response:
+    def __init__(self, status):
+        self.status = status
+        self.headers = {}
+        self.request = type("Request", (), {"resource_type": "document"})()
+
+class ThrottledSteps(FakeSteps):
+    """Every submit gets a 503 maintenance page without a password field."""
+
+    def __init__(self, url, watch):
+        super().__init__(url)
+        self.watch = watch
+
+    def dispatch_click(self, element):
+        self.calls.append("dispatch_click")
+        self.watch(Response(503))
+
+    def fingerprint(self):
+        return Fingerprint(None, "/login", 120, 7, False, False)
+
+def crack(steps, passwords, monkeypatch, runner=run_flow):
+    monkeypatch.setattr(config, "BASELINE_DETECTION", False)
+    monkeypatch.setattr(config, "STOP_ON_SUCCESS", True)
+    saved = []
+    monkeypatch.setattr(login_flow, "save_result", lambda url, user, pwd, results: saved.append((user, pwd)))
+    target = Target("http://fake/login")
+    task = Task(target, 0, len(passwords), 0)
+    flow = login_flow.crack_chunk(steps, task, ["admin"], passwords, [], None, lambda: False)
+    result = runner(flow, steps)
+    if asyncio.iscoroutine(result):
+        asyncio.run(result)
+    return target, saved
+
+def test_judge_keywords():
+    assert judge_keywords("http://h/login", "http://h/home", "<p>Welcome back</p>", False)[0]
+    assert not judge_keywords("http://h/login", "http://h/login", "<p>Invalid password</p>", True)[0]
+    assert not judge_keywords("http://h/login", "http://h/error", "<p>dashboard</p>", False)[0]
+
+def test_flow_falls_back_to_dispatched_click_and_finds_password(monkeypatch):
+    steps = FakeSteps("http://fake/login")
+    target, saved = crack(steps, ["123456", "secret", "never-tried"], monkeypatch)
+    assert saved == [("admin", "secret")]
+    assert target.found and target.cancelled.is_set()
+    assert steps.calls.count("dispatch_click") == 2
+    assert steps.page.listeners == []
+    assert "reset_policy" in target.data
+
+def test_async_driver_runs_the_same_flow(monkeypatch):
+    steps = AsyncSteps("http://fake/login")
+    target, saved = crack(steps, ["secret"], monkeypatch, run_flow_async)
+    assert saved == [("admin", "secret")]
+    assert not target.data.get("incomplete")
+
+def test_exception_from_step_reaches_flow():
+    def flow():
+        try:
+            yield "boom",
+        except ValueError as e:
+            return f"caught {e}"
+
+    class Steps:
+        def boom(self):
+            raise ValueError("step")
+
+    assert run_flow(flow(), Steps()) == "caught step"
+
+def test_throttled_response_is_not_a_success(monkeypatch):
+    monkeypatch.setattr(config, "BASELINE_DETECTION", True)
+    saved = []
+    monkeypatch.setattr(login_flow, "save_result", lambda url, user, pwd, results: saved.append((user, pwd)))
+    watch = StatusWatch()
+    steps = ThrottledSteps("http://fake/login", watch)
+    target = Target("http://fake/login")
+    target.data["controller"] = TargetController(target.url)
+    target.data["baseline"] = Baseline([Fingerprint(None, "/login", 2000, 3, True, True)])
+    candidates = [("admin", 0, "123456"), ("admin", 1, "secret")]
+    flow = login_flow.process_target(steps, target, candidates, ["123456", "secret"], [], None, {}, watch, False, lambda: False)
+    assert run_flow(flow, steps) == 2
+    assert saved == [] and not target.found
@@ -0,0 +1,12 @@
+import config
+from profile_cache import ProfileCache
+
+def test_merge_keeps_classification_timestamp(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "USE_PROFILE_CACHE", True)
+    profiles = ProfileCache(path=str(tmp_path / "profiles.json"), ttl=60)
+    profiles.update("http://h/login", classification="simple")
+    profiles._entries["http://h/login"]["updated"] -= 120
+    profiles.merge("http://h/login", "form", post_url="http://h/auth", user_field="u", pass_field="p")
+    entry = profiles.get("http://h/login")
+    assert entry["form"]["post_url"] == "http://h/auth"
+    assert profiles.get_fresh("http://h/login") is None
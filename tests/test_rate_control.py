@@ -0,0 +1,60 @@
+import time
+import config
+from rate_control import TargetController, classify_status, retry_after
+
+def attempt(controller, rtt=0.05, outcome="ok", wait=None):
+    controller.acquire()
+    controller.release(time.monotonic() - rtt, outcome, wait)
+
+def test_classify_status_and_retry_after():
+    assert classify_status(429) == "throttled"
+    assert classify_status(503) == "throttled"
+    assert classify_status(500) == "error"
+    assert classify_status(401) == "ok"
+    assert retry_after({"retry-after": "7"}) == 7.0
+    assert retry_after({"retry-after": "Wed, 21 Oct 2026 07:28:00 GMT"}) is None
+    assert retry_after(None) is None
+
+def test_window_grows_only_when_saturated_and_stops_at_ceiling():
+    controller = TargetController("http://a/login", ceiling=4)
+    assert controller.limit == config.AIMD_INITIAL_LIMIT
+    for _ in range(30):
+        started = [controller.acquire() for _ in range(int(controller.limit))]
+        for s in started:
+            controller.release(s - 0.05, "ok")
+    assert controller.limit == 4
+
+def test_unsaturated_success_does_not_grow_window():
+    controller = TargetController("http://a/login", ceiling=8)
+    controller.limit = 4.0
+    for _ in range(20):
+        attempt(controller)
+    assert controller.limit == 4.0
+
+def test_throttle_halves_window_once_per_round_trip():
+    controller = TargetController("http://a/login", ceiling=8)
+    controller.limit = 8.0
+    attempt(controller, rtt=1.0)
+    attempt(controller, outcome="throttled")
+    attempt(controller, outcome="throttled")
+    assert controller.limit == 8.0 * config.AIMD_BACKOFF
+    assert controller.counts["throttled"] == 2
+
+def test_congestion_at_window_one_spaces_attempts_and_honours_retry_after():
+    controller = TargetController("http://a/login", ceiling=2)
+    attempt(controller, outcome="throttled", wait=0.3)
+    assert controller.limit == 1.0
+    assert controller.interval == config.AIMD_MIN_INTERVAL
+    started = time.monotonic()
+    controller.acquire()
+    assert time.monotonic() - started >= 0.25
+    controller.release(time.monotonic(), "ok")
+
+def test_timeout_never_drops_below_attempt_timeout():
+    controller = TargetController("http://a/login")
+    assert controller.timeout() == config.ATTEMPT_TIMEOUT
+    for _ in range(30):
+        attempt(controller, rtt=0.01)
+    assert controller.timeout() == config.ATTEMPT_TIMEOUT
+    controller.srtt, controller.rttvar = 4.0, 2.0
+    assert controller.timeout() == config.TIMEOUT
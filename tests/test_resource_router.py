@@ -0,0 +1,82 @@
+import config
+from resource_router import ResourceRouter, cacheable
+
+class FakeRequest:
+    def __init__(self, url, resource_type="stylesheet", method="GET"):
+        self.url = url
+        self.resource_type = resource_type
+        self.method = method
+
+class FakeResponse:
+    def __init__(self, status=200, headers=None, body=b"body"):
+        self.status = status
+        self.headers = headers or {}
+        self._body = body
+
+    def body(self):
+        return self._body
+
+class FakeRoute:
+    def __init__(self, response):
+        self.response = response
+        self.fetched = 0
+        self.fulfilled = []
+
+    def fetch(self):
+        self.fetched += 1
+        return self.response
+
+    def fulfill(self, **kwargs):
+        self.fulfilled.append(kwargs)
+
+def test_cacheable_honours_cache_control_and_vary():
+    assert cacheable(200, {"cache-control": "public, max-age=3600"})
+    assert cacheable(200, {"vary": "Accept-Encoding"})
+    assert not cacheable(304, {})
+    assert not cacheable(200, {"cache-control": "no-store"})
+    assert not cacheable(200, {"cache-control": "no-cache"})
+    assert not cacheable(200, {"Cache-Control": "private, max-age=600"})
+    assert not cacheable(200, {"cache-control": "max-age=0, must-revalidate"})
+    assert not cacheable(200, {"pragma": "no-cache"})
+    assert not cacheable(200, {"vary": "Cookie"})
+    assert not cacheable(200, {"vary": "*"})
+
+def test_cached_entries_never_replay_set_cookie():
+    router = ResourceRouter()
+    request = FakeRequest("http://a/app.css")
+    first = FakeRoute(FakeResponse(headers={"content-type": "text/css", "set-cookie": "sid=1", "content-length": "4"}))
+    router._serve_cached(first, request)
+    second = FakeRoute(FakeResponse())
+    router._serve_cached(second, request)
+    assert second.fetched == 0
+    assert second.fulfilled == [{"status": 200, "headers": {"content-type": "text/css"}, "body": b"body"}]
+    assert router.stats()["cache_hits"] == 1
+
+def test_uncacheable_responses_are_fetched_every_time():
+    router = ResourceRouter()
+    request = FakeRequest("http://a/key.js")
+    for _ in range(2):
+        route = FakeRoute(FakeResponse(headers={"cache-control": "no-cache"}))
+        router._serve_cached(route, request)
+        assert route.fetched == 1
+
+def test_images_need_explicit_cache_headers():
+    assert cacheable(200, {"cache-control": "public, max-age=600"}, explicit=True)
+    assert cacheable(200, {"cache-control": "immutable"}, explicit=True)
+    assert cacheable(200, {"ETag": '"abc"'}, explicit=True)
+    assert not cacheable(200, {"content-type": "image/png"}, explicit=True)
+
+def test_keyword_free_captcha_image_is_never_shared():
+    assert config.RESOURCE_RULES["image"] == "cache"
+    router = ResourceRouter()
+    request = FakeRequest("http://a/img?id=7", "image")
+    assert router._action(request) == "cache"
+    for _ in range(2):
+        route = FakeRoute(FakeResponse(headers={"content-type": "image/png"}))
+        router._serve_cached(route, request)
+        assert route.fetched == 1
+    assert router.cache.get(request.url) is None
+
+def test_scripts_are_not_cached_by_default():
+    assert config.RESOURCE_RULES["script"] == "allow"
+    assert ResourceRouter()._action(FakeRequest("http://a/jsencrypt.js", "script")) == "allow"
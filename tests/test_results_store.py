@@ -0,0 +1,40 @@
+from results_store import ResultStore, parse_results_line
+
+def store(tmp_path, legacy=None):
+    return ResultStore(path=str(tmp_path / "results.db"), legacy_file=legacy or str(tmp_path / "missing.txt"))
+
+def test_parse_results_line():
+    assert parse_results_line("http://h/login | admin:s3cret\n") == ("http://h/login", "admin", "s3cret")
+    assert parse_results_line("http://h/login | admin:pa:ss:") == ("http://h/login", "admin", "pa:ss:")
+    assert parse_results_line("http://h/login | :s3cret") is None
+    assert parse_results_line("http://h/login admin:s3cret") is None
+    assert parse_results_line("http://h/login | admin") is None
+
+def test_found_again_bumps_hits(tmp_path):
+    results = store(tmp_path)
+    results.add("http://h/login", "admin", "old")
+    results.flush()
+    results.add("http://h/login", "admin", "new")
+    rows = results.query(host="h")
+    assert len(rows) == 1
+    assert rows[0]["password"] == "new" and rows[0]["hits"] == 2
+    assert results.count(url="http://other/login") == 0
+
+def test_legacy_file_imported_once(tmp_path):
+    legacy = tmp_path / "results.txt"
+    legacy.write_text("http://a/login | admin:pw\nhttp://b/login | a:b:c\n\nhttp://c/login | root:toor\nhttp://d/login | root\n", encoding="utf-8")
+    results = store(tmp_path, str(legacy))
+    assert results.count() == 3
+    assert results.query(host="b")[0]["password"] == "b:c"
+    reopened = store(tmp_path, str(legacy))
+    assert reopened.import_text(str(legacy)) == 0
+    assert reopened.count() == 3
+
+def test_worker_process_forwards_rows(tmp_path):
+    results = store(tmp_path)
+    forwarded = []
+    results.forward_to(forwarded.extend)
+    results.add("http://h/login", "admin", "pw", found=1.0)
+    results.flush()
+    assert forwarded == [("http://h/login", "admin", "pw", 1.0, "crack")]
+    assert not (tmp_path / "results.db").exists()
@@ -0,0 +1,106 @@
+import threading
+from scheduler import WorkStealingScheduler, CancelToken
+
+class CancelOnHandout(WorkStealingScheduler):
+    """Cancels the chosen targets right after their task was handed out."""
+
+    def __init__(self, *args, cancel_urls=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cancel_urls = set(cancel_urls)
+
+    def _next_task(self, worker_id):
+        task = super()._next_task(worker_id)
+        if task is not None and task.target.url in self.cancel_urls:
+            task.target.cancel()
+        return task
+
+def chunks(total, size):
+    return ((None, lo, min(lo + size, total)) for lo in range(0, total, size))
+
+def run_scheduler(scheduler, urls, total):
+    for url in urls:
+        scheduler.add_target(url, chunks(total, scheduler.chunk_size))
+    thread = threading.Thread(target=scheduler.run, daemon=True)
+    thread.start()
+    thread.join(10)
+    assert not thread.is_alive(), "scheduler did not finish"
+
+def test_runs_every_chunk_once():
+    seen = []
+    lock = threading.Lock()
+
+    def execute(worker_id, task):
+        with lock:
+            seen.append((task.target.url, task.lo, task.hi))
+
+    scheduler = WorkStealingScheduler(4, execute, host_limit=2, chunk_size=3)
+    run_scheduler(scheduler, ["http://a/1", "http://a/2", "http://b/1"], 10)
+    assert sorted(seen) == sorted((url, lo, min(lo + 3, 10)) for url in ["http://a/1", "http://a/2", "http://b/1"] for lo in range(0, 10, 3))
+    assert scheduler.stats["tasks"] == 12
+    assert scheduler._host_active == {"a": 0, "b": 0}
+
+def test_host_limit_holds():
+    active = {"now": 0, "max": 0}
+    lock = threading.Lock()
+    release = threading.Event()
+
+    def execute(worker_id, task):
+        with lock:
+            active["now"] += 1
+            active["max"] = max(active["max"], active["now"])
+        release.wait(0.01)
+        with lock:
+            active["now"] -= 1
+
+    scheduler = WorkStealingScheduler(6, execute, host_limit=2, chunk_size=1)
+    run_scheduler(scheduler, ["http://h/a", "http://h/b"], 6)
+    assert active["max"] <= 2
+
+def test_cancel_during_handout_releases_host_slot():
+    ran = []
+    scheduler = CancelOnHandout(1, lambda worker_id, task: ran.append(task.target.url), host_limit=2, chunk_size=5, cancel_urls={"http://h/1", "http://h/2"})
+    run_scheduler(scheduler, ["http://h/1", "http://h/2", "http://h/3"], 5)
+    assert ran == ["http://h/3"]
+    assert scheduler._host_active == {"h": 0}
+    assert scheduler.stats["dropped"] == 2
+
+def test_cancelled_target_chunks_are_dropped_and_finalized():
+    done = []
+    token = CancelToken()
+    token.cancel()
+    scheduler = WorkStealingScheduler(2, lambda worker_id, task: None, chunk_size=2, on_target_done=lambda target: done.append(target.url), token=token)
+    run_scheduler(scheduler, ["http://x/login"], 6)
+    assert done == ["http://x/login"]
+    assert scheduler.stats["tasks"] == 0
+
+def test_feed_is_pulled_lazily():
+    pulled = []
+
+    def feed():
+        for lo in range(0, 100, 10):
+            pulled.append(lo)
+            yield None, lo, lo + 10
+
+    first = threading.Event()
+    scheduler = WorkStealingScheduler(2, lambda worker_id, task: first.wait(5), chunk_size=10)
+    target = scheduler.add_target("http://lazy/login", feed())
+    assert len(pulled) == 2
+    scheduler.start()
+    scheduler.close()
+    first.set()
+    scheduler.join()
+    assert len(pulled) == 10
+    assert target.finalized and target.chunks == 10
+
+def test_feed_error_finalizes_target_as_incomplete():
+    done = []
+
+    def feed():
+        yield None, 0, 5
+        raise OSError("wordlist closed")
+
+    scheduler = WorkStealingScheduler(1, lambda worker_id, task: None, chunk_size=5, on_target_done=done.append)
+    target = scheduler.add_target("http://broken/login", feed())
+    scheduler.run()
+    assert done == [target]
+    assert target.data["incomplete"]
@@ -0,0 +1,53 @@
+import os
+import re
+import asyncio
+import threading
+import config
+from tracing import Tracer, SlowAttemptTraces, set_lane
+
+def test_spans_land_on_stable_worker_tracks():
+    tracer = Tracer()
+    tracer.start()
+
+    async def attempt(lane):
+        set_lane(lane)
+        tracer.complete("attempt", "complex", 0.01)
+
+    async def main():
+        for _ in range(3):
+            await asyncio.gather(attempt("complex-0"), attempt("complex-1"))
+
+    asyncio.run(main())
+    snapshot = tracer.snapshot()
+    tids = {e["tid"] for e in snapshot["events"]}
+    assert len(snapshot["events"]) == 6 and len(tids) == 2
+    assert sorted(snapshot["names"].values()) == ["complex-0", "complex-1"]
+
+def test_max_events_is_read_at_start(monkeypatch):
+    tracer = Tracer()
+    monkeypatch.setattr(config, "TRACE_MAX_EVENTS", 5)
+    tracer.start()
+    threads = [threading.Thread(target=lambda: [tracer.complete("x", "t", 0.001) for _ in range(10)]) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    snapshot = tracer.snapshot()
+    assert len(snapshot["events"]) == 5
+    assert snapshot["dropped"] == 35
+
+def test_slow_traces_follow_config(monkeypatch):
+    traces = SlowAttemptTraces()
+    monkeypatch.setattr(config, "TRACE_PLAYWRIGHT_SLOWEST", 2)
+    assert traces.n == 2
+    traces.keep(1.0, "/nonexistent/a.zip")
+    traces.keep(3.0, "/nonexistent/b.zip")
+    traces.keep(2.0, "/nonexistent/c.zip")
+    assert [k["path"] for k in traces.kept()] == ["/nonexistent/b.zip", "/nonexistent/c.zip"]
+    assert not traces.qualifies(1.5)
+
+def test_trace_file_names_are_portable(tmp_path):
+    traces = SlowAttemptTraces(n=1, directory=str(tmp_path))
+    name = os.path.basename(traces.path_for("http://admin:pw@10.0.0.5:8080/login", 1.234))
+    assert name.startswith("attempt-1234ms-admin_pw_10.0.0.5_8080-") and name.endswith(".zip")
+    assert re.fullmatch(r"[A-Za-z0-9._-]+", name)
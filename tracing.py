@@ -0,0 +1,166 @@
+import os
+import json
+import time
+import heapq
+import uuid
+import threading
+import contextvars
+import config
+from utils import logger, host_of, safe_filename
+
+_lane = contextvars.ContextVar("trace_lane", default=None)
+
+def _now_us():
+    return time.perf_counter() * 1e6
+
+def set_lane(name):
+    """Records spans of the current thread or asyncio task under ``name``
+    instead of the thread name, e.g. the scheduler worker an async browser
+    attempt runs for."""
+    _lane.set(name)
+
+class Tracer:
+    """Opt-in Chrome trace-event recorder (chrome://tracing, Perfetto).
+
+    Every phase timed through ``metrics`` becomes a complete ("X") event on
+    a track named after the worker that ran it: the thread, or the lane set
+    with ``set_lane`` (async browser attempts use their scheduler worker),
+    with the target in ``args``. Timestamps come from the monotonic clock,
+    so events merged from worker processes line up. Recording stops after
+    TRACE_MAX_EVENTS events, read at ``start``, and the overflow is only
+    counted.
+    """
+
+    def __init__(self, max_events=None):
+        self._max_events = max_events
+        self.max_events = max_events or config.TRACE_MAX_EVENTS
+        self.enabled = False
+        self.dropped = 0
+        self._events = []
+        self._names = {}
+        self._tids = {}
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def start(self):
+        with self._lock:
+            self.max_events = self._max_events or config.TRACE_MAX_EVENTS
+            self._pid = os.getpid()
+            self.enabled = True
+
+    def reset(self):
+        with self._lock:
+            self._events = []
+            self._names = {}
+            self._tids = {}
+            self.dropped = 0
+
+    def _tid(self):
+        name = _lane.get() or threading.current_thread().name
+        tid = self._tids.get(name)
+        if tid is None:
+            tid = self._tids[name] = len(self._tids) + 1
+            self._names[(self._pid, tid)] = name
+        return tid
+
+    def span(self, name, cat, start_us, dur_us, target=None, **args):
+        if not self.enabled:
+            return
+        if target is not None:
+            args["target"] = target
+        with self._lock:
+            if len(self._events) >= self.max_events:
+                self.dropped += 1
+                return
+            self._events.append({"name": name, "cat": cat, "ph": "X", "ts": start_us, "dur": dur_us, "pid": self._pid, "tid": self._tid(), "args": args})
+
+    def complete(self, name, cat, seconds, target=None, **args):
+        if self.enabled:
+            dur = seconds * 1e6
+            self.span(name, cat, _now_us() - dur, dur, target, **args)
+
+    def snapshot(self):
+        with self._lock:
+            return {"events": list(self._events), "names": dict(self._names), "dropped": self.dropped}
+
+    def merge(self, snapshot):
+        with self._lock:
+            room = max(0, self.max_events - len(self._events))
+            self._events.extend(snapshot["events"][:room])
+            self.dropped += snapshot["dropped"] + max(0, len(snapshot["events"]) - room)
+            self._names.update(snapshot["names"])
+
+    def export(self, path=None):
+        path = path or config.TRACE_FILE
+        with self._lock:
+            events = list(self._events)
+            names = dict(self._names)
+            dropped = self.dropped
+        meta = []
+        for pid in sorted({pid for pid, _ in names}):
+            label = "lichauto" if pid == self._pid else f"lichauto-worker-{pid}"
+            meta.append({"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": label}})
+        for (pid, tid), name in names.items():
+            meta.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}})
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": meta + events, "displayTimeUnit": "ms", "otherData": {"dropped": dropped}}, f)
+        os.replace(tmp, path)
+        logger.info(f"[Trace] Wrote {len(events)} events to {path} (dropped={dropped})")
+        return path
+
+class SlowAttemptTraces:
+    """Playwright traces of the ``n`` slowest browser attempts.
+
+    Each attempt runs in its own tracing chunk. When the chunk ends the
+    trace is only written if the attempt is slower than the fastest one
+    kept so far, and the file it displaces is deleted.
+    """
+
+    def __init__(self, n=None, directory=None):
+        self._n = n
+        self._directory = directory
+        self._kept = []
+        self._lock = threading.Lock()
+
+    @property
+    def n(self):
+        return config.TRACE_PLAYWRIGHT_SLOWEST if self._n is None else self._n
+
+    @property
+    def directory(self):
+        return self._directory or config.TRACE_PLAYWRIGHT_DIR
+
+    @property
+    def active(self):
+        return self.n > 0 and tracer.enabled
+
+    def qualifies(self, seconds):
+        with self._lock:
+            return len(self._kept) < self.n or seconds > self._kept[0][0]
+
+    def path_for(self, url, seconds):
+        os.makedirs(self.directory, exist_ok=True)
+        return os.path.join(self.directory, safe_filename(f"attempt-{int(seconds * 1000)}ms-{host_of(url)}-{uuid.uuid4().hex[:6]}.zip"))
+
+    def keep(self, seconds, path):
+        with self._lock:
+            heapq.heappush(self._kept, (seconds, path))
+            evicted = heapq.heappop(self._kept) if len(self._kept) > self.n else None
+        if evicted is not None:
+            try:
+                os.remove(evicted[1])
+            except OSError:
+                pass
+
+    def kept(self):
+        with self._lock:
+            return [{"seconds": round(s, 3), "path": p} for s, p in sorted(self._kept, reverse=True)]
+
+    def reset(self):
+        with self._lock:
+            self._kept = []
+
+tracer = Tracer()
+slow_traces = SlowAttemptTraces()
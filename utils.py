@@ -1,32 +1,175 @@
+import os
+import re
+import sys
+import json
+import atexit
 import logging
 import queue
 import logging.handlers
 import threading
+from collections import deque
+from datetime import datetime
+from urllib.parse import urlsplit
+import config
 
-log_queue = queue.Queue()
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+class RingBufferHandler(logging.Handler):
+    """Keeps the most recent records unformatted in a bounded deque.
+
+    deque.append with maxlen is atomic, so ``handle`` skips the handler
+    lock; records are only formatted when somebody reads them back.
+    """
+
+    def __init__(self, capacity):
+        super().__init__()
+        self.records = deque(maxlen=capacity)
+
+    def handle(self, record):
+        rv = self.filter(record)
+        if rv:
+            self.emit(record)
+        return rv
+
+    def emit(self, record):
+        self.records.append(record)
+
+    def recent(self, limit=None):
+        records = list(self.records)
+        if limit:
+            records = records[-limit:]
+        return [self.format(r) for r in records]
+
+class AsyncQueueHandler(logging.handlers.QueueHandler):
+    def handle(self, record):
+        rv = self.filter(record)
+        if rv:
+            self.queue.put_nowait(record)
+        return rv
+
+    def prepare(self, record):
+        return record
+
+class LineQueueHandler(logging.Handler):
+    """Puts formatted lines on ``log_queue``, dropping the oldest past
+    ``capacity``, for readers of the original string queue."""
+
+    def __init__(self, line_queue, capacity=1000):
+        super().__init__()
+        self.queue = line_queue
+        self.capacity = capacity
 
-class QueueHandler(logging.Handler):
     def emit(self, record):
         try:
-            msg = self.format(record)
-            log_queue.put(msg)
-            if log_queue.qsize() > 1000:
+            self.queue.put(self.format(record))
+            if self.queue.qsize() > self.capacity:
                 try:
-                    log_queue.get_nowait()
+                    self.queue.get_nowait()
                 except queue.Empty:
                     pass
         except Exception:
             self.handleError(record)
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+class JsonLinesHandler(logging.Handler):
+    def __init__(self, path):
+        super().__init__()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.stream = open(path, "a", encoding="utf-8", buffering=1 << 16)
+
+    def emit(self, record):
+        try:
+            event = {
+                "ts": round(record.created, 6),
+                "level": record.levelname,
+                "thread": record.threadName,
+                "target": getattr(record, "target", None),
+                "msg": record.getMessage()
+            }
+            if record.exc_info:
+                event["exc"] = logging.Formatter().formatException(record.exc_info)
+            self.stream.write(json.dumps(event, ensure_ascii=False) + "\n")
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        if not self.stream.closed:
+            self.stream.flush()
+
+    def close(self):
+        self.flush()
+        self.stream.close()
+        super().close()
+
+class AttemptSampler:
+    """Lets the first ``first`` per-attempt lines of a target through, then
+    one in every ``every``. Counters are unlocked, so sampling under heavy
+    concurrency is approximate; only adding and dropping targets takes the
+    lock. Finished targets are forgotten, and past ``max_targets`` the
+    oldest counter is evicted."""
+
+    def __init__(self, first, every, max_targets=1024):
+        self.first = first
+        self.every = every
+        self.max_targets = max_targets
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def allow(self, target):
+        n = self._counts.get(target)
+        if n is None:
+            with self._lock:
+                n = self._counts.get(target, 0) + 1
+                if n == 1:
+                    while len(self._counts) >= self.max_targets:
+                        del self._counts[next(iter(self._counts))]
+                self._counts[target] = n
+        else:
+            n += 1
+            self._counts[target] = n
+        return n <= self.first or (self.every > 0 and n % self.every == 0)
+
+    def forget(self, target):
+        with self._lock:
+            self._counts.pop(target, None)
+
+    def reset(self):
+        with self._lock:
+            self._counts = {}
+
+logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
 logger = logging.getLogger('LichAutoAPI')
+logger.propagate = False
+attempt_logger = logger.getChild('attempts')
+attempt_sampler = AttemptSampler(config.LOG_SAMPLE_FIRST, config.LOG_SAMPLE_EVERY, config.LOG_SAMPLE_MAX_TARGETS)
+
+ring_handler = RingBufferHandler(config.LOG_RING_SIZE)
+ring_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+logger.addHandler(ring_handler)
+
+log_queue = queue.Queue()
+_sinks = [logging.StreamHandler(sys.stderr), LineQueueHandler(log_queue)]
+for _sink in _sinks:
+    _sink.setFormatter(logging.Formatter(LOG_FORMAT))
+if config.LOG_JSONL_FILE:
+    _sinks.append(JsonLinesHandler(config.LOG_JSONL_FILE))
+_record_queue = queue.SimpleQueue()
+logger.addHandler(AsyncQueueHandler(_record_queue))
+log_listener = logging.handlers.QueueListener(_record_queue, *_sinks, respect_handler_level=True)
+log_listener.start()
 
-queue_handler = QueueHandler()
-queue_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
-logger.addHandler(queue_handler)
+def _stop_logging():
+    log_listener.stop()
+    for handler in _sinks:
+        handler.close()
+
+atexit.register(_stop_logging)
+
+def recent_logs(limit=None):
+    return ring_handler.recent(limit)
+
+def log_attempt(target, msg, *args):
+    if attempt_logger.isEnabledFor(logging.INFO) and attempt_sampler.allow(target):
+        attempt_logger.info(msg, *args, extra={"target": target})
 
 ocr_engine = None
 ocr_lock = threading.Lock()
@@ -64,3 +207,39 @@ def load_file(filepath):
     except FileNotFoundError:
         logger.warning(f"File not found: {filepath}")
         return []
+
+def host_of(url):
+    return urlsplit(url).netloc.lower()
+
+def safe_filename(text):
+    """``text`` with every character outside [A-Za-z0-9._-] replaced, so it
+    is a valid file name on Windows too."""
+    return re.sub(r"[^A-Za-z0-9._-]", "_", text)
+
+class HostLimiter:
+    def __init__(self, limit):
+        self.limit = limit
+        self._slots = {}
+        self._lock = threading.Lock()
+
+    def slot(self, url):
+        host = host_of(url)
+        with self._lock:
+            sem = self._slots.get(host)
+            if sem is None:
+                sem = self._slots[host] = threading.BoundedSemaphore(self.limit)
+        return sem
+
+host_limiter = HostLimiter(config.PER_HOST_LIMIT)
+
+def save_result(url, user, pwd, results):
+    from results_store import results_store
+    result = {
+        "url": url,
+        "username": user,
+        "password": pwd,
+        "timestamp": datetime.now().isoformat()
+    }
+    results.append(result)
+    results_store.add(url, user, pwd)
+    return result